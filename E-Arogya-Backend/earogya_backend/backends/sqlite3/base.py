@@ -0,0 +1,50 @@
+"""
+SQLite backend that configures every connection it opens
+
+Backports two OPTIONS of Django 5.1's SQLite backend to Django 4.2:
+
+* 'init_command': ';'-separated statements (PRAGMAs) run on each new
+  connection
+* 'transaction_mode': DEFERRED, IMMEDIATE or EXCLUSIVE for the BEGIN of
+  atomic blocks. With IMMEDIATE a writing transaction takes the write lock
+  up front and waits for it (busy_timeout) instead of failing with
+  "database is locked" when it later tries to upgrade a read lock.
+
+On Django 5.1+ the stock django.db.backends.sqlite3 engine accepts the
+same OPTIONS.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.init_command = params.pop('init_command', None)
+        transaction_mode = params.pop('transaction_mode', None)
+        if transaction_mode is not None:
+            transaction_mode = transaction_mode.upper()
+            if transaction_mode not in TRANSACTION_MODES:
+                raise ImproperlyConfigured(
+                    f"transaction_mode must be one of {', '.join(TRANSACTION_MODES)}, not {transaction_mode!r}"
+                )
+        self.transaction_mode = transaction_mode
+        return params
+    
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        if self.init_command:
+            for statement in self.init_command.split(';'):
+                if statement.strip():
+                    connection.execute(statement)
+        return connection
+    
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode is None:
+            super()._start_transaction_under_autocommit()
+        else:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -0,0 +1,149 @@
+"""
+DATABASES built from environment variables
+
+DATABASE_ENGINE picks a profile:
+
+* sqlite (default): the file at SQLITE_PATH (default <BASE_DIR>/db.sqlite3)
+  through earogya_backend.backends.sqlite3, which applies these PRAGMAs on
+  every new connection and starts transactions with SQLITE_TRANSACTION_MODE
+  (default IMMEDIATE):
+
+      SQLITE_JOURNAL_MODE   unset      WAL lets readers run beside the writer
+      SQLITE_SYNCHRONOUS    NORMAL     with WAL (fsync at checkpoints), else FULL
+      SQLITE_MMAP_SIZE      268435456  bytes of the file read through mmap
+      SQLITE_BUSY_TIMEOUT   5000       ms a writer waits for the lock
+
+  The journal mode is stored in the database file, so it is only changed
+  when SQLITE_JOURNAL_MODE is set; the db.sqlite3 kept in git stays as it
+  is. Set SQLITE_JOURNAL_MODE=WAL for deployments.
+
+* postgresql: POSTGRES_DB, POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST
+  and POSTGRES_PORT, with persistent connections (DB_CONN_MAX_AGE seconds,
+  default 600) checked before reuse (DB_CONN_HEALTH_CHECKS). DB_POOL adds
+  pooling: 'pgbouncer' when POSTGRES_HOST is a PgBouncer in transaction
+  mode, or 'psycopg' for psycopg's pool inside each process (Django 5.1+,
+  sized by DB_POOL_MIN_SIZE and DB_POOL_MAX_SIZE).
+
+DB_CONN_MAX_AGE also keeps SQLite connections open between requests, so
+the PRAGMAs run once per connection rather than once per request.
+
+A read replica is added as the 'replica' alias when SQLITE_REPLICA_PATH
+(sqlite) or POSTGRES_REPLICA_HOST and optionally POSTGRES_REPLICA_PORT
+(postgresql) are set; see health_content.replica for what reads from it.
+"""
+import os
+
+import django
+from django.core.exceptions import ImproperlyConfigured
+
+
+JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+POOL_MODES = ('', 'pgbouncer', 'psycopg')
+
+
+def env_choice(environ, name, default, choices):
+    value = environ.get(name, default)
+    if value.upper() not in (choice.upper() for choice in choices):
+        raise ImproperlyConfigured(f"{name} must be one of {', '.join(choices)}, not {value!r}")
+    return value
+
+
+def env_int(environ, name, default):
+    value = environ.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ImproperlyConfigured(f"{name} must be an integer, not {value!r}")
+
+
+def env_bool(environ, name, default):
+    value = environ.get(name)
+    if value in (None, ''):
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def sqlite_database(path, environ=os.environ):
+    """Settings for one SQLite file with the tuned connection profile"""
+    pragmas = {}
+    journal_mode = environ.get('SQLITE_JOURNAL_MODE')
+    if journal_mode:
+        pragmas['journal_mode'] = env_choice(environ, 'SQLITE_JOURNAL_MODE', 'WAL', JOURNAL_MODES)
+    # NORMAL only risks losing the last commits with WAL; rollback journals
+    # keep SQLite's FULL
+    synchronous = 'NORMAL' if (journal_mode or '').upper() == 'WAL' else 'FULL'
+    pragmas['synchronous'] = env_choice(environ, 'SQLITE_SYNCHRONOUS', synchronous, SYNCHRONOUS_MODES)
+    pragmas['mmap_size'] = env_int(environ, 'SQLITE_MMAP_SIZE', 256 * 1024 * 1024)
+    pragmas['busy_timeout'] = env_int(environ, 'SQLITE_BUSY_TIMEOUT', 5000)
+    return {
+        'ENGINE': 'earogya_backend.backends.sqlite3',
+        'NAME': path,
+        'CONN_MAX_AGE': env_int(environ, 'DB_CONN_MAX_AGE', 600),
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name} = {value}' for name, value in pragmas.items()),
+            'transaction_mode': env_choice(
+                environ, 'SQLITE_TRANSACTION_MODE', 'IMMEDIATE', ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+            ),
+        },
+    }
+
+
+def postgresql_database(environ=os.environ):
+    """Settings for PostgreSQL with persistent or pooled connections"""
+    database = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': environ.get('POSTGRES_DB', 'earogya'),
+        'USER': environ.get('POSTGRES_USER', 'earogya'),
+        'PASSWORD': environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': environ.get('POSTGRES_HOST', 'localhost'),
+        'PORT': environ.get('POSTGRES_PORT', '5432'),
+        'CONN_MAX_AGE': env_int(environ, 'DB_CONN_MAX_AGE', 600),
+        'CONN_HEALTH_CHECKS': env_bool(environ, 'DB_CONN_HEALTH_CHECKS', True),
+        'OPTIONS': {'connect_timeout': env_int(environ, 'POSTGRES_CONNECT_TIMEOUT', 5)},
+    }
+    pool = env_choice(environ, 'DB_POOL', '', POOL_MODES).lower()
+    if pool == 'pgbouncer':
+        # Transaction pooling hands consecutive transactions different
+        # server connections, which breaks server-side cursors
+        database['DISABLE_SERVER_SIDE_CURSORS'] = True
+    elif pool == 'psycopg':
+        if django.VERSION < (5, 1):
+            raise ImproperlyConfigured("DB_POOL=psycopg needs Django 5.1 or later; use DB_POOL=pgbouncer")
+        # Pooled connections are returned to the pool, not kept per thread
+        database['CONN_MAX_AGE'] = 0
+        database['OPTIONS']['pool'] = {
+            'min_size': env_int(environ, 'DB_POOL_MIN_SIZE', 2),
+            'max_size': env_int(environ, 'DB_POOL_MAX_SIZE', 10),
+        }
+    return database
+
+
+def database_settings(base_dir, environ=os.environ):
+    """DATABASES for the profile selected by DATABASE_ENGINE"""
+    engine = environ.get('DATABASE_ENGINE', 'sqlite').lower()
+    if engine in ('sqlite', 'sqlite3'):
+        default = sqlite_database(environ.get('SQLITE_PATH') or str(base_dir / 'db.sqlite3'), environ)
+    elif engine in ('postgres', 'postgresql'):
+        default = postgresql_database(environ)
+    else:
+        raise ImproperlyConfigured(f"DATABASE_ENGINE must be 'sqlite' or 'postgresql', not {engine!r}")
+    databases = {'default': default}
+
+    replica = None
+    if engine.startswith('sqlite') and environ.get('SQLITE_REPLICA_PATH'):
+        replica = sqlite_database(environ['SQLITE_REPLICA_PATH'], environ)
+    elif engine.startswith('postgres') and environ.get('POSTGRES_REPLICA_HOST'):
+        replica = {
+            **default,
+            'HOST': environ['POSTGRES_REPLICA_HOST'],
+            'PORT': environ.get('POSTGRES_REPLICA_PORT', default['PORT']),
+            'OPTIONS': dict(default['OPTIONS']),
+        }
+    if replica is not None:
+        # Tests read and write one database
+        replica['TEST'] = {'MIRROR': 'default'}
+        databases['replica'] = replica
+    return databases
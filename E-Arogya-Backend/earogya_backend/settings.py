@@ -5,6 +5,8 @@ Django settings for earogya_backend project.
 from pathlib import Path
 import os
 
+from .databases import database_settings
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -64,6 +66,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Prometheus request metrics, see HEALTH_CONTENT['METRICS_ENABLED']
+    'health_content.metrics.MetricsMiddleware',
+    # Inactive unless HEALTH_CONTENT['PROFILING_ENABLED'] is set
+    'health_content.profiling.ProfilingMiddleware',
+    # Inactive unless DATABASES has a 'replica' alias
+    'health_content.replica.ReplicaRoutingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -94,13 +102,12 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'earogya_backend.wsgi.application'
 
-# Database
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+# Database: SQLite by default (WAL with SQLITE_JOURNAL_MODE=WAL), PostgreSQL with
+# DATABASE_ENGINE=postgresql (see earogya_backend/databases.py for the variables)
+DATABASES = database_settings(BASE_DIR)
+
+# Read-only requests use DATABASES['replica'] when one is configured
+DATABASE_ROUTERS = ['health_content.replica.ReplicaRouter']
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -140,7 +147,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'health_content.renderers.ORJSONRenderer',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
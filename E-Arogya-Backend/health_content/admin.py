@@ -5,7 +5,15 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
-from .models import HealthCategory, MediaContent, ContentRating, ContentView
+from django.db.models import Count
+from django.utils import timezone
+from .cache import (
+    CATEGORY_LIST_TAG, CONTENT_LIST_TAG, category_tag, content_tag, response_cache
+)
+from .models import (
+    HealthCategory, MediaContent, ContentRating, ContentView, ContentViewRollup, Tag, Tombstone
+)
+from .stats import invalidate_content_stats
 
 
 @admin.register(HealthCategory)
@@ -27,12 +35,16 @@ class HealthCategoryAdmin(admin.ModelAdmin):
         ('Display Settings', {
             'fields': ('icon', 'color', 'order', 'is_active')
         }),
+        ('Content Counters', {
+            'fields': ('active_content_count', 'content_type_counts'),
+            'classes': ('collapse',)
+        }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
         }),
     )
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['active_content_count', 'content_type_counts', 'created_at', 'updated_at']
     
     def color_display(self, obj):
         """Display color as a colored box"""
@@ -99,27 +111,46 @@ class MediaContentAdmin(admin.ModelAdmin):
     
     actions = ['mark_as_featured', 'mark_as_not_featured', 'mark_as_verified', 'mark_as_active']
     
+    def _bulk_update(self, queryset, *extra_tags, **values):
+        """
+        queryset.update() skips the save signals, so expire the cached
+        responses and stats snapshot the way media_content_saved does
+        """
+        rows = list(queryset.values_list('id', 'category_id'))
+        updated = queryset.update(**values, updated_at=timezone.now())
+        response_cache.invalidate(
+            *(content_tag(content_id) for content_id, _ in rows),
+            *(category_tag(category_id) for category_id in {category_id for _, category_id in rows}),
+            CONTENT_LIST_TAG, *extra_tags,
+        )
+        invalidate_content_stats()
+        return updated, rows
+    
     def mark_as_featured(self, request, queryset):
         """Mark selected content as featured"""
-        updated = queryset.update(is_featured=True)
+        updated, _ = self._bulk_update(queryset, is_featured=True)
         self.message_user(request, f'{updated} items marked as featured.')
     mark_as_featured.short_description = "Mark selected items as featured"
     
     def mark_as_not_featured(self, request, queryset):
         """Remove featured status from selected content"""
-        updated = queryset.update(is_featured=False)
+        updated, _ = self._bulk_update(queryset, is_featured=False)
         self.message_user(request, f'{updated} items unmarked as featured.')
     mark_as_not_featured.short_description = "Remove featured status"
     
     def mark_as_verified(self, request, queryset):
         """Mark selected content as verified"""
-        updated = queryset.update(is_verified=True)
+        updated, _ = self._bulk_update(queryset, is_verified=True)
         self.message_user(request, f'{updated} items marked as verified.')
     mark_as_verified.short_description = "Mark selected items as verified"
     
     def mark_as_active(self, request, queryset):
         """Mark selected content as active"""
-        updated = queryset.update(is_active=True)
+        # updated_at is bumped for the sync feed; counters and tombstones are
+        # refreshed explicitly
+        updated, rows = self._bulk_update(queryset, CATEGORY_LIST_TAG, is_active=True)
+        HealthCategory.refresh_content_counts({category_id for _, category_id in rows})
+        Tombstone.objects.filter(object_type='content', object_id__in=[content_id for content_id, _ in rows]).delete()
         self.message_user(request, f'{updated} items marked as active.')
     mark_as_active.short_description = "Mark selected items as active"
     
@@ -170,6 +201,66 @@ class ContentViewAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related('content', 'content__category')
 
 
+@admin.register(ContentViewRollup)
+class ContentViewRollupAdmin(admin.ModelAdmin):
+    """
+    Admin interface for aggregated view analytics
+    """
+    list_display = ['content', 'category', 'granularity', 'period_start', 'views']
+    list_filter = ['granularity', 'category']
+    date_hierarchy = 'period_start'
+    ordering = ['-period_start']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def get_queryset(self, request):
+        """Optimize queryset with select_related"""
+        return super().get_queryset(request).select_related('content', 'category')
+
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    """
+    Tags are edited through MediaContent.tags; this lists them with usage
+    """
+    list_display = ['name', 'content_total']
+    search_fields = ['name']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(content_total=Count('content_links'))
+    
+    def content_total(self, obj):
+        return obj.content_total
+    content_total.short_description = 'Content items'
+    content_total.admin_order_field = 'content_total'
+
+
+@admin.register(Tombstone)
+class TombstoneAdmin(admin.ModelAdmin):
+    """
+    Read-only view of removals published through the sync feed
+    """
+    list_display = ['object_type', 'object_id', 'reason', 'removed_at']
+    list_filter = ['object_type', 'reason']
+    ordering = ['-removed_at']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 # Customize admin site header and title
 admin.site.site_header = "E-Arogya Health Content Admin"
 admin.site.site_title = "E-Arogya Admin"
@@ -8,3 +8,6 @@ class HealthContentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'health_content'
     verbose_name = 'Health Content Management'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
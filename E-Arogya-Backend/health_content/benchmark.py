@@ -0,0 +1,527 @@
+"""
+Synthetic data and in-process latency benchmarks for the health_content API
+
+generate_benchmark_data() fills the database with deterministic synthetic
+categories, content, ratings and views (bulk inserts, indexes and counters
+maintained), all marked with BENCHMARK_PREFIX so they can be removed again.
+run_benchmarks() replays every endpoint of ENDPOINT_BUDGETS through the
+test client and reports latency percentiles, queries per request and
+throughput; results are plain dicts meant to be written out as JSON and
+compared across commits. run_write_benchmark() hammers the write
+endpoints from several threads to compare database profiles, and
+run_metrics_benchmark() measures what the Prometheus instrumentation adds
+to a request.
+"""
+import platform
+import random
+import subprocess
+import threading
+import time
+from datetime import timedelta
+
+import django
+from django.core.cache import cache
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .cache import response_cache
+from .conf import get_setting
+from .metrics import MetricsMiddleware, MetricsRegistry, render_metrics
+from .models import (
+    ContentRating, ContentView, ContentViewRollup, HealthCategory, MediaContent, MediaContentTag,
+    RelatedContent
+)
+from .profiling import percentile
+from .querybudget import ENDPOINT_BUDGETS, WORST_CASE_SETTINGS
+from .search import get_search_backend
+from .stats import invalidate_content_stats
+from .tags import index_tags
+
+
+BENCHMARK_PREFIX = 'bench-'
+
+# Vocabulary for titles, descriptions and tags; includes words the
+# benchmarked search query ('health') and tag filter ('first aid') match
+WORDS = (
+    'health nutrition hygiene vaccine diet sleep stress anxiety exercise water '
+    'dengue malaria fever cough child infant mother elderly heart diabetes '
+    'blood pressure vitamin protein fiber sugar salt handwashing dental care '
+    'monsoon winter summer prevention treatment symptoms guide tips basics'
+).split()
+TAGS = ('first aid', 'nutrition', 'mental health', 'child health', 'hygiene', 'prevention', 'wellness')
+CONTENT_TYPES = [value for value, _ in MediaContent.CONTENT_TYPES]
+PERCENTILES = (50, 95, 99)
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def _ip(index):
+    return f"10.{(index >> 16) & 255}.{(index >> 8) & 255}.{index & 255}"
+
+
+def clear_benchmark_data():
+    """
+    Delete benchmark categories, their content and everything attached to
+    it. Tables are emptied child first with plain DELETE statements, so no
+    delete signals run: no per-row counter refreshes and no sync tombstones
+    for data clients never saw. Returns the number of rows deleted.
+    """
+    categories = HealthCategory.objects.filter(slug__startswith=BENCHMARK_PREFIX)
+    content = MediaContent.objects.filter(category__in=categories.values('pk'))
+    content_ids = content.values('pk')
+    deleted = 0
+    with transaction.atomic():
+        get_search_backend().remove_queryset(content)
+        for queryset in (
+            MediaContentTag.objects.filter(content__in=content_ids),
+            RelatedContent.objects.filter(Q(content__in=content_ids) | Q(related__in=content_ids)),
+            ContentViewRollup.objects.filter(content__in=content_ids),
+            ContentRating.objects.filter(content__in=content_ids),
+            ContentView.objects.filter(content__in=content_ids),
+            content,
+            categories,
+        ):
+            deleted += queryset._raw_delete(queryset.db)
+    response_cache.clear()
+    invalidate_content_stats()
+    return deleted
+
+
+def generate_benchmark_data(content=10000, categories=20, ratings=None, views=None,
+                            seed=0, batch_size=5000, stdout=None):
+    """
+    Insert synthetic benchmark data: `content` items spread over
+    `categories` categories, `ratings` ratings (default one per item) and
+    `views` raw views (default ten per item), deterministic for a seed.
+    """
+    ratings = content if ratings is None else ratings
+    views = content * 10 if views is None else views
+    if ratings > content << 24:
+        raise ValueError("Too many ratings: each one needs a distinct IP per content item")
+    rng = random.Random(seed)
+    now = timezone.now()
+    search_backend = get_search_backend()
+
+    def report(message):
+        if stdout is not None:
+            stdout.write(message)
+
+    HealthCategory.objects.bulk_create([
+        HealthCategory(
+            name=f"Benchmark {seed}-{index}", slug=f"{BENCHMARK_PREFIX}{seed}-{index}",
+            description=_text(rng, 12), order=1000 + index,
+        )
+        for index in range(categories)
+    ])
+    category_ids = list(
+        HealthCategory.objects.filter(slug__startswith=f"{BENCHMARK_PREFIX}{seed}-").values_list('pk', flat=True)
+    )
+
+    # Content j gets the ratings j, j + content, j + 2 * content, ...
+    def rating_values(index):
+        return [1 + (rating * 7919 + seed) % 5 for rating in range(index, ratings, content)]
+
+    content_ids = []
+    for start in range(0, content, batch_size):
+        rows = []
+        for index in range(start, min(start + batch_size, content)):
+            title = f"{_text(rng, 5).title()} {seed}-{index}"
+            values = rating_values(index)
+            row = MediaContent(
+                category_id=category_ids[index % len(category_ids)],
+                title=title,
+                slug=f"{BENCHMARK_PREFIX}{seed}-{index}",
+                description=_text(rng, 40),
+                content_type=rng.choice(CONTENT_TYPES),
+                url=f"https://example.org/benchmark/{seed}/{index}",
+                tags=', '.join(rng.sample(TAGS, 3)),
+                is_featured=rng.random() < 0.05,
+                like_count=rng.randrange(500),
+                share_count=rng.randrange(100),
+                rating_count=len(values),
+                rating_sum=sum(values),
+                published_date=now - timedelta(minutes=index),
+            )
+            # Part of the data set, not new activity for refresh_trending
+            row.trending_likes_seen, row.trending_shares_seen = row.like_count, row.share_count
+            rows.append(row)
+        with transaction.atomic():
+            MediaContent.objects.bulk_create(rows, batch_size=500)
+            batch = list(MediaContent.objects.filter(
+                slug__in=[row.slug for row in rows]
+            ).values_list('pk', 'title', 'description', 'tags', 'slug'))
+            batch.sort(key=lambda row: int(row[4].rsplit('-', 1)[1]))
+            content_ids.extend(row[0] for row in batch)
+            index_tags([(pk, tags) for pk, _, _, tags, _ in batch])
+            search_backend.index_rows([row[:4] for row in batch])
+            ContentRating.objects.bulk_create([
+                ContentRating(content_id=pk, user_ip=_ip(rating // content), rating=value)
+                for offset, (pk, *_rest) in enumerate(batch)
+                for rating, value in zip(range(start + offset, ratings, content), rating_values(start + offset))
+            ], batch_size=1000)
+        report(f"content {min(start + batch_size, content)}/{content}")
+
+    # Views favour the first items, so popular/trending have a head and a tail
+    for start in range(0, views, batch_size):
+        ContentView.objects.bulk_create([
+            ContentView(
+                content_id=content_ids[int(content * rng.random() ** 2)],
+                user_ip=_ip(rng.randrange(1 << 24)),
+                viewed_at=now - timedelta(seconds=rng.randrange(30 * 86400)),
+            )
+            for _ in range(min(batch_size, views - start))
+        ], batch_size=1000)
+        report(f"views {min(start + batch_size, views)}/{views}")
+
+    view_counts = ContentView.objects.filter(content=OuterRef('pk')).order_by().values('content').annotate(
+        total=Count('id')
+    ).values('total')
+    MediaContent.objects.filter(category_id__in=category_ids).update(
+        view_count=Coalesce(Subquery(view_counts), 0)
+    )
+    HealthCategory.refresh_content_counts(category_ids)
+    return {'categories': categories, 'content': content, 'ratings': ratings, 'views': views}
+
+
+def _benchmark_endpoint(client, method, url, requests, warmup, cached):
+    for _ in range(warmup):
+        getattr(client, method)(url)
+
+    latencies = []
+    queries = 0
+    statuses = {}
+    started = time.perf_counter()
+    for _ in range(requests):
+        if not cached:
+            # The stats snapshot lives in the Django cache, not the response cache
+            cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            request_started = time.perf_counter()
+            response = getattr(client, method)(url)
+            latencies.append(time.perf_counter() - request_started)
+        queries += len(context)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    result = {
+        'method': method.upper(),
+        'path': url,
+        'requests': requests,
+        'status_codes': {str(code): count for code, count in sorted(statuses.items())},
+        'mean_ms': round(sum(latencies) / requests * 1000, 3),
+        'queries_per_request': round(queries / requests, 2),
+        'throughput_rps': round(requests / elapsed, 1),
+    }
+    for percent in PERCENTILES:
+        result[f'p{percent}_ms'] = round(percentile(latencies, percent) * 1000, 3)
+    return result
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(requests=200, warmup=20, cached=False, only=None, stdout=None):
+    """
+    Benchmark every ENDPOINT_BUDGETS endpoint (or those whose path contains
+    one of `only`). Runs with WORST_CASE_SETTINGS unless cached is set.
+    """
+    content = MediaContent.objects.filter(is_active=True).order_by('-view_count').first()
+    category = HealthCategory.objects.filter(is_active=True, active_content_count__gt=0).order_by(
+        '-active_content_count'
+    ).first()
+    if content is None or category is None:
+        raise ValueError("Need at least one active category and content item")
+
+    overrides = {} if cached else WORST_CASE_SETTINGS
+    results = []
+    with override_settings(ALLOWED_HOSTS=['*'], HEALTH_CONTENT=overrides):
+        client = APIClient()
+        for method, path, _ in ENDPOINT_BUDGETS:
+            url = path.format(content_id=content.pk, category_slug=category.slug)
+            if only and not any(fragment in url for fragment in only):
+                continue
+            result = _benchmark_endpoint(client, method, url, requests, warmup, cached)
+            results.append(result)
+            if stdout is not None:
+                stdout.write(
+                    f"{result['method']:4} {url:60} p50 {result['p50_ms']:8.2f}ms  "
+                    f"p95 {result['p95_ms']:8.2f}ms  p99 {result['p99_ms']:8.2f}ms  "
+                    f"{result['queries_per_request']:5.1f} q/req  {result['throughput_rps']:8.1f} req/s"
+                )
+
+        return {
+            'meta': {
+                'revision': _git_revision(),
+                'timestamp': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'requests': requests,
+                'warmup': warmup,
+                'cached': cached,
+                'settings': {name: get_setting(name) for name in WORST_CASE_SETTINGS},
+                'rows': {
+                    'categories': HealthCategory.objects.count(),
+                    'content': MediaContent.objects.count(),
+                    'ratings': ContentRating.objects.count(),
+                    'views': ContentView.objects.count(),
+                },
+            },
+            'endpoints': results,
+        }
+
+
+def compare_results(baseline, current):
+    """[(method, path, field, before, after, change)] for endpoints in both runs"""
+    fields = [f'p{percent}_ms' for percent in PERCENTILES] + ['queries_per_request', 'throughput_rps']
+    before = {(row['method'], row['path']): row for row in baseline['endpoints']}
+    changes = []
+    for row in current['endpoints']:
+        old = before.get((row['method'], row['path']))
+        if old is None:
+            continue
+        for field in fields:
+            change = (row[field] - old[field]) / old[field] if old[field] else None
+            changes.append((row['method'], row['path'], field, old[field], row[field], change))
+    return changes
+
+
+WRITE_OPERATIONS = ('view', 'like', 'rating')
+
+
+def _bench_ip(index):
+    """Addresses from 198.18.0.0/15, the range reserved for benchmarks"""
+    return f"198.{18 + ((index >> 16) & 1)}.{(index >> 8) & 255}.{index & 255}"
+
+
+def _write_request(client, operation, content_id, user_ip):
+    if operation == 'view':
+        return client.post(f'/api/content/{content_id}/increment_view/', REMOTE_ADDR=user_ip)
+    if operation == 'like':
+        return client.post(f'/api/content/{content_id}/like/', REMOTE_ADDR=user_ip)
+    return client.post('/api/ratings/', {'content': content_id, 'rating': 4}, REMOTE_ADDR=user_ip)
+
+
+def _database_profile():
+    """Engine and connection settings of the default database, with SQLite PRAGMAs as applied"""
+    settings_dict = connection.settings_dict
+    profile = {
+        'vendor': connection.vendor,
+        'engine': settings_dict['ENGINE'],
+        'conn_max_age': settings_dict['CONN_MAX_AGE'],
+        'transaction_mode': getattr(connection, 'transaction_mode', None),
+    }
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            for pragma in ('journal_mode', 'synchronous', 'mmap_size', 'busy_timeout'):
+                cursor.execute(f'PRAGMA {pragma}')
+                profile[pragma] = cursor.fetchone()[0]
+    return profile
+
+
+def _benchmark_writes(operation, content_ids, threads, writes, offset):
+    latencies = []
+    outcomes = {'succeeded': 0, 'locked': 0, 'failed': 0}
+    lock = threading.Lock()
+
+    def worker(index):
+        client = APIClient()
+        own_latencies = []
+        own = {'succeeded': 0, 'locked': 0, 'failed': 0}
+        try:
+            for number in range(writes):
+                sequence = offset + index * writes + number
+                started = time.perf_counter()
+                try:
+                    response = _write_request(
+                        client, operation, content_ids[sequence % len(content_ids)], _bench_ip(sequence)
+                    )
+                    own['succeeded' if response.status_code < 400 else 'failed'] += 1
+                except OperationalError as exc:
+                    own['locked' if 'locked' in str(exc) else 'failed'] += 1
+                own_latencies.append(time.perf_counter() - started)
+        finally:
+            connections.close_all()
+        with lock:
+            latencies.extend(own_latencies)
+            for outcome, count in own.items():
+                outcomes[outcome] += count
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    started = time.perf_counter()
+    for worker_thread in workers:
+        worker_thread.start()
+    for worker_thread in workers:
+        worker_thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    result = {
+        'operation': operation,
+        'threads': threads,
+        'writes': threads * writes,
+        **outcomes,
+        'throughput_wps': round(outcomes['succeeded'] / elapsed, 1),
+    }
+    for percent in PERCENTILES:
+        result[f'p{percent}_ms'] = round(percentile(latencies, percent) * 1000, 3)
+    return result
+
+
+def run_write_benchmark(threads=8, writes=100, operations=WRITE_OPERATIONS, stdout=None):
+    """
+    Send `writes` view, like and rating POSTs per thread from `threads`
+    threads at once, with WORST_CASE_SETTINGS so every request writes to
+    the database. Reports successful writes per second, "database is
+    locked" errors and latency percentiles per operation, then deletes the
+    benchmark's views and ratings and restores the counters it changed.
+    """
+    content = list(
+        MediaContent.objects.filter(is_active=True).order_by('pk').values_list('pk', 'view_count', 'like_count')[:50]
+    )
+    if not content:
+        raise ValueError("Need at least one active content item")
+    content_ids = [pk for pk, _, _ in content]
+
+    results = []
+    try:
+        with override_settings(ALLOWED_HOSTS=['*'], HEALTH_CONTENT=WORST_CASE_SETTINGS):
+            for position, operation in enumerate(operations):
+                result = _benchmark_writes(operation, content_ids, threads, writes, position * threads * writes)
+                results.append(result)
+                if stdout is not None:
+                    stdout.write(
+                        f"{operation:7} {result['throughput_wps']:8.1f} writes/s  "
+                        f"p50 {result['p50_ms']:8.2f}ms  p95 {result['p95_ms']:8.2f}ms  "
+                        f"p99 {result['p99_ms']:8.2f}ms  {result['locked']} locked  {result['failed']} failed"
+                    )
+    finally:
+        bench_ips = Q(user_ip__startswith='198.18.') | Q(user_ip__startswith='198.19.')
+        ContentView.objects.filter(bench_ips).delete()
+        # Deleted one by one so the rating aggregates are updated by signals
+        for rating in ContentRating.objects.filter(bench_ips):
+            rating.delete()
+        for pk, view_count, like_count in content:
+            MediaContent.objects.filter(pk=pk).update(view_count=view_count, like_count=like_count)
+
+    return {
+        'meta': {
+            'revision': _git_revision(),
+            'timestamp': timezone.now().isoformat(),
+            'django': django.get_version(),
+            'database': _database_profile(),
+            'threads': threads,
+            'writes_per_thread': writes,
+        },
+        'operations': results,
+    }
+
+
+def compare_write_results(baseline, current):
+    """[(operation, field, before, after, change)] for operations in both runs"""
+    fields = ['throughput_wps', 'locked'] + [f'p{percent}_ms' for percent in PERCENTILES]
+    before = {row['operation']: row for row in baseline['operations']}
+    changes = []
+    for row in current['operations']:
+        old = before.get(row['operation'])
+        if old is None:
+            continue
+        for field in fields:
+            change = (row[field] - old[field]) / old[field] if old[field] else None
+            changes.append((row['operation'], field, old[field], row[field], change))
+    return changes
+
+
+def _per_call(function, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - started) / iterations
+
+
+def run_metrics_benchmark(iterations=100000, threads=8, requests=500, path='/api/content/popular/', stdout=None):
+    """
+    Cost of recording metrics: registry operations alone and from several
+    threads at once, MetricsMiddleware around a no-op view, the share of
+    a real request that is, and rendering a scrape
+    """
+    registry = MetricsRegistry(collect_components=False)
+    labels = ('MediaContentViewSet.list', 'GET')
+    results = {
+        'inc_ns': _per_call(lambda: registry.inc('http_requests_total', labels + ('200',)), iterations) * 1e9,
+        'observe_ns': _per_call(
+            lambda: registry.observe('http_request_duration_seconds', labels, 0.012), iterations
+        ) * 1e9,
+    }
+
+    def observe_many():
+        for _ in range(iterations // threads):
+            registry.observe('http_request_duration_seconds', labels, 0.012)
+
+    workers = [threading.Thread(target=observe_many) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    results['threads'] = threads
+    results['threaded_observe_per_second'] = iterations // threads * threads / elapsed
+
+    # Wrapped and bare no-op view; the difference is the per-request overhead
+    request = RequestFactory().get(path)
+
+    def view(request):
+        return HttpResponse()
+
+    with override_settings(HEALTH_CONTENT={'METRICS_ENABLED': True}):
+        middleware = MetricsMiddleware(view, registry=registry)
+
+    def instrumented():
+        middleware.process_view(request, view, (), {})
+        middleware(request)
+
+    bare = _per_call(lambda: view(request), iterations)
+    results['middleware_overhead_us'] = (_per_call(instrumented, iterations) - bare) * 1e6
+
+    with override_settings(ALLOWED_HOSTS=['*']):
+        client = APIClient()
+        for _ in range(requests // 10):
+            client.get(path)
+        endpoint = _per_call(lambda: client.get(path), requests)
+    results['endpoint'] = path
+    results['endpoint_mean_us'] = endpoint * 1e6
+    results['overhead_share'] = results['middleware_overhead_us'] / results['endpoint_mean_us']
+
+    # A scrape with a realistic number of label sets
+    for index in range(60):
+        for status in ('200', '404'):
+            registry.inc('http_requests_total', (f'View{index}.list', 'GET', status))
+        registry.observe('http_request_duration_seconds', (f'View{index}.list', 'GET'), 0.01)
+        registry.observe('http_request_db_queries', (f'View{index}.list',), 3)
+    results['scrape_ms'] = _per_call(lambda: render_metrics(registry.snapshot()), 100) * 1e3
+
+    if stdout is not None:
+        stdout.write(f"inc                      {results['inc_ns']:10.0f} ns")
+        stdout.write(f"observe                  {results['observe_ns']:10.0f} ns")
+        stdout.write(f"observe, {threads} threads       {results['threaded_observe_per_second']:10.0f} /s")
+        stdout.write(f"middleware overhead      {results['middleware_overhead_us']:10.2f} us/request")
+        stdout.write(f"GET {path:20} {results['endpoint_mean_us']:10.0f} us mean "
+                     f"({results['overhead_share']:.2%} instrumentation)")
+        stdout.write(f"scrape                   {results['scrape_ms']:10.2f} ms")
+    return results
@@ -0,0 +1,236 @@
+"""
+Offline content bundles for the mobile app
+
+A bundle is the whole active catalog (categories plus content in the
+BundleContentSerializer list shape) as one compact JSON document, so a
+client can sync everything in a single request. Bundles are versioned by
+the newest updated_at in the catalog (microseconds since the epoch) and
+identified by the SHA-256 of their JSON body.
+
+Full bundles are precomputed by the build_content_bundle command (or on
+the first request after the catalog changed) and stored next to a
+manifest in CONTENT_BUNDLE_DIR, pre-compressed with gzip and, when the
+optional brotli package is installed, brotli. Delta bundles hold the rows
+changed since a given version plus the ids of rows deleted or deactivated
+since then; they are small and built per request.
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .conf import get_setting
+from .models import HealthCategory, MediaContent, Tombstone
+from .querysets import CONTENT_LIST_PLAN
+from .serializers import BundleContentSerializer, HealthCategorySerializer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+BUNDLE_FORMAT = 1
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MANIFEST_NAME = 'manifest.json'
+
+_build_lock = threading.Lock()
+
+
+def available_encodings():
+    """Content encodings bundles are stored in, preferred first"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=11)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=9, mtime=0)
+    return body
+
+
+def version_for(moment):
+    """Bundle version (int microseconds) of an updated_at timestamp"""
+    if moment is None:
+        return 0
+    return (moment - EPOCH) // timedelta(microseconds=1)
+
+
+def version_datetime(version):
+    return EPOCH + timedelta(microseconds=version)
+
+
+def catalog_state():
+    """
+    Cheap fingerprint of the catalog: the current version plus row counts,
+    which also change when rows are deleted without touching updated_at
+    """
+    categories = HealthCategory.objects.order_by().aggregate(last=Max('updated_at'), total=Count('pk'))
+    content = MediaContent.objects.order_by().aggregate(last=Max('updated_at'), total=Count('pk'))
+    latest = max(filter(None, [categories['last'], content['last']]), default=None)
+    return {
+        'version': version_for(latest),
+        'categories': categories['total'],
+        'content': content['total'],
+    }
+
+
+def bundle_categories():
+    return HealthCategory.objects.filter(is_active=True).order_by('order', 'name')
+
+
+def bundle_content():
+    return CONTENT_LIST_PLAN.apply(
+        MediaContent.objects.filter(is_active=True, category__is_active=True)
+    ).order_by('id')
+
+
+def encode(payload):
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def build_bundle_payload(state=None):
+    state = state or catalog_state()
+    return {
+        'format': BUNDLE_FORMAT,
+        'version': state['version'],
+        'generated_at': timezone.now().isoformat(),
+        'categories': HealthCategorySerializer(bundle_categories(), many=True).data,
+        'content': BundleContentSerializer(bundle_content(), many=True).data,
+    }
+
+
+def build_delta_payload(since):
+    """
+    Rows changed after version `since`, plus the ids of rows deleted or
+    deactivated since then (from the sync tombstones). Clients drop the
+    content of removed_categories themselves. There is no generated_at, so
+    the same delta always has the same body and hash.
+    """
+    state = catalog_state()
+    changed_after = version_datetime(since)
+    removed = Tombstone.objects.filter(removed_at__gt=changed_after).order_by('object_id')
+    return {
+        'format': BUNDLE_FORMAT,
+        'version': state['version'],
+        'since': since,
+        'categories': HealthCategorySerializer(
+            bundle_categories().filter(updated_at__gt=changed_after), many=True
+        ).data,
+        'content': BundleContentSerializer(
+            bundle_content().filter(updated_at__gt=changed_after), many=True
+        ).data,
+        'removed_categories': list(
+            removed.filter(object_type='category').values_list('object_id', flat=True)
+        ),
+        'removed_content': list(
+            removed.filter(object_type='content').values_list('object_id', flat=True)
+        ),
+    }
+
+
+def bundle_dir():
+    return get_setting('CONTENT_BUNDLE_DIR') or os.path.join(settings.BASE_DIR, 'bundles')
+
+
+def _write_atomic(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def load_manifest():
+    try:
+        with open(os.path.join(bundle_dir(), MANIFEST_NAME), 'rb') as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def write_bundle(state=None):
+    """
+    Build the full bundle, store every compressed variant and the manifest,
+    and drop files of older bundles. Returns the new manifest.
+    """
+    state = state or catalog_state()
+    body = encode(build_bundle_payload(state))
+    content_hash = hashlib.sha256(body).hexdigest()
+    directory = bundle_dir()
+    os.makedirs(directory, exist_ok=True)
+
+    files = {}
+    for encoding in ['identity'] + available_encodings():
+        name = f'bundle-{content_hash[:16]}.json' + {'identity': '', 'gzip': '.gz', 'br': '.br'}[encoding]
+        data = compress(body, encoding)
+        _write_atomic(os.path.join(directory, name), data)
+        files[encoding] = {'name': name, 'size': len(data)}
+
+    manifest = {
+        'format': BUNDLE_FORMAT,
+        'version': state['version'],
+        'hash': content_hash,
+        'state': state,
+        'generated_at': timezone.now().isoformat(),
+        'files': files,
+    }
+    _write_atomic(os.path.join(directory, MANIFEST_NAME), encode(manifest))
+
+    current = {entry['name'] for entry in files.values()}
+    for name in os.listdir(directory):
+        if name.startswith('bundle-') and name not in current:
+            try:
+                os.unlink(os.path.join(directory, name))
+            except OSError:
+                pass
+    return manifest
+
+
+def current_manifest():
+    """The manifest of an up-to-date bundle, rebuilding it if the catalog changed"""
+    state = catalog_state()
+    manifest = load_manifest()
+    if manifest is not None and manifest.get('state') == state:
+        return manifest
+    with _build_lock:
+        manifest = load_manifest()
+        if manifest is not None and manifest.get('state') == state:
+            return manifest
+        return write_bundle(state)
+
+
+def read_bundle_file(manifest, encoding):
+    with open(os.path.join(bundle_dir(), manifest['files'][encoding]['name']), 'rb') as handle:
+        return handle.read()
+
+
+def negotiate_encoding(accept_encoding, encodings=None):
+    """Pick the first stored encoding the client accepts, else identity"""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+    for encoding in encodings or available_encodings():
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return 'identity'
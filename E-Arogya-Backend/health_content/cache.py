@@ -0,0 +1,285 @@
+"""
+Tagged response cache for read-only content endpoints
+
+Serialized response data is stored under a key built from the endpoint, URL
+kwargs and the normalized query string. Every entry carries tags such as
+'content:12', 'category:3', 'content:list' or 'category:list', and signal
+handlers invalidate exactly the tags affected by a save or delete.
+
+Responses read from the read replica are cached under their own keys and
+expire after REPLICA_STICKY_SECONDS: the replica may still lack a write
+that has already invalidated the cache, and that stale copy must neither
+reach clients pinned to the primary nor outlive the replica's lag.
+
+Backends:
+
+* LocalLRUCacheBackend (default) keeps entries in process memory. Each
+  worker process has its own copy, so invalidations only reach the worker
+  that handled the write; entries elsewhere expire after the TTL.
+* RedisCacheBackend stores entries and tag sets in any Redis-compatible
+  server and is shared by all workers. It needs the optional redis package.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.utils.module_loading import import_string
+from rest_framework.response import Response
+
+from .conf import get_setting
+from .metrics import metrics
+from .replica import REPLICA_DATABASE, reads_from_replica
+
+
+CONTENT_LIST_TAG = 'content:list'
+CATEGORY_LIST_TAG = 'category:list'
+
+
+def content_tag(content_id):
+    return f'content:{content_id}'
+
+
+def category_tag(category_id):
+    return f'category:{category_id}'
+
+
+class LocalLRUCacheBackend:
+    """
+    In-process LRU cache with per-entry TTL and a tag index
+    """
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value, tags = entry
+            if expires_at < time.monotonic():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl, tags=()):
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (time.monotonic() + ttl, value, tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate_tags(self, tags):
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    removed += self._discard(key)
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return 0
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return 1
+
+
+class RedisCacheBackend:
+    """
+    Shared cache for any server speaking the Redis protocol
+    """
+
+    def __init__(self, url='redis://localhost:6379/0', prefix='earogya:response', client=None):
+        if client is None:
+            try:
+                import redis
+            except ImportError as exc:
+                raise ImportError(
+                    "RedisCacheBackend requires the 'redis' package: pip install redis"
+                ) from exc
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, key):
+        return f'{self.prefix}:key:{key}'
+
+    def _tag(self, tag):
+        return f'{self.prefix}:tag:{tag}'
+
+    def get(self, key):
+        raw = self.client.get(self._key(key))
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    def set(self, key, value, ttl, tags=()):
+        pipe = self.client.pipeline()
+        pipe.set(self._key(key), json.dumps(value), ex=int(ttl))
+        for tag in tags:
+            pipe.sadd(self._tag(tag), key)
+            pipe.expire(self._tag(tag), int(ttl))
+        pipe.execute()
+
+    def invalidate_tags(self, tags):
+        removed = 0
+        for tag in tags:
+            keys = self.client.smembers(self._tag(tag))
+            names = [self._key(key.decode() if isinstance(key, bytes) else key) for key in keys]
+            if names:
+                removed += self.client.delete(*names)
+            self.client.delete(self._tag(tag))
+        return removed
+
+    def clear(self):
+        names = list(self.client.scan_iter(f'{self.prefix}:*'))
+        if names:
+            self.client.delete(*names)
+
+    def __len__(self):
+        return sum(1 for _ in self.client.scan_iter(f'{self.prefix}:key:*'))
+
+
+class ResponseCache:
+    """
+    Front end over a cache backend that tracks hit/miss metrics
+    """
+
+    def __init__(self):
+        self._backend = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            backend_class = import_string(get_setting('RESPONSE_CACHE_BACKEND'))
+            self._backend = backend_class(**get_setting('RESPONSE_CACHE_OPTIONS'))
+        return self._backend
+
+    @property
+    def enabled(self):
+        return get_setting('RESPONSE_CACHE_ENABLED')
+
+    @staticmethod
+    def make_key(endpoint, request, kwargs, using=None):
+        """
+        Key on endpoint, host, URL kwargs and sorted query parameters, and
+        on the database alias when it is not the primary
+        """
+        params = sorted(
+            (name, sorted(values)) for name, values in request.query_params.lists()
+        )
+        raw = json.dumps([request.get_host(), sorted(kwargs.items()), params])
+        key = f'{endpoint}:{hashlib.sha1(raw.encode()).hexdigest()}'
+        return key if using is None else f'{key}:{using}'
+
+    def get(self, key):
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value, tags, ttl=None):
+        self.backend.set(key, value, ttl or get_setting('RESPONSE_CACHE_TTL'), tags)
+
+    def invalidate(self, *tags):
+        if not self.enabled:
+            return 0
+        removed = self.backend.invalidate_tags(tags)
+        with self._lock:
+            self.invalidations += removed
+        return removed
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': type(self.backend).__name__,
+                'entries': len(self.backend),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'invalidations': self.invalidations,
+            }
+
+
+response_cache = ResponseCache()
+
+
+def _result_rows(data):
+    if isinstance(data, dict):
+        data = data.get('results', [])
+    return data if isinstance(data, list) else []
+
+
+def cache_response(endpoint, tags=(), item_tag=content_tag):
+    """
+    Cache the data of a successful GET response.
+
+    tags are static tags for the entry and, unless item_tag is None, each
+    row of the response is tagged with item_tag(row['id']). A view can add
+    tags for the object it is scoped to (e.g. its category) by setting
+    response.cache_tags.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if not response_cache.enabled:
+                return view_method(self, request, *args, **kwargs)
+
+            replica = reads_from_replica()
+            key = response_cache.make_key(endpoint, request, kwargs, REPLICA_DATABASE if replica else None)
+            data = response_cache.get(key)
+            metrics.inc('response_cache_lookups_total', (endpoint, 'miss' if data is None else 'hit'))
+            if data is not None:
+                response = Response(data)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                entry_tags = set(tags)
+                if item_tag is not None:
+                    entry_tags.update(item_tag(row['id']) for row in _result_rows(response.data) if 'id' in row)
+                entry_tags.update(getattr(response, 'cache_tags', ()))
+                # Round-trip through JSON so cached data matches what a hit returns
+                ttl = None
+                if replica:
+                    ttl = min(get_setting('RESPONSE_CACHE_TTL'), get_setting('REPLICA_STICKY_SECONDS'))
+                response_cache.set(key, json.loads(json.dumps(response.data, default=str)), entry_tags, ttl)
+                response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
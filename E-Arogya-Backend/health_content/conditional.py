@@ -0,0 +1,109 @@
+"""
+Conditional GET support (ETag / Last-Modified) for the content API
+
+Validators are derived from max(updated_at) and the row count of the
+querysets backing a response, so answering If-None-Match or
+If-Modified-Since with 304 costs one aggregate query and no
+serialization.
+
+Engagement counters (views, likes, shares) change without touching
+updated_at. For responses carrying media content, the ETag therefore also
+covers the stored counter sums and the counter deltas still buffered in
+this process, and no Last-Modified is sent: a date cannot express a like.
+"""
+import hashlib
+from functools import wraps
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .counters import COUNTER_FIELDS, engagement_counters
+from .models import MediaContent
+
+
+def filtered_queryset(view, request, kwargs):
+    """The list queryset after filter backends are applied"""
+    return [view.filter_queryset(view.get_queryset())]
+
+
+def object_queryset(view, request, kwargs):
+    """A queryset holding only the object addressed by the URL"""
+    lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+    return [view.get_queryset().filter(**{view.lookup_field: kwargs[lookup_url_kwarg]})]
+
+
+def category_content_queryset(view, request, kwargs):
+    """A category and its active content, for responses embedding both"""
+    slug = kwargs.get('slug') or kwargs.get('category_slug')
+    return [
+        view.get_queryset().model.objects.filter(slug=slug),
+        MediaContent.objects.filter(category__slug=slug, is_active=True),
+    ]
+
+
+def facet_queryset(view, request, kwargs):
+    """
+    The list queryset without the facet filters: facets count values the
+    current filters exclude, so their state depends on all of these rows
+    """
+    return [view.filter_queryset_without(*view.filterset_fields, 'tag')]
+
+
+def compute_validators(request, querysets):
+    """
+    Return (weak ETag, last-modified datetime or None) for the given
+    querysets
+    """
+    parts = [request.get_full_path()]
+    last_modified = None
+    counters = False
+    for queryset in querysets:
+        aggregates = {'last': Max('updated_at'), 'total': Count('pk')}
+        if queryset.model is MediaContent:
+            counters = True
+            aggregates.update((field, Sum(field)) for field in COUNTER_FIELDS)
+        state = queryset.order_by().aggregate(**aggregates)
+        parts.append(f"{queryset.model._meta.label}:" + ':'.join(str(value) for value in state.values()))
+        if state['last'] is not None and (last_modified is None or state['last'] > last_modified):
+            last_modified = state['last']
+    if counters:
+        parts.append(engagement_counters.pending_digest())
+        last_modified = None
+    digest = hashlib.sha1('|'.join(parts).encode()).hexdigest()
+    return 'W/' + quote_etag(digest), last_modified
+
+
+def conditional_get(querysets=filtered_queryset):
+    """
+    Answer conditional GETs with 304 before the view runs, and add ETag and
+    Last-Modified headers to full responses. querysets(view, request,
+    kwargs) returns the querysets whose state determines the response.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_method(self, request, *args, **kwargs)
+
+            try:
+                etag, last_modified = compute_validators(request, querysets(self, request, kwargs))
+            except (TypeError, ValueError, ValidationError):
+                # A malformed lookup value; the view answers it (404) the
+                # way get_object_or_404 does
+                return view_method(self, request, *args, **kwargs)
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+            not_modified = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if not_modified is not None:
+                not_modified['ETag'] = etag
+                return not_modified
+
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                response['ETag'] = etag
+                if timestamp is not None:
+                    response['Last-Modified'] = http_date(timestamp)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,96 @@
+"""
+App settings for health_content
+
+Every option can be overridden from the project settings through the
+HEALTH_CONTENT dictionary, e.g. HEALTH_CONTENT = {'SEARCH_BACKEND': 'index'}
+"""
+from django.conf import settings
+
+
+DEFAULTS = {
+    # Full-text search: 'auto' uses SQLite FTS5 when available, otherwise
+    # the portable inverted index ('index')
+    'SEARCH_BACKEND': 'auto',
+    # Relative weights of the title, description and tags columns
+    'SEARCH_WEIGHTS': (10.0, 5.0, 2.0),
+    # Engagement counters: buffer view/like/share increments in process and
+    # flush them every COUNTER_FLUSH_INTERVAL seconds or once
+    # COUNTER_FLUSH_THRESHOLD increments are pending. Disable to write through.
+    'COUNTER_BUFFERING': True,
+    'COUNTER_FLUSH_INTERVAL': 5.0,
+    'COUNTER_FLUSH_THRESHOLD': 100,
+    # ContentView ingestion: 'async' batches rows on a background thread,
+    # 'sync' writes each view inside the request (useful for tests)
+    'VIEW_INGEST_MODE': 'async',
+    'VIEW_INGEST_QUEUE_SIZE': 10000,
+    'VIEW_INGEST_BATCH_SIZE': 500,
+    'VIEW_INGEST_FLUSH_INTERVAL': 1.0,
+    # Seconds a request may wait for queue space before the view is dropped
+    'VIEW_INGEST_PUT_TIMEOUT': 0.05,
+    # ContentView rollups: raw rows per transaction, how long to wait for
+    # late batched inserts, and how many days of raw rows to keep once they
+    # are rolled up (None keeps them forever)
+    'ROLLUP_CHUNK_SIZE': 5000,
+    'ROLLUP_SETTLE_SECONDS': 60,
+    'ROLLUP_RETENTION_DAYS': 90,
+    # Seconds the /api/content/stats/ snapshot is cached between rebuilds
+    'STATS_CACHE_TTL': 60,
+    # Response cache for read-heavy endpoints (featured, popular, recent,
+    # category list and category content). RESPONSE_CACHE_OPTIONS is passed
+    # to the backend class, e.g. {'url': 'redis://...'} for RedisCacheBackend.
+    'RESPONSE_CACHE_ENABLED': True,
+    'RESPONSE_CACHE_BACKEND': 'health_content.cache.LocalLRUCacheBackend',
+    'RESPONSE_CACHE_OPTIONS': {'max_entries': 1000},
+    'RESPONSE_CACHE_TTL': 300,
+    # Content items embedded per category in category detail/featured responses
+    'CATEGORY_CONTENT_PREVIEW_LIMIT': 10,
+    # Directory holding precomputed offline bundles (None: <BASE_DIR>/bundles)
+    'CONTENT_BUNDLE_DIR': None,
+    # /api/sync/ change feed: rows per batch (clients may ask for up to the
+    # max) and how long fresh changes are held back so slow transactions
+    # that commit out of order are not skipped
+    'SYNC_BATCH_SIZE': 200,
+    'SYNC_MAX_BATCH_SIZE': 1000,
+    'SYNC_SETTLE_SECONDS': 2,
+    # Most used tags included in /api/content/facets/ (0 leaves tags out)
+    'FACET_TAG_LIMIT': 10,
+    # Trending scores: activity loses half its weight every
+    # TRENDING_HALF_LIFE_HOURS; likes and shares count more than a view
+    'TRENDING_HALF_LIFE_HOURS': 24,
+    'TRENDING_WEIGHTS': {'view': 1.0, 'like': 3.0, 'share': 5.0},
+    # Precomputed neighbours stored per item for /api/content/{id}/related/
+    'RELATED_CONTENT_LIMIT': 10,
+    # Per-request profiling (ProfilingMiddleware): Server-Timing headers and
+    # the last PROFILING_WINDOW requests per endpoint at /api/profiling/stats/.
+    # Requests under PROFILING_CPROFILE_PATHS (e.g. ['/api/content/search/'])
+    # are run under cProfile at the sample rate and dumped to
+    # PROFILING_CPROFILE_DIR (None: <BASE_DIR>/profiles)
+    'PROFILING_ENABLED': False,
+    'PROFILING_WINDOW': 500,
+    'PROFILING_CPROFILE_PATHS': [],
+    'PROFILING_CPROFILE_SAMPLE_RATE': 0.01,
+    'PROFILING_CPROFILE_DIR': None,
+    # Prometheus metrics at /metrics (MetricsMiddleware). Each gunicorn
+    # worker only counts its own requests; with METRICS_MULTIPROCESS_DIR set
+    # to a directory shared by the workers they write their values there
+    # every METRICS_SYNC_INTERVAL seconds and /metrics reports the sum
+    'METRICS_ENABLED': True,
+    'METRICS_MULTIPROCESS_DIR': None,
+    'METRICS_SYNC_INTERVAL': 5.0,
+    # Read replica (a 'replica' alias in DATABASES): read-only viewset
+    # actions and admin changelists read from it when REPLICA_READS is on.
+    # After a write the client gets a REPLICA_STICKY_COOKIE that keeps it on
+    # the primary for REPLICA_STICKY_SECONDS so it reads its own writes.
+    # Responses cached from the replica expire after the same time.
+    'REPLICA_READS': True,
+    'REPLICA_STICKY_COOKIE': 'earogya_primary',
+    'REPLICA_STICKY_SECONDS': 10,
+}
+
+
+def get_setting(name):
+    """Return an app setting, falling back to the default value"""
+    overrides = getattr(settings, 'HEALTH_CONTENT', {})
+    if name in overrides:
+        return overrides[name]
+    return DEFAULTS[name]
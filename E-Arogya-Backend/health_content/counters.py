@@ -0,0 +1,211 @@
+"""
+Write-coalescing engagement counters for MediaContent
+
+Taps on view/like/share only add to an in-process buffer. The buffer is
+flushed to the database with F() expressions when it reaches a size
+threshold, on a timer, and when the process exits, so concurrent
+increments are never lost and many taps cost a single UPDATE.
+
+The buffer is per process: each gunicorn worker flushes its own deltas.
+"""
+import atexit
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+from .conf import get_setting
+
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = ('view_count', 'like_count', 'share_count')
+
+
+class CounterBuffer:
+    """
+    Buffer of pending counter deltas keyed by content id
+    """
+
+    def __init__(self, flush_interval=None, flush_threshold=None, enabled=None):
+        self._flush_interval = flush_interval
+        self._flush_threshold = flush_threshold
+        self._enabled = enabled
+        self._pending = defaultdict(Counter)
+        self._pending_total = 0
+        self._oldest_pending_at = None
+        # Guards _pending; held only for dictionary operations
+        self._lock = threading.Lock()
+        # Serializes flushes against consistent reads
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._atexit_registered = False
+        self.flush_count = 0
+        self.last_flush_at = None
+
+    @property
+    def enabled(self):
+        if self._enabled is None:
+            return get_setting('COUNTER_BUFFERING')
+        return self._enabled
+
+    @property
+    def flush_interval(self):
+        return self._flush_interval or get_setting('COUNTER_FLUSH_INTERVAL')
+
+    @property
+    def flush_threshold(self):
+        return self._flush_threshold or get_setting('COUNTER_FLUSH_THRESHOLD')
+
+    def increment(self, content_id, field, amount=1):
+        """Record an increment, writing through when buffering is disabled"""
+        if field not in COUNTER_FIELDS:
+            raise ValueError(f"Unknown counter field: {field}")
+        if not self.enabled:
+            self._apply({content_id: Counter({field: amount})})
+            return
+        with self._lock:
+            if not self._pending_total:
+                self._oldest_pending_at = time.monotonic()
+            self._pending[content_id][field] += amount
+            self._pending_total += amount
+            over_threshold = self._pending_total >= self.flush_threshold
+        self._ensure_worker()
+        if over_threshold:
+            self._wakeup.set()
+
+    def pending(self, content_id):
+        """Return the unflushed deltas for one content item"""
+        with self._lock:
+            return dict(self._pending.get(content_id, {}))
+
+    def value(self, content_id, field):
+        """Return the stored value plus any pending delta"""
+        from .models import MediaContent
+
+        with self._flush_lock:
+            stored = MediaContent.objects.filter(pk=content_id).order_by().values_list(field, flat=True).first()
+            return (stored or 0) + self.pending(content_id).get(field, 0)
+
+    def overlay(self, items):
+        """
+        Add pending deltas in place to loaded instances or to dicts keyed by
+        'id' (values() rows, serialized data); returns items
+        """
+        with self._lock:
+            for item in items:
+                row = isinstance(item, dict)
+                deltas = self._pending.get(item['id'] if row else item.pk)
+                if not deltas:
+                    continue
+                for field, delta in deltas.items():
+                    if not row:
+                        setattr(item, field, getattr(item, field) + delta)
+                    elif field in item:
+                        item[field] += delta
+        return items
+
+    def pending_digest(self):
+        """Fingerprint of the unflushed deltas; empty when nothing is pending"""
+        with self._lock:
+            if not self._pending_total:
+                return ''
+            state = sorted((content_id, sorted(deltas.items())) for content_id, deltas in self._pending.items())
+        return hashlib.sha1(repr(state).encode()).hexdigest()
+
+    @property
+    def lag(self):
+        """Seconds since the last successful flush, None before the first"""
+        if self.last_flush_at is None:
+            return None
+        return time.monotonic() - self.last_flush_at
+
+    def stats(self):
+        """Figures for monitoring the buffer"""
+        with self._lock:
+            pending, oldest = self._pending_total, self._oldest_pending_at
+        return {
+            'pending': pending,
+            'oldest_pending_seconds': 0.0 if oldest is None else time.monotonic() - oldest,
+            'flushes': self.flush_count,
+            'seconds_since_flush': self.lag,
+        }
+
+    def flush(self):
+        """Write all pending deltas to the database; returns rows touched"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, defaultdict(Counter)
+                oldest, self._oldest_pending_at = self._oldest_pending_at, None
+                self._pending_total = 0
+            if not batch:
+                return 0
+            try:
+                self._apply(batch)
+            except Exception:
+                logger.exception("Counter flush failed; deltas re-queued")
+                with self._lock:
+                    for content_id, deltas in batch.items():
+                        self._pending[content_id].update(deltas)
+                        self._pending_total += sum(deltas.values())
+                    if oldest is not None:
+                        self._oldest_pending_at = min(filter(None, (oldest, self._oldest_pending_at)))
+                raise
+            self.flush_count += 1
+            self.last_flush_at = time.monotonic()
+            return len(batch)
+
+    def _apply(self, batch):
+        from .models import MediaContent
+
+        # Rows with identical deltas share one UPDATE ... WHERE id IN (...)
+        groups = defaultdict(list)
+        for content_id, deltas in batch.items():
+            key = tuple(sorted((field, delta) for field, delta in deltas.items() if delta))
+            if key:
+                groups[key].append(content_id)
+        with transaction.atomic(savepoint=False):
+            for key, content_ids in groups.items():
+                MediaContent.objects.filter(pk__in=content_ids).update(
+                    **{field: F(field) + delta for field, delta in key}
+                )
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name='engagement-counter-flush', daemon=True
+            )
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.shutdown)
+                self._atexit_registered = True
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                # Already logged; retry on the next tick
+                pass
+
+    def shutdown(self):
+        """Flush whatever is left; registered with atexit"""
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Counter flush on shutdown failed")
+
+
+engagement_counters = CounterBuffer()
@@ -0,0 +1,101 @@
+"""
+Facet counts for the content filters
+
+Each facet is counted under every active filter except its own, so
+choosing ?content_type=video still shows how many articles there are.
+Facets without an active filter share one GROUP BY over their columns of
+the filtered queryset, rolled up per facet in Python (there are at most a
+few hundred combinations); each filtered facet takes one grouped query of
+its own. Tag counts, when requested, take a grouped query on the tag index.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Count
+
+from .filters import CONTENT_FILTER_FIELDS
+from .models import MediaContent
+from .tags import tag_facets
+
+
+# Facets are the content filters; values are labelled with these columns
+FACET_LABELS = {
+    'category__slug': 'category__name',
+}
+
+
+def _facet_labels(field_name):
+    """{value: label} for choice fields, None for free values"""
+    try:
+        field = MediaContent._meta.get_field(field_name)
+    except FieldDoesNotExist:
+        return None
+    if field.choices:
+        return {value: str(label) for value, label in field.choices}
+    if field.get_internal_type() == 'BooleanField':
+        return {True: 'Yes', False: 'No'}
+    return None
+
+
+def _columns(fields):
+    return list(fields) + [FACET_LABELS[field] for field in fields if field in FACET_LABELS]
+
+
+def _count_values(queryset, fields, counts, labels):
+    """Add the per-value counts of fields in queryset; returns the row total"""
+    total = 0
+    for row in queryset.order_by().values(*_columns(fields)).annotate(count=Count('pk')):
+        total += row['count']
+        for field in fields:
+            value = row[field]
+            counts[field][value] = counts[field].get(value, 0) + row['count']
+            if field in FACET_LABELS:
+                labels[field][value] = row[FACET_LABELS[field]]
+    return total
+
+
+def compute_facets(queryset, fields=CONTENT_FILTER_FIELDS, tag_limit=None, facet_querysets=None):
+    """
+    Counts per value of every facet field for the content in queryset,
+    e.g. {'total': 12, 'facets': {'content_type': [{'value': 'video',
+    'label': 'Video', 'count': 7}, ...], ...}}. Choice fields list every
+    choice (with zero counts); other fields only the values present.
+    facet_querysets maps a facet ('tag' or a field) with an active filter
+    to the queryset filtered by everything but that filter; its counts
+    come from there instead of queryset.
+    """
+    facet_querysets = facet_querysets or {}
+    counts = {field: {} for field in fields}
+    labels = {field: {} for field in fields}
+    shared = [field for field in fields if field not in facet_querysets]
+    if shared:
+        total = _count_values(queryset, shared, counts, labels)
+    else:
+        total = queryset.order_by().count()
+    for field in fields:
+        if field in facet_querysets:
+            _count_values(facet_querysets[field], [field], counts, labels)
+
+    facets = {}
+    for field in fields:
+        choices = _facet_labels(field)
+        if choices is not None:
+            values = [
+                {'value': value, 'label': label, 'count': counts[field].get(value, 0)}
+                for value, label in choices.items()
+            ]
+        else:
+            values = sorted(
+                (
+                    {'value': value, 'label': labels[field].get(value, value), 'count': count}
+                    for value, count in counts[field].items()
+                ),
+                key=lambda item: (-item['count'], str(item['label'])),
+            )
+        facets[field] = values
+
+    result = {'total': total, 'facets': facets}
+    if tag_limit:
+        result['facets']['tag'] = [
+            {'value': tag['name'], 'label': tag['name'], 'count': tag['count']}
+            for tag in tag_facets(facet_querysets.get('tag', queryset), tag_limit)
+        ]
+    return result
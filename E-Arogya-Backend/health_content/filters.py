@@ -0,0 +1,27 @@
+"""
+Filter sets for the content API
+"""
+from django_filters import rest_framework as django_filters
+
+from .models import MediaContent
+from .tags import filter_by_tags
+
+
+# Exact-match filters exposed on /api/content/
+CONTENT_FILTER_FIELDS = ['category__slug', 'content_type', 'difficulty_level', 'target_age_group', 'is_featured']
+
+
+class MediaContentFilter(django_filters.FilterSet):
+    """
+    The exact-match content filters plus ?tag=, answered from the tag index.
+    Several comma-separated tags match content carrying all of them.
+    """
+    tag = django_filters.CharFilter(method='filter_tag')
+    
+    class Meta:
+        model = MediaContent
+        fields = CONTENT_FILTER_FIELDS
+    
+    def filter_tag(self, queryset, name, value):
+        names = [tag.strip() for tag in value.split(',') if tag.strip()]
+        return filter_by_tags(queryset, names)
@@ -0,0 +1,200 @@
+"""
+Batched ContentView ingestion
+
+increment_view only puts a view event on a bounded in-memory queue. A
+background worker drains the queue and writes events with bulk_create, so
+the analytics insert is off the request path and SQLite sees one write per
+batch instead of one per view.
+
+When the queue is full the caller waits up to VIEW_INGEST_PUT_TIMEOUT
+seconds (backpressure) and the event is dropped and counted if there is
+still no room. VIEW_INGEST_MODE = 'sync' writes each event immediately,
+which keeps tests deterministic.
+"""
+import atexit
+import logging
+import queue
+import threading
+
+from django.db import IntegrityError, close_old_connections
+from django.utils import timezone
+
+from .conf import get_setting
+
+
+logger = logging.getLogger(__name__)
+
+
+class ViewIngestQueue:
+    """
+    Bounded queue of pending ContentView rows with a single writer thread
+    """
+
+    def __init__(self, mode=None, maxsize=None, batch_size=None,
+                 flush_interval=None, put_timeout=None):
+        self._mode = mode
+        self._maxsize = maxsize
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._put_timeout = put_timeout
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+        # Held while a batch is being written so drain() can wait for it
+        self._write_lock = threading.Lock()
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    def _option(self, value, name):
+        return get_setting(name) if value is None else value
+
+    @property
+    def mode(self):
+        return self._option(self._mode, 'VIEW_INGEST_MODE')
+
+    @property
+    def batch_size(self):
+        return self._option(self._batch_size, 'VIEW_INGEST_BATCH_SIZE')
+
+    @property
+    def flush_interval(self):
+        return self._option(self._flush_interval, 'VIEW_INGEST_FLUSH_INTERVAL')
+
+    @property
+    def put_timeout(self):
+        return self._option(self._put_timeout, 'VIEW_INGEST_PUT_TIMEOUT')
+
+    def record(self, content_id, user_ip, user_agent=''):
+        """Queue one view event; returns False if it had to be dropped"""
+        from .models import ContentView
+
+        view = ContentView(
+            content_id=content_id,
+            user_ip=user_ip,
+            user_agent=user_agent,
+            viewed_at=timezone.now(),
+        )
+        if self.mode == 'sync':
+            self._write([view])
+            return True
+
+        self._ensure_worker()
+        try:
+            if self.put_timeout:
+                self._queue.put(view, timeout=self.put_timeout)
+            else:
+                self._queue.put_nowait(view)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def stats(self):
+        """Counters for monitoring the pipeline"""
+        with self._lock:
+            return {
+                'mode': self.mode,
+                'queued': self._queue.qsize() if self._queue is not None else 0,
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'batches': self.batches,
+            }
+
+    def drain(self):
+        """Synchronously write everything currently queued"""
+        with self._write_lock:
+            while self._queue is not None and not self._queue.empty():
+                self._write(self._take(block=False))
+
+    def _take(self, block=True):
+        batch = []
+        try:
+            if block:
+                batch.append(self._queue.get(timeout=self.flush_interval))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write(self, batch):
+        from .models import ContentView
+
+        if not batch:
+            return
+        try:
+            ContentView.objects.bulk_create(batch, batch_size=self.batch_size)
+            written = len(batch)
+        except IntegrityError:
+            written = self._write_valid(batch)
+        except Exception:
+            logger.exception("Dropping %d content views after a failed write", len(batch))
+            with self._lock:
+                self.failed += len(batch)
+            return
+        with self._lock:
+            self.written += written
+            self.failed += len(batch) - written
+            self.batches += 1
+
+    def _write_valid(self, batch):
+        """
+        Retry a batch that broke a constraint, usually a view of content
+        deleted since it was recorded; only the failing rows are dropped.
+        Returns the number of rows written.
+        """
+        from .models import ContentView, MediaContent
+
+        content_ids = {view.content_id for view in batch}
+        existing = set(MediaContent.objects.filter(pk__in=content_ids).values_list('pk', flat=True))
+        rows = [view for view in batch if view.content_id in existing]
+        for view in rows:
+            # The failed insert may have assigned primary keys before rolling back
+            view.pk = None
+        try:
+            ContentView.objects.bulk_create(rows, batch_size=self.batch_size)
+            written = len(rows)
+        except IntegrityError:
+            written = 0
+            for view in rows:
+                view.pk = None
+                try:
+                    ContentView.objects.bulk_create([view])
+                    written += 1
+                except IntegrityError:
+                    pass
+        if written < len(batch):
+            logger.warning("Dropped %d of %d content views that failed a constraint", len(batch) - written, len(batch))
+        return written
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if self._queue is None:
+                self._queue = queue.Queue(maxsize=self._option(self._maxsize, 'VIEW_INGEST_QUEUE_SIZE'))
+                atexit.register(self.drain)
+            self._thread = threading.Thread(target=self._run, name='content-view-ingest', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            if not batch:
+                continue
+            close_old_connections()
+            with self._write_lock:
+                self._write(batch)
+
+
+view_ingest = ViewIngestQueue()
@@ -0,0 +1,54 @@
+"""
+Measure latency, queries and throughput of every health_content endpoint
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from health_content.benchmark import compare_results, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = "Benchmark the API in process and write p50/p95/p99 latency, queries and throughput as JSON"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Measured requests per endpoint")
+        parser.add_argument('--warmup', type=int, default=20, help="Unmeasured requests per endpoint first")
+        parser.add_argument('--cached', action='store_true', help="Keep the configured caches and buffering")
+        parser.add_argument('--only', action='append', help="Only paths containing this (repeatable)")
+        parser.add_argument('--output', help="Write the results to this JSON file")
+        parser.add_argument('--compare', help="Earlier results JSON to compare against")
+        parser.add_argument(
+            '--fail-over', type=float,
+            help="Exit non-zero if any p95 got slower than this fraction (e.g. 0.2) vs --compare"
+        )
+    
+    def handle(self, *args, **options):
+        try:
+            results = run_benchmarks(
+                requests=options['requests'],
+                warmup=options['warmup'],
+                cached=options['cached'],
+                only=options['only'],
+                stdout=self.stdout,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(results, handle, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
+        
+        if options['compare']:
+            with open(options['compare']) as handle:
+                baseline = json.load(handle)
+            regressions = []
+            for method, path, field, before, after, change in compare_results(baseline, results):
+                if change is None:
+                    continue
+                self.stdout.write(f"{method:4} {path:60} {field:20} {before:>10} -> {after:>10} ({change:+.1%})")
+                if options['fail_over'] is not None and field == 'p95_ms' and change > options['fail_over']:
+                    regressions.append(f"{method} {path}: p95 {before}ms -> {after}ms")
+            if regressions:
+                raise CommandError("Latency regressions:\n" + "\n".join(regressions))
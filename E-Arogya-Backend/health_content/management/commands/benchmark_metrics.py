@@ -0,0 +1,41 @@
+"""
+Measure the per-request cost of the Prometheus instrumentation
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from health_content.benchmark import run_metrics_benchmark
+
+
+class Command(BaseCommand):
+    help = "Microbenchmark metrics recording, MetricsMiddleware overhead and scrape rendering"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100000, help="Calls per microbenchmark")
+        parser.add_argument('--threads', type=int, default=8, help="Threads recording at once")
+        parser.add_argument('--requests', type=int, default=500, help="Requests to the reference endpoint")
+        parser.add_argument('--path', default='/api/content/popular/', help="Reference endpoint")
+        parser.add_argument('--output', help="Write the results to this JSON file")
+        parser.add_argument(
+            '--max-overhead', type=float,
+            help="Exit non-zero if the middleware adds more than this fraction (e.g. 0.01) to the endpoint"
+        )
+    
+    def handle(self, *args, **options):
+        results = run_metrics_benchmark(
+            iterations=options['iterations'],
+            threads=options['threads'],
+            requests=options['requests'],
+            path=options['path'],
+            stdout=self.stdout,
+        )
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(results, handle, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
+        if options['max_overhead'] is not None and results['overhead_share'] > options['max_overhead']:
+            raise CommandError(
+                f"Metrics add {results['overhead_share']:.2%} to {options['path']}, "
+                f"limit is {options['max_overhead']:.2%}"
+            )
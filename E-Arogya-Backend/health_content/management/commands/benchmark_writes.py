@@ -0,0 +1,50 @@
+"""
+Measure write throughput of the view, like and rating endpoints under concurrency
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from health_content.benchmark import WRITE_OPERATIONS, compare_write_results, run_write_benchmark
+
+
+class Command(BaseCommand):
+    help = "Send concurrent view/like/rating writes and report writes per second and lock errors as JSON"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help="Concurrent writers")
+        parser.add_argument('--writes', type=int, default=100, help="Writes per thread and operation")
+        parser.add_argument(
+            '--operation', action='append', choices=WRITE_OPERATIONS,
+            help="Only this operation (repeatable)"
+        )
+        parser.add_argument('--output', help="Write the results to this JSON file")
+        parser.add_argument('--compare', help="Earlier results JSON to compare against")
+    
+    def handle(self, *args, **options):
+        try:
+            results = run_write_benchmark(
+                threads=options['threads'],
+                writes=options['writes'],
+                operations=options['operation'] or WRITE_OPERATIONS,
+                stdout=self.stdout,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        
+        profile = results['meta']['database']
+        self.stdout.write("Database: " + ", ".join(f"{name}={value}" for name, value in profile.items()))
+        
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(results, handle, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
+        
+        if options['compare']:
+            with open(options['compare']) as handle:
+                baseline = json.load(handle)
+            for operation, field, before, after, change in compare_write_results(baseline, results):
+                if change is None:
+                    self.stdout.write(f"{operation:7} {field:15} {before:>10} -> {after:>10}")
+                else:
+                    self.stdout.write(f"{operation:7} {field:15} {before:>10} -> {after:>10} ({change:+.1%})")
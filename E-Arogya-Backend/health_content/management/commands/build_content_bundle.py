@@ -0,0 +1,24 @@
+"""
+Precompute the offline content bundle served by /api/bundle/
+"""
+from django.core.management.base import BaseCommand
+
+from health_content.bundles import bundle_dir, current_manifest, write_bundle
+
+
+class Command(BaseCommand):
+    help = "Build the compressed offline bundle of all active categories and content"
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help="Rebuild even if the stored bundle matches the catalog",
+        )
+    
+    def handle(self, *args, **options):
+        manifest = write_bundle() if options['force'] else current_manifest()
+        sizes = ', '.join(
+            f"{encoding} {entry['size']} bytes" for encoding, entry in manifest['files'].items()
+        )
+        self.stdout.write(f"Version {manifest['version']} ({manifest['hash'][:16]}): {sizes}")
+        self.stdout.write(self.style.SUCCESS(f"Bundle written to {bundle_dir()}"))
@@ -0,0 +1,55 @@
+"""
+Replay every API endpoint and fail if one exceeds its query budget
+"""
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections, transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from health_content.models import HealthCategory, MediaContent
+from health_content.querybudget import (
+    ENDPOINT_BUDGETS, WORST_CASE_SETTINGS, QueryBudgetExceeded, assert_max_queries
+)
+
+
+class Command(BaseCommand):
+    help = "Check that every health_content endpoint stays within its query budget"
+    
+    def handle(self, *args, **options):
+        content = MediaContent.objects.filter(is_active=True).first()
+        category = HealthCategory.objects.filter(is_active=True).first()
+        if content is None or category is None:
+            raise CommandError("Need at least one active category and content item")
+        
+        # Keep the connection open across requests so everything can be rolled back
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        failures = []
+        try:
+            with override_settings(ALLOWED_HOSTS=['*'], HEALTH_CONTENT=WORST_CASE_SETTINGS):
+                with transaction.atomic():
+                    client = APIClient()
+                    for method, path, budget in ENDPOINT_BUDGETS:
+                        url = path.format(content_id=content.pk, category_slug=category.slug)
+                        cache.clear()
+                        try:
+                            with assert_max_queries(budget, label=f"{method.upper()} {url}") as context:
+                                response = getattr(client, method)(url)
+                        except QueryBudgetExceeded as exc:
+                            failures.append(str(exc))
+                            self.stdout.write(self.style.ERROR(f"FAIL {method.upper()} {url}"))
+                            continue
+                        self.stdout.write(
+                            f"ok   {method.upper()} {url} -> {response.status_code}, "
+                            f"{len(context)}/{budget} queries"
+                        )
+                    transaction.set_rollback(True)
+        finally:
+            request_started.connect(close_old_connections)
+            request_finished.connect(close_old_connections)
+        
+        if failures:
+            raise CommandError("Query budget exceeded:\n\n" + "\n\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("All endpoints within their query budgets"))
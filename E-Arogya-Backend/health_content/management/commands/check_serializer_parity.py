@@ -0,0 +1,42 @@
+"""
+Check that the fast list path renders byte-for-byte what DRF renders
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from health_content.models import HealthCategory, MediaContent
+from health_content.parity import compare_list_output, create_edge_cases
+
+
+class Command(BaseCommand):
+    help = "Compare MediaContentValuesSerializer + ORJSONRenderer output with the DRF serializer and renderer"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--timezone', default=None, help="Also check under this time zone, e.g. UTC")
+    
+    def handle(self, *args, **options):
+        category = HealthCategory.objects.first()
+        if category is None:
+            raise CommandError("Need at least one category")
+        
+        zones = [None] + ([options['timezone']] if options['timezone'] else [])
+        failures = []
+        with transaction.atomic():
+            create_edge_cases(category)
+            queryset = MediaContent.objects.order_by('id')
+            for zone in zones:
+                label = zone or 'default time zone'
+                if zone:
+                    timezone.activate(zone)
+                try:
+                    zone_failures, rows, size = compare_list_output(queryset, label)
+                finally:
+                    timezone.deactivate()
+                failures += zone_failures
+                self.stdout.write(f"{label}: {rows} rows, {size} bytes compared")
+            transaction.set_rollback(True)
+        
+        if failures:
+            raise CommandError("Output differs:\n" + "\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("Fast list path matches the DRF output"))
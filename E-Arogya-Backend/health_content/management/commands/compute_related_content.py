@@ -0,0 +1,24 @@
+"""
+Recompute the precomputed related content of media items
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from health_content.related import SIMILARITY_BACKEND, compute_related_content
+
+
+class Command(BaseCommand):
+    help = "Update related content for items whose text changed (or all with --full)"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Recompute the neighbours of every item")
+        parser.add_argument('--limit', type=int, help="Neighbours stored per item")
+    
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        updated = compute_related_content(full=options['full'], limit=options['limit'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Recomputed related content of {updated} items ({SIMILARITY_BACKEND}) "
+            f"in {time.monotonic() - started:.2f}s"
+        ))
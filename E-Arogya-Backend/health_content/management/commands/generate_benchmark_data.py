@@ -0,0 +1,50 @@
+"""
+Fill the database with synthetic benchmark data
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from health_content.benchmark import clear_benchmark_data, generate_benchmark_data
+
+
+class Command(BaseCommand):
+    help = "Insert deterministic synthetic categories, content, ratings and views for benchmarks"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--content', type=int, default=10000, help="Content items to create")
+        parser.add_argument('--categories', type=int, default=20, help="Categories to spread them over")
+        parser.add_argument('--ratings', type=int, help="Ratings to create (default: one per item)")
+        parser.add_argument('--views', type=int, help="Raw views to create (default: ten per item)")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed; one data set per seed")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows per bulk insert transaction")
+        parser.add_argument('--clear', action='store_true', help="Delete existing benchmark data first")
+        parser.add_argument('--clear-only', action='store_true', help="Only delete existing benchmark data")
+    
+    def handle(self, *args, **options):
+        if options['clear'] or options['clear_only']:
+            deleted = clear_benchmark_data()
+            self.stdout.write(f"Deleted {deleted} benchmark rows")
+            if options['clear_only']:
+                return
+        
+        started = time.monotonic()
+        try:
+            counts = generate_benchmark_data(
+                content=options['content'],
+                categories=options['categories'],
+                ratings=options['ratings'],
+                views=options['views'],
+                seed=options['seed'],
+                batch_size=options['batch_size'],
+                stdout=self.stdout,
+            )
+        except IntegrityError as exc:
+            raise CommandError(f"Benchmark data for seed {options['seed']} exists, use --clear ({exc})")
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {counts['categories']} categories, {counts['content']} content items, "
+            f"{counts['ratings']} ratings and {counts['views']} views in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,38 @@
+"""
+Load health categories and content from JSON/YAML fixtures
+"""
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from health_content.seeding import FixtureError, load_categories, load_content, read_fixture
+
+
+DEFAULT_FIXTURE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'seed', 'health_content.json',
+)
+
+
+class Command(BaseCommand):
+    help = "Create or update categories and content from fixture files (bundled seed data by default)"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('fixtures', nargs='*', help="JSON or YAML fixture files")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Content rows per transaction")
+    
+    def handle(self, *args, **options):
+        for path in options['fixtures'] or [DEFAULT_FIXTURE]:
+            started = time.monotonic()
+            try:
+                data = read_fixture(path)
+                categories = load_categories(data['categories'])
+                content = load_content(data['content'], batch_size=options['batch_size'])
+            except (OSError, FixtureError) as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(self.style.SUCCESS(
+                f"{os.path.basename(path)}: categories {categories[0]} created, {categories[1]} updated, "
+                f"{categories[2]} unchanged; content {content[0]} created, {content[1]} updated, "
+                f"{content[2]} unchanged in {time.monotonic() - started:.2f}s"
+            ))
@@ -0,0 +1,21 @@
+"""
+Recompute the denormalized per-category content counters
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from health_content.models import HealthCategory
+
+
+class Command(BaseCommand):
+    help = "Rebuild active content counters for every health category"
+    
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            HealthCategory.refresh_content_counts()
+        for category in HealthCategory.objects.all():
+            self.stdout.write(
+                f"{category.name}: {category.active_content_count} active "
+                f"{category.content_type_counts}"
+            )
+        self.stdout.write(self.style.SUCCESS("Category counters rebuilt"))
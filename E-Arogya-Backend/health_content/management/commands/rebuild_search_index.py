@@ -0,0 +1,24 @@
+"""
+Rebuild the full-text search index from scratch
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from health_content.models import MediaContent
+from health_content.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the media content search index"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help="Database alias to rebuild")
+    
+    def handle(self, *args, **options):
+        backend = get_search_backend(options['database'])
+        with transaction.atomic(using=options['database']):
+            backend.rebuild(MediaContent)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {backend.name} search index for "
+            f"{MediaContent.objects.using(options['database']).count()} items"
+        ))
@@ -0,0 +1,28 @@
+"""
+Rebuild the Tag / MediaContentTag index from MediaContent.tags
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from health_content.models import MediaContentTag, Tag
+from health_content.tags import rebuild_tag_index
+
+
+class Command(BaseCommand):
+    help = "Re-index the comma-separated tags of every media content item"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help="Database alias to rebuild")
+        parser.add_argument('--prune', action='store_true', help="Delete tags no content uses any more")
+    
+    def handle(self, *args, **options):
+        using = options['database']
+        with transaction.atomic(using=using):
+            indexed = rebuild_tag_index(using=using)
+            pruned = 0
+            if options['prune']:
+                pruned = Tag.objects.using(using).filter(content_links__isnull=True).delete()[0]
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed tags of {indexed} items: {Tag.objects.using(using).count()} tags, "
+            f"{MediaContentTag.objects.using(using).count()} links ({pruned} unused tags pruned)"
+        ))
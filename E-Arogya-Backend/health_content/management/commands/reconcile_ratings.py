@@ -0,0 +1,16 @@
+"""
+Recompute MediaContent rating aggregates from the ratings table
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from health_content.models import MediaContent
+
+
+class Command(BaseCommand):
+    help = "Reconcile MediaContent.rating_count and rating_sum with ContentRating rows"
+    
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            changed = MediaContent.reconcile_rating_aggregates()
+        self.stdout.write(self.style.SUCCESS(f"Reconciled rating aggregates, {changed} items corrected"))
@@ -0,0 +1,33 @@
+"""
+Fold new views, likes and shares into the time-decayed trending scores
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from health_content.trending import refresh_trending_scores
+
+
+class Command(BaseCommand):
+    help = "Update trending scores with the engagement since the last run"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, help="Raw view rows read per query")
+        parser.add_argument(
+            '--interval', type=float,
+            help="Keep running, repeating the job every INTERVAL seconds"
+        )
+    
+    def handle(self, *args, **options):
+        while True:
+            self.run_once(options)
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+    
+    def run_once(self, options):
+        started = time.monotonic()
+        updated = refresh_trending_scores(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated trending scores of {updated} items in {time.monotonic() - started:.2f}s"
+        ))
@@ -0,0 +1,42 @@
+"""
+Fold raw ContentView rows into hourly/daily rollups and prune old raw rows
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from health_content.rollups import prune_raw_views, rollup_content_views
+
+
+class Command(BaseCommand):
+    help = "Roll up new content views and apply the raw-row retention policy"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, help="Raw rows folded per transaction")
+        parser.add_argument('--retention-days', type=int, help="Prune rolled-up raw rows older than this")
+        parser.add_argument('--no-prune', action='store_true', help="Skip the retention step")
+        parser.add_argument(
+            '--interval', type=float,
+            help="Keep running, repeating the job every INTERVAL seconds"
+        )
+    
+    def handle(self, *args, **options):
+        while True:
+            self.run_once(options)
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+    
+    def run_once(self, options):
+        started = time.monotonic()
+        processed = rollup_content_views(chunk_size=options['chunk_size'])
+        deleted = 0
+        if not options['no_prune']:
+            deleted = prune_raw_views(
+                retention_days=options['retention_days'],
+                chunk_size=options['chunk_size'],
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled up {processed} views, pruned {deleted} raw rows "
+            f"in {time.monotonic() - started:.2f}s"
+        ))
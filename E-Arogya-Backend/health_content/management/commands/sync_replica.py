@@ -0,0 +1,32 @@
+"""
+Copy the primary SQLite database onto the SQLite read replica
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from health_content.replica import REPLICA_DATABASE, copy_to_replica, replica_configured
+
+
+class Command(BaseCommand):
+    help = "Refresh a local SQLite replica (SQLITE_REPLICA_PATH) from the primary database"
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help="Keep running, copying every INTERVAL seconds (simulates replication lag)"
+        )
+    
+    def handle(self, *args, **options):
+        if not replica_configured():
+            raise CommandError(f"No '{REPLICA_DATABASE}' database configured; set SQLITE_REPLICA_PATH")
+        while True:
+            started = time.monotonic()
+            try:
+                copy_to_replica()
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(self.style.SUCCESS(f"Copied the primary to the replica in {time.monotonic() - started:.2f}s"))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,443 @@
+"""
+Prometheus metrics for the health_content API
+
+MetricsMiddleware records the latency, status and SQL query count of every
+request per view handler (viewset class and action, e.g.
+MediaContentViewSet.trending), and cache_response counts hits and misses
+per endpoint. Engagement counter buffer, view ingest and response cache
+figures are read from those objects when metrics are collected, so they
+cost nothing per request. /metrics serves everything in the Prometheus
+text format.
+
+Recording takes no lock: every thread updates its own shard of counters
+and histograms, and shards are only merged when metrics are collected.
+Shards of finished threads are folded into a retired total.
+
+Each gunicorn worker only sees its own requests. With
+METRICS_MULTIPROCESS_DIR set, every process writes its values to
+<dir>/<pid>.json every METRICS_SYNC_INTERVAL seconds and when it exits,
+and /metrics adds up the files of all processes. Counters and histograms
+of exited workers are kept so totals never go backwards; gauges only come
+from processes that wrote recently. Empty the directory when the server
+starts and call mark_process_dead() from gunicorn's child_exit hook so
+recycled workers are folded into one archive file.
+"""
+import atexit
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .conf import get_setting
+
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'earogya_'
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+# Other methods are reported as 'other' so clients cannot add label values
+METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+ARCHIVE_FILE = 'archive.json'
+LOCK_FILE = '.lock'
+
+# name: (type, help, label names, histogram buckets or how gauges of
+# several processes are combined)
+METRICS = {
+    'http_requests_total': (
+        'counter', "Requests by view handler, method and status code", ('handler', 'method', 'status'), None,
+    ),
+    'http_request_duration_seconds': (
+        'histogram', "Request latency by view handler and method", ('handler', 'method'), LATENCY_BUCKETS,
+    ),
+    'http_request_db_queries': (
+        'histogram', "SQL queries per request by view handler", ('handler',), QUERY_BUCKETS,
+    ),
+    'response_cache_lookups_total': (
+        'counter', "Response cache lookups by endpoint and result (hit or miss)", ('endpoint', 'result'), None,
+    ),
+    'response_cache_invalidations_total': (
+        'counter', "Response cache entries removed by invalidation", (), None,
+    ),
+    'counter_buffer_pending': (
+        'gauge', "Engagement counter increments waiting to be flushed", (), 'sum',
+    ),
+    'counter_buffer_oldest_pending_seconds': (
+        'gauge', "Age of the oldest engagement counter increment waiting to be flushed", (), 'max',
+    ),
+    'counter_buffer_seconds_since_flush': (
+        'gauge', "Seconds since the engagement counter buffer was last flushed", (), 'max',
+    ),
+    'counter_buffer_flushes_total': (
+        'counter', "Engagement counter buffer flushes", (), None,
+    ),
+    'view_ingest_events_total': (
+        'counter', "ContentView events by outcome (enqueued, written, dropped, failed)", ('outcome',), None,
+    ),
+    'view_ingest_batches_total': (
+        'counter', "ContentView batches written", (), None,
+    ),
+    'view_ingest_queue_depth': (
+        'gauge', "ContentView events waiting to be written", (), 'sum',
+    ),
+}
+
+
+def _empty():
+    return {'counters': {}, 'histograms': {}, 'gauges': {}}
+
+
+def _merge(target, source, gauges=True):
+    """Add the counters and histograms of `source` to `target` in place"""
+    counters, histograms = target['counters'], target['histograms']
+    for key, value in source['counters'].items():
+        counters[key] = counters.get(key, 0) + value
+    for key, values in source['histograms'].items():
+        current = histograms.get(key)
+        histograms[key] = list(values) if current is None else [a + b for a, b in zip(current, values)]
+    if gauges:
+        for key, value in source['gauges'].items():
+            current = target['gauges'].get(key)
+            if current is None:
+                target['gauges'][key] = value
+            elif METRICS[key[0]][3] == 'max':
+                target['gauges'][key] = max(current, value)
+            else:
+                target['gauges'][key] = current + value
+    return target
+
+
+def _collect_components():
+    """Counters and gauges read from the response cache, counter buffer and view ingest queue"""
+    from .cache import response_cache
+    from .counters import engagement_counters
+    from .ingest import view_ingest
+
+    buffer = engagement_counters.stats()
+    ingest = view_ingest.stats()
+    counters = {
+        ('response_cache_invalidations_total', ()): response_cache.invalidations,
+        ('counter_buffer_flushes_total', ()): buffer['flushes'],
+        ('view_ingest_batches_total', ()): ingest['batches'],
+    }
+    for outcome in ('enqueued', 'written', 'dropped', 'failed'):
+        counters[('view_ingest_events_total', (outcome,))] = ingest[outcome]
+    gauges = {
+        ('counter_buffer_pending', ()): buffer['pending'],
+        ('counter_buffer_oldest_pending_seconds', ()): buffer['oldest_pending_seconds'],
+        ('view_ingest_queue_depth', ()): ingest['queued'],
+    }
+    if buffer['seconds_since_flush'] is not None:
+        gauges[('counter_buffer_seconds_since_flush', ())] = buffer['seconds_since_flush']
+    return {'counters': counters, 'histograms': {}, 'gauges': gauges}
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms of one process, sharded per thread
+    """
+
+    def __init__(self, collect_components=True):
+        self._collect_components = collect_components
+        self._reset()
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards = []
+        self._retired = _empty()
+        self._thread = None
+        self._atexit_registered = False
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = ({}, {})
+            with self._lock:
+                self._shards.append((weakref.ref(threading.current_thread()), shard))
+            self._ensure_worker()
+            return shard
+
+    def inc(self, name, labels=(), amount=1):
+        """Add to a counter"""
+        counters = self._shard()[0]
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        """Record a histogram observation"""
+        histograms = self._shard()[1]
+        key = (name, labels)
+        values = histograms.get(key)
+        buckets = METRICS[name][3]
+        if values is None:
+            # One slot per bucket, one for +Inf and the sum of observations
+            values = histograms[key] = [0] * (len(buckets) + 2)
+        values[bisect.bisect_left(buckets, value)] += 1
+        values[-1] += value
+
+    def snapshot(self):
+        """{'counters', 'histograms', 'gauges'}: {(name, labels): value} of this process"""
+        result = _empty()
+        with self._lock:
+            live = []
+            for thread, (counters, histograms) in self._shards:
+                # dict() and list() copies do not let the owning thread run in between
+                shard = {
+                    'counters': dict(counters),
+                    'histograms': {key: list(values) for key, values in list(histograms.items())},
+                    'gauges': {},
+                }
+                alive = thread()
+                if alive is not None and alive.is_alive():
+                    live.append((thread, (counters, histograms)))
+                    _merge(result, shard)
+                else:
+                    _merge(self._retired, shard)
+            self._shards = live
+            _merge(result, self._retired)
+        if self._collect_components:
+            _merge(result, _collect_components())
+        return result
+
+    def write_snapshot(self, directory):
+        """Write this process's values to <directory>/<pid>.json"""
+        os.makedirs(directory, exist_ok=True)
+        _write_json(os.path.join(directory, f'{os.getpid()}.json'), _dump(self.snapshot(), time.time()))
+
+    def _ensure_worker(self):
+        if not get_setting('METRICS_MULTIPROCESS_DIR'):
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='metrics-sync', daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self._sync)
+                self._atexit_registered = True
+
+    def _run(self):
+        while True:
+            time.sleep(get_setting('METRICS_SYNC_INTERVAL'))
+            self._sync()
+
+    def _sync(self):
+        directory = get_setting('METRICS_MULTIPROCESS_DIR')
+        if not directory:
+            return
+        try:
+            self.write_snapshot(directory)
+        except Exception:
+            logger.exception("Writing the metrics snapshot failed")
+
+
+metrics = MetricsRegistry()
+# A forked worker starts from zero instead of repeating the parent's values
+os.register_at_fork(after_in_child=metrics._reset)
+
+
+def _dump(snapshot, written_at):
+    return {
+        'written_at': written_at,
+        **{
+            kind: [[name, list(labels), value] for (name, labels), value in snapshot[kind].items()]
+            for kind in ('counters', 'histograms', 'gauges')
+        },
+    }
+
+
+def _load(data):
+    snapshot = {
+        kind: {(name, tuple(labels)): value for name, labels, value in data.get(kind, ())}
+        for kind in ('counters', 'histograms', 'gauges')
+    }
+    return snapshot, data.get('written_at')
+
+
+def _write_json(path, data):
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w') as handle:
+        json.dump(data, handle)
+    os.replace(temporary, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return None
+
+
+@contextmanager
+def _directory_lock(directory, exclusive=False):
+    """flock on the directory's lock file; readers share it, archiving excludes them"""
+    import fcntl
+
+    with open(os.path.join(directory, LOCK_FILE), 'a') as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def collect_directory(directory, stale_after):
+    """Sum of the snapshots in a multiprocess directory"""
+    result = _empty()
+    now = time.time()
+    with _directory_lock(directory):
+        for path in sorted(glob.glob(os.path.join(directory, '*.json'))):
+            data = _read_json(path)
+            if data is None:
+                continue
+            snapshot, written_at = _load(data)
+            _merge(result, snapshot, gauges=written_at is not None and now - written_at <= stale_after)
+    return result
+
+
+def mark_process_dead(pid, directory=None):
+    """
+    Fold an exited worker's counters and histograms into the archive file
+    and remove its snapshot; call from gunicorn's child_exit hook
+    """
+    directory = directory or get_setting('METRICS_MULTIPROCESS_DIR')
+    path = os.path.join(directory, f'{pid}.json')
+    archive_path = os.path.join(directory, ARCHIVE_FILE)
+    with _directory_lock(directory, exclusive=True):
+        data = _read_json(path)
+        if data is None:
+            return False
+        archive = _read_json(archive_path)
+        merged = _load(archive)[0] if archive is not None else _empty()
+        _merge(merged, _load(data)[0], gauges=False)
+        # Archived gauges would describe a process that no longer exists
+        merged['gauges'] = {}
+        _write_json(archive_path, _dump(merged, None))
+        os.remove(path)
+    return True
+
+
+def collect_metrics():
+    """Values of this process, or of all processes in multiprocess mode"""
+    directory = get_setting('METRICS_MULTIPROCESS_DIR')
+    if not directory:
+        return metrics.snapshot()
+    # Bring this worker's file up to date before reading the others
+    metrics.write_snapshot(directory)
+    return collect_directory(directory, stale_after=3 * get_setting('METRICS_SYNC_INTERVAL'))
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _label_text(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def render_metrics(snapshot):
+    """Prometheus text exposition (format 0.0.4) of a snapshot"""
+    samples = {name: [] for name in METRICS}
+    for kind in ('counters', 'histograms', 'gauges'):
+        for (name, labels), value in snapshot[kind].items():
+            if name in samples:
+                samples[name].append((labels, value))
+
+    lines = []
+    for name, (kind, help_text, label_names, buckets) in METRICS.items():
+        full_name = PREFIX + name
+        lines.append(f'# HELP {full_name} {help_text}')
+        lines.append(f'# TYPE {full_name} {kind}')
+        for labels, value in sorted(samples[name]):
+            if kind != 'histogram':
+                lines.append(f'{full_name}{_label_text(label_names, labels)} {_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + (float('inf'),), value):
+                cumulative += count
+                bucket_labels = _label_text(label_names + ('le',), labels + (_number(float(bound)),))
+                lines.append(f'{full_name}_bucket{bucket_labels} {cumulative}')
+            lines.append(f'{full_name}_sum{_label_text(label_names, labels)} {_number(value[-1])}')
+            lines.append(f'{full_name}_count{_label_text(label_names, labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def handler_name(view_func, method):
+    """'MediaContentViewSet.trending' for viewset actions, the view's name otherwise"""
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return getattr(view_func, '__name__', 'unknown')
+    actions = getattr(view_func, 'actions', None)
+    if actions:
+        return f'{view_class.__name__}.{actions.get(method.lower(), method.lower())}'
+    return view_class.__name__
+
+
+class QueryCounter:
+    """Connection execute wrapper counting statements"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """
+    Records request latency, status and query count; add it first in
+    MIDDLEWARE so the latency covers the other middleware too
+    """
+
+    def __init__(self, get_response, registry=None):
+        if not get_setting('METRICS_ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.registry = registry or metrics
+
+    def __call__(self, request):
+        queries = QueryCounter()
+        # What connection.execute_wrapper() does, without a context manager per alias
+        wrapped = connections.all()
+        for connection in wrapped:
+            connection.execute_wrappers.append(queries)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            elapsed = time.perf_counter() - started
+            for connection in wrapped:
+                connection.execute_wrappers.remove(queries)
+
+        handler = getattr(request, 'metrics_handler', 'unmatched')
+        method = request.method if request.method in METHODS else 'other'
+        self.registry.inc('http_requests_total', (handler, method, str(response.status_code)))
+        self.registry.observe('http_request_duration_seconds', (handler, method), elapsed)
+        self.registry.observe('http_request_db_queries', (handler,), queries.count)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_handler = handler_name(view_func, request.method)
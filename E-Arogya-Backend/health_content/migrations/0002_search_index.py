@@ -0,0 +1,99 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:28
+
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Frozen copies of health_content.search as of this migration, so later
+# changes to that module cannot change what migrating from scratch does
+FTS_TABLE = 'health_content_search'
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _setting(name, default):
+    return getattr(settings, 'HEALTH_CONTENT', {}).get(name, default)
+
+
+def _fts5_available(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if cursor.fetchone()[0]:
+            return True
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+            cursor.execute("DROP TABLE temp.fts5_probe")
+        except Exception:
+            return False
+    return True
+
+
+def _terms(texts, weights):
+    scores = Counter()
+    for text, field_weight in zip(texts, weights):
+        tokens = [token[:64] for token in TOKEN_RE.findall((text or '').lower())]
+        for term, tf in Counter(tokens).items():
+            scores[term] += field_weight * tf * 2.2 / (tf + 1.2)
+    return scores
+
+
+def build_search_index(apps, schema_editor):
+    MediaContent = apps.get_model('health_content', 'MediaContent')
+    SearchTerm = apps.get_model('health_content', 'SearchTerm')
+    connection = schema_editor.connection
+    using = connection.alias
+    rows = MediaContent.objects.using(using).values_list('pk', 'title', 'description', 'tags')
+    if _setting('SEARCH_BACKEND', 'auto') != 'index' and _fts5_available(connection):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                "title, description, tags, "
+                "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE}(rowid, title, description, tags) VALUES (%s, %s, %s, %s)",
+                list(rows.iterator()),
+            )
+    else:
+        weights = _setting('SEARCH_WEIGHTS', (10.0, 5.0, 2.0))
+        SearchTerm.objects.using(using).bulk_create([
+            SearchTerm(content_id=pk, term=term, weight=weight)
+            for pk, *texts in rows.iterator()
+            for term, weight in _terms(texts, weights).items()
+        ], batch_size=500)
+
+
+def drop_search_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health_content', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.FloatField(help_text='Field-weighted, saturated term frequency')),
+                ('content', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='health_content.mediacontent')),
+            ],
+            options={
+                'verbose_name': 'Search Term',
+                'verbose_name_plural': 'Search Terms',
+                'indexes': [models.Index(fields=['term', 'content'], name='health_cont_term_b19229_idx')],
+                'unique_together': {('content', 'term')},
+            },
+        ),
+        migrations.RunPython(build_search_index, drop_search_index),
+    ]
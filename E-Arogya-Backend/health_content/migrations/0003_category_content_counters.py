@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:28
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_counters(apps, schema_editor):
+    HealthCategory = apps.get_model('health_content', 'HealthCategory')
+    MediaContent = apps.get_model('health_content', 'MediaContent')
+    counts = {}
+    grouped = MediaContent.objects.filter(is_active=True).order_by().values(
+        'category_id', 'content_type'
+    ).annotate(total=Count('id'))
+    for row in grouped:
+        counts.setdefault(row['category_id'], {})[row['content_type']] = row['total']
+    for category_id in HealthCategory.objects.values_list('pk', flat=True):
+        type_counts = counts.get(category_id, {})
+        HealthCategory.objects.filter(pk=category_id).update(
+            active_content_count=sum(type_counts.values()),
+            content_type_counts=type_counts,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health_content', '0002_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='healthcategory',
+            name='active_content_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='healthcategory',
+            name='content_type_counts',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Active content count per content type'),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
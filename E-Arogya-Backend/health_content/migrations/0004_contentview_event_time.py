@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:30
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health_content', '0003_category_content_counters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='contentview',
+            name='viewed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health_content', '0004_contentview_event_time'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ContentViewRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hourly'), ('day', 'Daily')], max_length=4)),
+                ('period_start', models.DateTimeField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_rollups', to='health_content.healthcategory')),
+                ('content', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_rollups', to='health_content.mediacontent')),
+            ],
+            options={
+                'verbose_name': 'Content View Rollup',
+                'verbose_name_plural': 'Content View Rollups',
+                'indexes': [models.Index(fields=['granularity', 'period_start'], name='health_cont_granula_ab2f85_idx'), models.Index(fields=['category', 'granularity', 'period_start'], name='health_cont_categor_fd4e15_idx')],
+                'unique_together': {('content', 'granularity', 'period_start')},
+            },
+        ),
+    ]
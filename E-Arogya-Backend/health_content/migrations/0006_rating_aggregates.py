@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:32
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def populate_rating_aggregates(apps, schema_editor):
+    MediaContent = apps.get_model('health_content', 'MediaContent')
+    ContentRating = apps.get_model('health_content', 'ContentRating')
+    totals = ContentRating.objects.order_by().values('content_id').annotate(
+        total=Count('id'), rating_total=Sum('rating')
+    )
+    for row in totals:
+        MediaContent.objects.filter(pk=row['content_id']).update(
+            rating_count=row['total'], rating_sum=row['rating_total']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health_content', '0005_content_view_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediacontent',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='mediacontent',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_rating_aggregates, migrations.RunPython.noop),
+    ]
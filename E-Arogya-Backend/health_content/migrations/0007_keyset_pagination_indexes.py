@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health_content', '0006_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mediacontent',
+            index=models.Index(fields=['is_active', '-published_date', '-id'], name='content_active_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mediacontent',
+            index=models.Index(fields=['category', 'is_active', '-is_featured', '-published_date', '-id'], name='content_category_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_tag_index(apps, schema_editor):
+    """
+    Index the tags of existing content. Self-contained, with the historical
+    models, so later changes to health_content.tags cannot alter it.
+    """
+    MediaContent = apps.get_model('health_content', 'MediaContent')
+    Tag = apps.get_model('health_content', 'Tag')
+    MediaContentTag = apps.get_model('health_content', 'MediaContentTag')
+    using = schema_editor.connection.alias
+
+    rows = [
+        (content_id, [tag.strip() for tag in (tags or '').split(',') if tag.strip()])
+        for content_id, tags in MediaContent.objects.using(using).order_by('pk').values_list('pk', 'tags')
+    ]
+    names = {name for _, tag_names in rows for name in tag_names}
+    Tag.objects.using(using).bulk_create([Tag(name=name) for name in sorted(names)], ignore_conflicts=True)
+    tag_ids = dict(Tag.objects.using(using).values_list('name', 'id'))
+    MediaContentTag.objects.using(using).bulk_create([
+        MediaContentTag(content_id=content_id, tag_id=tag_ids[name], position=position)
+        for content_id, tag_names in rows
+        for position, name in enumerate(tag_names)
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health_content', '0008_sync_change_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=500, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='mediacontent',
+            name='tags',
+            field=models.CharField(blank=True, help_text='Comma-separated tags; indexed into Tag / MediaContentTag on save', max_length=500),
+        ),
+        migrations.CreateModel(
+            name='MediaContentTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('content', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='health_content.mediacontent')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='content_links', to='health_content.tag')),
+            ],
+            options={
+                'ordering': ['content', 'position'],
+            },
+        ),
+        migrations.AddField(
+            model_name='mediacontent',
+            name='tag_set',
+            field=models.ManyToManyField(blank=True, related_name='content', through='health_content.MediaContentTag', to='health_content.tag'),
+        ),
+        migrations.AddIndex(
+            model_name='mediacontenttag',
+            index=models.Index(fields=['tag', 'content'], name='health_cont_tag_id_883ff5_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='mediacontenttag',
+            unique_together={('content', 'position')},
+        ),
+        migrations.RunPython(build_tag_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:48
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_existing_engagement(apps, schema_editor):
+    # Lifetime likes/shares have no timestamps; only count new ones as trending
+    MediaContent = apps.get_model('health_content', 'MediaContent')
+    MediaContent.objects.using(schema_editor.connection.alias).update(
+        trending_likes_seen=F('like_count'), trending_shares_seen=F('share_count')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health_content', '0009_tag_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediacontent',
+            name='trending_likes_seen',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='mediacontent',
+            name='trending_score',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='mediacontent',
+            name='trending_shares_seen',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='mediacontent',
+            index=models.Index(fields=['is_active', '-trending_score', '-id'], name='content_trending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mediacontent',
+            index=models.Index(fields=['category', 'is_active', '-trending_score', '-id'], name='content_category_trending_idx'),
+        ),
+        migrations.RunPython(mark_existing_engagement, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health_content', '0010_trending_scores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediacontent',
+            name='related_signature',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.CreateModel(
+            name='RelatedContent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('content', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='health_content.mediacontent')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_to', to='health_content.mediacontent')),
+            ],
+            options={
+                'verbose_name': 'Related Content',
+                'verbose_name_plural': 'Related Content',
+                'ordering': ['content', 'rank'],
+                'unique_together': {('content', 'rank')},
+            },
+        ),
+    ]
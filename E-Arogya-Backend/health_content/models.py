@@ -7,6 +7,33 @@ from django.core.validators import URLValidator
 from django.utils import timezone
 
 
+def split_tags(tags):
+    """Comma-separated tags as a list"""
+    return [tag.strip() for tag in tags.split(',') if tag.strip()]
+
+
+def youtube_video_id(url):
+    """Extract the YouTube video ID from a watch or youtu.be URL"""
+    if 'youtube.com' in url or 'youtu.be' in url:
+        if 'youtube.com/watch?v=' in url:
+            return url.split('v=')[1].split('&')[0]
+        elif 'youtu.be/' in url:
+            return url.split('/')[-1].split('?')[0]
+    return None
+
+
+def resolve_thumbnail_url(thumbnail_url, url):
+    """The stored thumbnail, else the YouTube thumbnail of url, else None"""
+    if thumbnail_url:
+        return thumbnail_url
+    
+    youtube_id = youtube_video_id(url)
+    if youtube_id:
+        return f"https://img.youtube.com/vi/{youtube_id}/maxresdefault.jpg"
+    
+    return None
+
+
 class HealthCategory(models.Model):
     """
     Health categories for organizing content (nutrition, hygiene, etc.)
@@ -21,10 +48,21 @@ class HealthCategory(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Denormalized counters, kept in sync by signals on MediaContent
+    active_content_count = models.PositiveIntegerField(default=0, editable=False)
+    content_type_counts = models.JSONField(
+        default=dict, blank=True, editable=False,
+        help_text="Active content count per content type"
+    )
+    
     class Meta:
         ordering = ['order', 'name']
         verbose_name = "Health Category"
         verbose_name_plural = "Health Categories"
+        indexes = [
+            # Change feed for /api/sync/
+            models.Index(fields=['updated_at', 'id'], name='category_updated_idx'),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -34,17 +72,39 @@ class HealthCategory(models.Model):
     def __str__(self):
         return self.name
     
-    @property
-    def active_content_count(self):
-        return self.media_content.filter(is_active=True).count()
-    
     @property
     def video_count(self):
-        return self.media_content.filter(is_active=True, content_type='video').count()
+        return self.content_type_counts.get('video', 0)
     
     @property
     def article_count(self):
-        return self.media_content.filter(is_active=True, content_type='article').count()
+        return self.content_type_counts.get('article', 0)
+    
+    @classmethod
+    def refresh_content_counts(cls, category_ids=None):
+        """
+        Recompute the denormalized counters with one grouped query.
+        Refreshes every category when category_ids is None.
+        """
+        categories = cls.objects.all()
+        content = MediaContent.objects.filter(is_active=True)
+        if category_ids is not None:
+            categories = categories.filter(pk__in=category_ids)
+            content = content.filter(category_id__in=category_ids)
+        
+        counts = {}
+        grouped = content.order_by().values('category_id', 'content_type').annotate(total=models.Count('id'))
+        for row in grouped:
+            counts.setdefault(row['category_id'], {})[row['content_type']] = row['total']
+        
+        for category_id in categories.values_list('pk', flat=True):
+            type_counts = counts.get(category_id, {})
+            # Bump updated_at so conditional GETs see the new counts
+            cls.objects.filter(pk=category_id).update(
+                active_content_count=sum(type_counts.values()),
+                content_type_counts=type_counts,
+                updated_at=timezone.now(),
+            )
 
 
 class MediaContent(models.Model):
@@ -109,8 +169,27 @@ class MediaContent(models.Model):
     like_count = models.PositiveIntegerField(default=0)
     share_count = models.PositiveIntegerField(default=0)
     
+    # Rating aggregates, kept in sync by signals on ContentRating
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    
+    # Trending: time-decayed activity in log space (see trending.py), and the
+    # like/share counts already folded into it
+    trending_score = models.FloatField(default=0.0, editable=False)
+    trending_likes_seen = models.PositiveIntegerField(default=0, editable=False)
+    trending_shares_seen = models.PositiveIntegerField(default=0, editable=False)
+    # Related content: signature of the text the stored neighbours were
+    # computed from (see related.py); empty until computed
+    related_signature = models.CharField(max_length=32, blank=True, editable=False)
+    
     # SEO and Tags
-    tags = models.CharField(max_length=500, blank=True, help_text="Comma-separated tags")
+    tags = models.CharField(
+        max_length=500, blank=True,
+        help_text="Comma-separated tags; indexed into Tag / MediaContentTag on save"
+    )
+    tag_set = models.ManyToManyField(
+        'Tag', through='MediaContentTag', related_name='content', blank=True
+    )
     meta_description = models.CharField(max_length=160, blank=True)
     
     # Timestamps
@@ -126,11 +205,40 @@ class MediaContent(models.Model):
             models.Index(fields=['category', 'is_active']),
             models.Index(fields=['content_type', 'is_active']),
             models.Index(fields=['is_featured', 'is_active']),
+            # Keyset pagination: (published_date, id) and the featured-first category feed
+            models.Index(fields=['is_active', '-published_date', '-id'], name='content_active_published_idx'),
+            models.Index(
+                fields=['category', 'is_active', '-is_featured', '-published_date', '-id'],
+                name='content_category_feed_idx',
+            ),
+            # Change feed for /api/sync/
+            models.Index(fields=['updated_at', 'id'], name='content_updated_idx'),
+            # Trending lists, overall and per category
+            models.Index(fields=['is_active', '-trending_score', '-id'], name='content_trending_idx'),
+            models.Index(
+                fields=['category', 'is_active', '-trending_score', '-id'],
+                name='content_category_trending_idx',
+            ),
         ]
     
+    # Maintained by F() updates and batch jobs (engagement counters, rating
+    # signals, refresh_trending, compute_related_content), never by forms
+    DENORMALIZED_FIELDS = (
+        'view_count', 'like_count', 'share_count', 'rating_count', 'rating_sum',
+        'trending_score', 'trending_likes_seen', 'trending_shares_seen', 'related_signature',
+    )
+    
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        updating = not (args or self._state.adding or kwargs.get('force_insert'))
+        if updating and kwargs.get('update_fields') is None:
+            # A full save would write back the loaded (possibly stale) values
+            # over concurrent increments
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DENORMALIZED_FIELDS
+            ]
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -138,33 +246,116 @@ class MediaContent(models.Model):
     
     @property
     def tag_list(self):
-        """Return tags as a list"""
-        return [tag.strip() for tag in self.tags.split(',') if tag.strip()]
+        """Return tags as a list, from prefetched tag_links when available"""
+        links = getattr(self, '_prefetched_objects_cache', {}).get('tag_links')
+        if links is not None:
+            return [link.tag.name for link in links]
+        return split_tags(self.tags)
     
     def increment_view_count(self):
-        """Increment view count"""
-        self.view_count += 1
-        self.save(update_fields=['view_count'])
+        """Increment view count through the buffered engagement counters"""
+        from .counters import engagement_counters
+        engagement_counters.increment(self.pk, 'view_count')
+    
+    def like(self):
+        """Increment like count through the buffered engagement counters"""
+        from .counters import engagement_counters
+        engagement_counters.increment(self.pk, 'like_count')
+    
+    def share(self):
+        """Increment share count through the buffered engagement counters"""
+        from .counters import engagement_counters
+        engagement_counters.increment(self.pk, 'share_count')
+    
+    @property
+    def average_rating(self):
+        if self.rating_count:
+            return self.rating_sum / self.rating_count
+        return 0
+    
+    @classmethod
+    def reconcile_rating_aggregates(cls, content_ids=None):
+        """Recompute rating_count/rating_sum from the ratings table"""
+        contents = cls.objects.all()
+        ratings = ContentRating.objects.all()
+        if content_ids is not None:
+            contents = contents.filter(pk__in=content_ids)
+            ratings = ratings.filter(content_id__in=content_ids)
+        
+        totals = {
+            row['content_id']: row
+            for row in ratings.order_by().values('content_id').annotate(
+                total=models.Count('id'), rating_total=models.Sum('rating')
+            )
+        }
+        changed = 0
+        for pk, count, total in contents.values_list('pk', 'rating_count', 'rating_sum'):
+            row = totals.get(pk, {'total': 0, 'rating_total': 0})
+            if (count, total) != (row['total'], row['rating_total']):
+                cls.objects.filter(pk=pk).update(rating_count=row['total'], rating_sum=row['rating_total'])
+                changed += 1
+        return changed
     
     def get_youtube_id(self):
         """Extract YouTube video ID from URL"""
-        if 'youtube.com' in self.url or 'youtu.be' in self.url:
-            if 'youtube.com/watch?v=' in self.url:
-                return self.url.split('v=')[1].split('&')[0]
-            elif 'youtu.be/' in self.url:
-                return self.url.split('/')[-1].split('?')[0]
-        return None
+        return youtube_video_id(self.url)
     
     def get_thumbnail_url(self):
         """Get thumbnail URL, generate from YouTube if needed"""
-        if self.thumbnail_url:
-            return self.thumbnail_url
-        
-        youtube_id = self.get_youtube_id()
-        if youtube_id:
-            return f"https://img.youtube.com/vi/{youtube_id}/maxresdefault.jpg"
-        
-        return None
+        return resolve_thumbnail_url(self.thumbnail_url, self.url)
+
+
+class Tag(models.Model):
+    """
+    A distinct tag name used by media content
+    """
+    name = models.CharField(max_length=500, unique=True)
+    
+    class Meta:
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+
+
+class MediaContentTag(models.Model):
+    """
+    A tag of a content item; position keeps the order of the tags string
+    """
+    content = models.ForeignKey(MediaContent, on_delete=models.CASCADE, related_name='tag_links')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='content_links')
+    position = models.PositiveSmallIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['content', 'position']
+        unique_together = ['content', 'position']
+        indexes = [
+            # Tag filter and facet counts
+            models.Index(fields=['tag', 'content']),
+        ]
+    
+    def __str__(self):
+        return f"{self.content_id}: {self.tag_id}"
+
+
+class RelatedContent(models.Model):
+    """
+    Precomputed text-similarity neighbour of a content item, best first
+    """
+    content = models.ForeignKey(MediaContent, on_delete=models.CASCADE, related_name='related_links')
+    related = models.ForeignKey(MediaContent, on_delete=models.CASCADE, related_name='related_to')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    
+    class Meta:
+        ordering = ['content', 'rank']
+        # Also the index /api/content/{id}/related/ reads
+        unique_together = ['content', 'rank']
+        verbose_name = "Related Content"
+        verbose_name_plural = "Related Content"
+    
+    def __str__(self):
+        return f"{self.content_id} -> {self.related_id} ({self.score:.3f})"
 
 
 class ContentRating(models.Model):
@@ -193,7 +384,8 @@ class ContentView(models.Model):
     content = models.ForeignKey(MediaContent, on_delete=models.CASCADE, related_name='views')
     user_ip = models.GenericIPAddressField()
     user_agent = models.TextField(blank=True)
-    viewed_at = models.DateTimeField(auto_now_add=True)
+    # Set when the view happens, not when the batched insert runs
+    viewed_at = models.DateTimeField(default=timezone.now, editable=False)
     
     class Meta:
         verbose_name = "Content View"
@@ -204,3 +396,106 @@ class ContentView(models.Model):
     
     def __str__(self):
         return f"{self.content.title} viewed at {self.viewed_at}"
+
+
+class SearchTerm(models.Model):
+    """
+    Portable inverted index used for search when SQLite FTS5 is unavailable
+    """
+    content = models.ForeignKey(MediaContent, on_delete=models.CASCADE, related_name='search_terms')
+    term = models.CharField(max_length=64)
+    weight = models.FloatField(help_text="Field-weighted, saturated term frequency")
+    
+    class Meta:
+        unique_together = ['content', 'term']
+        verbose_name = "Search Term"
+        verbose_name_plural = "Search Terms"
+        indexes = [
+            models.Index(fields=['term', 'content']),
+        ]
+    
+    def __str__(self):
+        return f"{self.term} -> {self.content_id}"
+
+
+class ContentViewRollup(models.Model):
+    """
+    Hourly and daily view aggregates folded from raw ContentView rows
+    """
+    GRANULARITIES = [
+        ('hour', 'Hourly'),
+        ('day', 'Daily'),
+    ]
+    
+    content = models.ForeignKey(MediaContent, on_delete=models.CASCADE, related_name='view_rollups')
+    category = models.ForeignKey(HealthCategory, on_delete=models.CASCADE, related_name='view_rollups')
+    granularity = models.CharField(max_length=4, choices=GRANULARITIES)
+    period_start = models.DateTimeField()
+    views = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['content', 'granularity', 'period_start']
+        verbose_name = "Content View Rollup"
+        verbose_name_plural = "Content View Rollups"
+        indexes = [
+            models.Index(fields=['granularity', 'period_start']),
+            models.Index(fields=['category', 'granularity', 'period_start']),
+        ]
+    
+    def __str__(self):
+        return f"{self.content_id} {self.granularity} {self.period_start}: {self.views}"
+
+
+class RollupWatermark(models.Model):
+    """
+    Highest ContentView id already folded into the rollups, per job
+    """
+    name = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} @ {self.last_id}"
+
+
+class Tombstone(models.Model):
+    """
+    Marker left when a category or content item is deleted or deactivated,
+    so sync clients learn to drop it. Reactivating the object removes it.
+    """
+    OBJECT_TYPES = [
+        ('category', 'Health Category'),
+        ('content', 'Media Content'),
+    ]
+    
+    REASONS = [
+        ('deleted', 'Deleted'),
+        ('deactivated', 'Deactivated'),
+    ]
+    
+    object_type = models.CharField(max_length=10, choices=OBJECT_TYPES)
+    object_id = models.BigIntegerField()
+    reason = models.CharField(max_length=11, choices=REASONS)
+    removed_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        unique_together = ['object_type', 'object_id']
+        verbose_name = "Tombstone"
+        verbose_name_plural = "Tombstones"
+        indexes = [
+            models.Index(fields=['removed_at', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.object_type} {self.object_id} {self.reason}"
+    
+    @classmethod
+    def record(cls, object_type, object_id, reason):
+        cls.objects.update_or_create(
+            object_type=object_type, object_id=object_id,
+            defaults={'reason': reason, 'removed_at': timezone.now()},
+        )
+    
+    @classmethod
+    def clear(cls, object_type, object_id):
+        cls.objects.filter(object_type=object_type, object_id=object_id).delete()
@@ -0,0 +1,164 @@
+"""
+Pagination for the content API
+
+KeysetPagination pages through a queryset ordered descending on a tuple of
+fields ending in the primary key, e.g. (published_date, id). The cursor
+holds the key of the last row seen, so every page is an index range scan
+of page_size rows however deep the client scrolls. The total count is
+included by default and can be skipped with ?count=false.
+
+ContentPagination keeps the page-number behaviour by default and switches
+to keyset pagination when the client sends ?pagination=cursor or a cursor.
+"""
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def keyset_condition(fields, values, reverse=False):
+    """Rows strictly after `values` in descending (fields) order"""
+    lookup = 'gt' if reverse else 'lt'
+    condition = Q()
+    for index, field in enumerate(fields):
+        step = Q(**{f'{field}__{lookup}': values[index]})
+        for equal_field, equal_value in zip(fields[:index], values[:index]):
+            step &= Q(**{equal_field: equal_value})
+        condition |= step
+    return condition
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on a descending tuple of fields
+    """
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, fields=('published_date', 'id')):
+        self.fields = tuple(fields)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, instance, reverse=False):
+        # Rows may be model instances or values() dicts
+        if isinstance(instance, dict):
+            values = [instance[field] for field in self.fields]
+        else:
+            values = [getattr(instance, field) for field in self.fields]
+        payload = json.dumps({'k': values, 'r': reverse}, default=lambda value: value.isoformat())
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            values = [
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields, payload['k'])
+            ]
+            if len(values) != len(self.fields):
+                raise ValueError
+            return values, bool(payload.get('r'))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if 'ordering' in request.query_params:
+            raise ValidationError({'ordering': 'Not supported with cursor pagination'})
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        self.include_count = request.query_params.get(self.count_query_param, '').lower() not in ('false', '0')
+        self.count = queryset.count() if self.include_count else None
+
+        key, reverse = self.decode_cursor(request, queryset.model)
+        ordering = [f'-{field}' for field in self.fields]
+        if reverse:
+            ordering = [field for field in self.fields]
+        if key is not None:
+            queryset = queryset.filter(keyset_condition(self.fields, key, reverse))
+
+        rows = list(queryset.order_by(*ordering)[:self.page_size_value + 1])
+        has_more = len(rows) > self.page_size_value
+        rows = rows[:self.page_size_value]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, key is not None
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        url = self.request.build_absolute_uri()
+        if not self.page:
+            return remove_query_param(url, self.cursor_query_param)
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.page[0], reverse=True)
+        )
+
+    def get_paginated_response(self, data):
+        body = OrderedDict()
+        if self.include_count:
+            body['count'] = self.count
+        body['next'] = self.get_next_link()
+        body['previous'] = self.get_previous_link()
+        body['results'] = data
+        return Response(body)
+
+
+class ContentPagination(PageNumberPagination):
+    """
+    Page numbers by default; keyset cursors on ?pagination=cursor or ?cursor=
+
+    The view provides the key through get_keyset_fields(); returning None
+    (e.g. for relevance-ranked search) keeps page numbers.
+    """
+    keyset = None
+
+    def wants_cursor(self, request):
+        return (
+            request.query_params.get('pagination') == 'cursor'
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        fields = view.get_keyset_fields() if view is not None and hasattr(view, 'get_keyset_fields') else None
+        if fields and self.wants_cursor(request):
+            self.keyset = KeysetPagination(fields)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
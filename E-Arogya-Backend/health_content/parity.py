@@ -0,0 +1,69 @@
+"""
+Parity between the fast content list path and the DRF one
+
+MediaContentValuesSerializer + ORJSONRenderer must render byte-for-byte
+what MediaContentListSerializer + JSONRenderer render. EDGE_CASES are rows
+exercising thumbnails, tag parsing, escaping and non-ASCII text;
+compare_list_output() returns a description of every difference, used by
+the check_serializer_parity command and the test suite.
+"""
+from rest_framework.renderers import JSONRenderer
+
+from .models import MediaContent
+from .querysets import CONTENT_LIST_PLAN
+from .renderers import ORJSONRenderer
+from .serializers import MediaContentListSerializer, MediaContentValuesSerializer
+
+
+EDGE_CASES = [
+    {'url': 'https://www.youtube.com/watch?v=abcdefghijk&t=42', 'thumbnail_url': '', 'tags': ' a, ,b ,'},
+    {'url': 'https://youtu.be/abcdefghijk?si=x', 'thumbnail_url': '', 'tags': ''},
+    {'url': 'https://example.org/a', 'thumbnail_url': 'https://example.org/t.png', 'tags': 'स्वास्थ्य,😀'},
+    {'url': 'https://example.org/b', 'thumbnail_url': '', 'tags': 'x',
+     'title': 'Line\u2028sep\u2029 "quoted" \\ \t\x01\x7f', 'duration': '1:00'},
+]
+
+
+def create_edge_cases(category):
+    """Create the EDGE_CASES rows in `category`"""
+    rows = []
+    for index, fields in enumerate(EDGE_CASES):
+        defaults = {
+            'title': f'Parity check {index}', 'description': 'Parity check row',
+            'content_type': 'video', 'author': 'check', 'source': 'check',
+        }
+        rows.append(MediaContent.objects.create(category=category, **{**defaults, **fields}))
+    return rows
+
+
+def first_difference(left, right):
+    for index, (a, b) in enumerate(zip(left, right)):
+        if a != b:
+            return index
+    return min(len(left), len(right))
+
+
+def compare_list_output(queryset, label):
+    """Render `queryset` both ways; return (failures, rows, bytes compared)"""
+    expected_data = MediaContentListSerializer(CONTENT_LIST_PLAN.apply(queryset), many=True).data
+    fast_data = MediaContentValuesSerializer(MediaContentValuesSerializer.values_queryset(queryset)).data
+    
+    failures = []
+    for expected, fast in zip(expected_data, fast_data):
+        if list(expected.items()) != list(fast.items()):
+            failures.append(f"[{label}] row {expected['id']}: {dict(expected)} != {fast}")
+    if len(expected_data) != len(fast_data):
+        failures.append(f"[{label}] {len(expected_data)} rows != {len(fast_data)} rows")
+    
+    expected_bytes = JSONRenderer().render(expected_data)
+    for name, rendered in [
+        ('ORJSONRenderer(DRF data)', ORJSONRenderer().render(expected_data)),
+        ('ORJSONRenderer(fast data)', ORJSONRenderer().render(fast_data)),
+    ]:
+        if rendered != expected_bytes:
+            at = first_difference(rendered, expected_bytes)
+            failures.append(
+                f"[{label}] {name} differs at byte {at}: "
+                f"{rendered[at - 40:at + 40]!r} != {expected_bytes[at - 40:at + 40]!r}"
+            )
+    return failures, len(fast_data), len(expected_bytes)
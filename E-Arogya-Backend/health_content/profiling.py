@@ -0,0 +1,282 @@
+"""
+Opt-in per-request profiling
+
+ProfilingMiddleware (enabled with PROFILING_ENABLED) splits the time of
+every request into database, serialization, rendering and remaining view
+time, counts queries and flags statements executed more than once. Each
+response gets a Server-Timing header, e.g.
+
+    Server-Timing: db;dur=4.1;desc="6 queries, 1 duplicate", serialize;dur=2.3,
+                   render;dur=0.4, view;dur=1.2, total;dur=8.0
+
+and samples are kept in a rolling window per endpoint, served by
+/api/profiling/stats/. Requests to PROFILING_CPROFILE_PATHS are also run
+under cProfile at PROFILING_CPROFILE_SAMPLE_RATE and dumped as .prof files.
+
+Database time comes from connection execute wrappers. Serialization and
+rendering time come from hooks on the DRF serializer `data` properties and
+the configured renderers, installed when the middleware starts; queries
+run while serializing count as database time, not serialization.
+"""
+import cProfile
+import logging
+import math
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.serializers import ListSerializer, Serializer
+from rest_framework.settings import api_settings
+
+from .conf import get_setting
+from .serializers import MediaContentValuesSerializer
+
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_hooks_lock = threading.Lock()
+_cprofile_lock = threading.Lock()
+
+# Requests to these paths are not profiled (the stats endpoint itself)
+EXCLUDED_PATHS = ('/api/profiling/',)
+SEGMENTS = ('db', 'serialize', 'render', 'view')
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class RequestProfile:
+    """
+    Timings and executed statements of one request
+    """
+
+    def __init__(self):
+        self.db_time = 0.0
+        self.statements = Counter()
+        self.spans = defaultdict(float)
+        self._span_db = defaultdict(float)
+        self._active = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        """Connection execute wrapper"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.statements[(sql, None if many else repr(params))] += 1
+
+    @property
+    def query_count(self):
+        return sum(self.statements.values())
+
+    @property
+    def duplicates(self):
+        """Executions of a statement already run with the same parameters"""
+        return sum(count - 1 for count in self.statements.values() if count > 1)
+
+    def duplicated_statements(self):
+        return [(sql, count) for (sql, _), count in self.statements.most_common() if count > 1]
+
+    def segments(self, total):
+        """{segment: seconds} without overlap; 'view' is whatever remains"""
+        serialize = self.spans['serialize'] - self._span_db['serialize']
+        render = self.spans['render'] - self._span_db['render']
+        return {
+            'db': self.db_time,
+            'serialize': serialize,
+            'render': render,
+            'view': max(total - self.db_time - serialize - render, 0.0),
+        }
+
+
+@contextmanager
+def span(name):
+    """Attribute the enclosed time to `name` in the current request profile"""
+    profile = getattr(_local, 'profile', None)
+    if profile is None or name in profile._active:
+        yield
+        return
+    profile._active.add(name)
+    db_before = profile.db_time
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.spans[name] += time.perf_counter() - started
+        profile._span_db[name] += profile.db_time - db_before
+        profile._active.discard(name)
+
+
+def _timed_property(prop, name):
+    def fget(self):
+        with span(name):
+            return prop.fget(self)
+    fget.profiling_original = prop
+    return property(fget, doc=prop.__doc__)
+
+
+def _timed_method(method, name):
+    def timed(self, *args, **kwargs):
+        with span(name):
+            return method(self, *args, **kwargs)
+    timed.profiling_original = method
+    return timed
+
+
+def install_hooks():
+    """Time serializer .data and renderer .render calls; safe to call twice"""
+    with _hooks_lock:
+        for cls in (Serializer, ListSerializer, MediaContentValuesSerializer):
+            prop = cls.__dict__.get('data')
+            if prop is not None and not hasattr(prop.fget, 'profiling_original'):
+                cls.data = _timed_property(prop, 'serialize')
+        for cls in api_settings.DEFAULT_RENDERER_CLASSES:
+            method = cls.__dict__.get('render')
+            if method is not None and not hasattr(method, 'profiling_original'):
+                cls.render = _timed_method(method, 'render')
+
+
+class ProfileStats:
+    """
+    Rolling window of request samples per endpoint
+    """
+
+    def __init__(self, window=None):
+        self._window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, total, segments, queries, duplicates):
+        sample = (total, segments['db'], segments['serialize'], segments['render'],
+                  segments['view'], queries, duplicates)
+        with self._lock:
+            samples = self._samples.get(endpoint)
+            if samples is None:
+                samples = self._samples[endpoint] = deque(maxlen=self._window or get_setting('PROFILING_WINDOW'))
+            samples.append(sample)
+
+    def snapshot(self):
+        """Latency percentiles and mean segment times (ms) per endpoint"""
+        with self._lock:
+            samples = {endpoint: list(rows) for endpoint, rows in self._samples.items()}
+        result = {}
+        for endpoint, rows in sorted(samples.items()):
+            count = len(rows)
+            totals = sorted(row[0] for row in rows)
+            stats = {'count': count}
+            for percent in (50, 95, 99):
+                stats[f'p{percent}_ms'] = round(percentile(totals, percent) * 1000, 3)
+            for index, segment in enumerate(SEGMENTS, 1):
+                stats[f'{segment}_ms'] = round(sum(row[index] for row in rows) / count * 1000, 3)
+            stats['queries'] = round(sum(row[5] for row in rows) / count, 2)
+            stats['duplicate_query_requests'] = sum(1 for row in rows if row[6])
+            result[endpoint] = stats
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+
+profile_stats = ProfileStats()
+
+
+def server_timing(segments, total, queries, duplicates):
+    """Server-Timing header value for a profiled request"""
+    description = f"{queries} {'query' if queries == 1 else 'queries'}"
+    if duplicates:
+        description += f", {duplicates} duplicate{'' if duplicates == 1 else 's'}"
+    parts = [f'db;dur={segments["db"] * 1000:.2f};desc="{description}"']
+    parts += [f'{name};dur={segments[name] * 1000:.2f}' for name in SEGMENTS[1:]]
+    parts.append(f'total;dur={total * 1000:.2f}')
+    return ', '.join(parts)
+
+
+def _cprofile_dir():
+    return get_setting('PROFILING_CPROFILE_DIR') or os.path.join(settings.BASE_DIR, 'profiles')
+
+
+def _should_cprofile(path):
+    prefixes = get_setting('PROFILING_CPROFILE_PATHS')
+    return (
+        any(path.startswith(prefix) for prefix in prefixes)
+        and random.random() < get_setting('PROFILING_CPROFILE_SAMPLE_RATE')
+    )
+
+
+def _dump_cprofile(profiler, request):
+    directory = _cprofile_dir()
+    os.makedirs(directory, exist_ok=True)
+    name = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-') or 'root'
+    path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{os.getpid()}-{time.monotonic_ns()}.prof")
+    profiler.dump_stats(path)
+    return path
+
+
+class ProfilingMiddleware:
+    """
+    Records per-request timings; add it first in MIDDLEWARE so the total
+    covers the other middleware too
+    """
+
+    def __init__(self, get_response):
+        if not get_setting('PROFILING_ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        install_hooks()
+
+    def __call__(self, request):
+        if request.path.startswith(EXCLUDED_PATHS):
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        profiler = None
+        if _should_cprofile(request.path) and _cprofile_lock.acquire(blocking=False):
+            profiler = cProfile.Profile()
+
+        _local.profile = profile
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+        finally:
+            total = time.perf_counter() - started
+            _local.profile = None
+            if profiler is not None:
+                try:
+                    _dump_cprofile(profiler, request)
+                finally:
+                    _cprofile_lock.release()
+
+        segments = profile.segments(total)
+        queries, duplicates = profile.query_count, profile.duplicates
+        match = getattr(request, 'resolver_match', None)
+        endpoint = f"{request.method} {match.view_name if match else request.path}"
+        profile_stats.record(endpoint, total, segments, queries, duplicates)
+        if duplicates:
+            sql, count = profile.duplicated_statements()[0]
+            logger.warning("%s ran %d duplicate queries, e.g. %dx: %s", endpoint, duplicates, count, sql)
+        response['Server-Timing'] = server_timing(segments, total, queries, duplicates)
+        return response
@@ -0,0 +1,77 @@
+"""
+Query budgets for the health_content API
+
+assert_max_queries() is a context manager for tests that fails when a block
+runs more SQL than allowed. ENDPOINT_BUDGETS lists the budget of every
+router endpoint; the check_query_budgets management command replays them
+against the current database and exits non-zero if any endpoint is over.
+Budgets do not depend on the number of rows, so a regression to one query
+per item shows up as soon as a page has more than a couple of items.
+"""
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def assert_max_queries(limit, using=DEFAULT_DB_ALIAS, label='block'):
+    """Fail if the block executes more than `limit` queries"""
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    if len(context) > limit:
+        statements = '\n'.join(
+            f"{index}. {query['sql']}" for index, query in enumerate(context.captured_queries, 1)
+        )
+        raise QueryBudgetExceeded(
+            f"{label} ran {len(context)} queries, budget is {limit}:\n{statements}"
+        )
+
+
+# App settings for the worst case of a single request: no response cache,
+# views ingested synchronously and counters written through. Reads stay on
+# the default database, where queries are counted.
+WORST_CASE_SETTINGS = {
+    'RESPONSE_CACHE_ENABLED': False,
+    'VIEW_INGEST_MODE': 'sync',
+    'COUNTER_BUFFERING': False,
+    'REPLICA_READS': False,
+}
+
+
+# (method, path, budget); {content_id} and {category_slug} are filled in
+# with an existing active content item and category. Budgets assume
+# WORST_CASE_SETTINGS and are deliberately the exact measured count, with
+# no margin: any new query fails the check, and whoever adds it lowers or
+# raises the number here in the same change, where review sees it.
+ENDPOINT_BUDGETS = [
+    ('get', '/api/categories/', 3),
+    ('get', '/api/categories/{category_slug}/', 5),
+    ('get', '/api/categories/{category_slug}/content/', 6),
+    ('get', '/api/categories/featured/', 4),
+    ('get', '/api/content/', 4),
+    ('get', '/api/content/?content_type=video&ordering=-view_count', 4),
+    ('get', '/api/content/{content_id}/', 3),
+    ('get', '/api/content/{content_id}/related/', 2),
+    ('get', '/api/content/featured/', 3),
+    ('get', '/api/content/popular/', 2),
+    ('get', '/api/content/recent/', 3),
+    ('get', '/api/content/trending/', 2),
+    ('get', '/api/content/trending/?category={category_slug}', 2),
+    ('get', '/api/categories/{category_slug}/trending/', 3),
+    ('get', '/api/content/search/?q=health', 4),
+    ('get', '/api/content/stats/', 2),
+    ('get', '/api/content/tags/', 2),
+    # one grouped query more per active filter (counted without that filter)
+    ('get', '/api/content/facets/?content_type=video', 4),
+    ('get', '/api/content/?tag=first aid', 4),
+    ('get', '/api/ratings/', 2),
+    ('get', '/api/sync/', 5),
+    ('post', '/api/content/{content_id}/increment_view/', 4),
+    ('post', '/api/content/{content_id}/like/', 3),
+    ('post', '/api/content/{content_id}/share/', 3),
+]
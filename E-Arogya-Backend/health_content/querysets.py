@@ -0,0 +1,103 @@
+"""
+Per-action queryset shaping for the content viewsets
+
+Each viewset declares a QuerysetPlan per action saying which relations to
+join (select_related), which to prefetch and which columns to load (only).
+The plans are the single place to look when an endpoint starts issuing one
+query per row; query budgets in querybudget.py keep them honest.
+"""
+from django.db.models import Prefetch
+
+from .conf import get_setting
+from .models import MediaContent
+from .tags import tag_links_prefetch
+
+
+# Columns read by MediaContentListSerializer and SearchResultSerializer
+# (tag_list comes from the prefetched tag index, not the tags column)
+LIST_FIELDS = (
+    'id', 'title', 'slug', 'description', 'content_type', 'url',
+    'thumbnail_url', 'author', 'source', 'duration', 'difficulty_level',
+    'target_age_group', 'is_featured', 'view_count', 'like_count',
+    'published_date', 'created_at',
+    'category__name', 'category__slug',
+)
+
+
+class QuerysetPlan:
+    """
+    select_related / prefetch_related / only() settings for one action
+    """
+
+    def __init__(self, select_related=(), prefetch_related=(), only=()):
+        self.select_related = tuple(select_related)
+        self.prefetch_related = tuple(prefetch_related)
+        self.only = tuple(only)
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        if self.only:
+            queryset = queryset.only(*self.only)
+        return queryset
+
+
+class QuerysetPlanMixin:
+    """
+    Apply queryset_plans[self.action] in get_queryset
+    """
+    queryset_plans = {}
+
+    def get_queryset_plan(self):
+        return self.queryset_plans.get(self.action)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        plan = self.get_queryset_plan()
+        if plan is not None:
+            queryset = plan.apply(queryset)
+        return queryset
+
+
+CONTENT_LIST_PLAN = QuerysetPlan(
+    select_related=['category'], prefetch_related=[tag_links_prefetch()], only=LIST_FIELDS
+)
+# Search results carry no tags
+CONTENT_SEARCH_PLAN = QuerysetPlan(select_related=['category'], only=LIST_FIELDS)
+CONTENT_DETAIL_PLAN = QuerysetPlan(select_related=['category'], prefetch_related=[tag_links_prefetch()])
+# increment_view/like/share only need the primary key of the object
+ENGAGEMENT_PLAN = QuerysetPlan(only=['id'])
+
+
+# Attribute holding the prefetched preview list (sliced prefetches need to_attr)
+PREVIEW_ATTR = 'preview_content'
+
+
+class CategoryPreviewPlan(QuerysetPlan):
+    """
+    Prefetch the top CATEGORY_CONTENT_PREVIEW_LIMIT active items of every
+    category (featured first, then newest). The sliced Prefetch runs as a
+    single ROW_NUMBER() window query, so the payload stays bounded however
+    large a category grows.
+    """
+
+    def apply(self, queryset):
+        return super().apply(queryset).prefetch_related(
+            Prefetch('media_content', queryset=category_preview_queryset(), to_attr=PREVIEW_ATTR)
+        )
+
+
+def category_feed_queryset():
+    """Active content in category feed order, shaped for list serializers"""
+    return CONTENT_LIST_PLAN.apply(
+        MediaContent.objects.filter(is_active=True)
+    ).order_by('-is_featured', '-published_date', '-id')
+
+
+def category_preview_queryset():
+    return category_feed_queryset()[:get_setting('CATEGORY_CONTENT_PREVIEW_LIMIT')]
+
+
+CATEGORY_WITH_CONTENT_PLAN = CategoryPreviewPlan()
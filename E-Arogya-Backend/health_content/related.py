@@ -0,0 +1,216 @@
+"""
+Precomputed "related content" from TF-IDF text similarity
+
+Every active content item is turned into an L2-normalized TF-IDF vector
+over its title, description and tags (weighted like search, see
+SEARCH_WEIGHTS), and its RELATED_CONTENT_LIMIT most cosine-similar items
+are stored as RelatedContent rows, so serving them is one indexed lookup.
+
+Similarities are sparse dot products. With SciPy installed (the optional
+requirements-related.txt) the vectors are multiplied as a CSR matrix in
+blocks; otherwise an inverted index only compares items that share a term.
+SIMILARITY_BACKEND names the one in use, and every run logs it.
+
+An incremental run recomputes the neighbours of items whose text changed
+(tracked with MediaContent.related_signature), of items that listed a
+changed or removed item, and of items a changed item now beats; the rest
+keep their rows. Document frequencies drift as the catalog grows, so run
+with full=True now and then to rescore everything.
+"""
+import hashlib
+import heapq
+import logging
+import math
+from collections import Counter, defaultdict
+
+from django.db import transaction
+
+from .conf import get_setting
+from .models import MediaContent, RelatedContent
+from .search import SEARCH_FIELDS, tokenize
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+logger = logging.getLogger(__name__)
+
+SIMILARITY_BACKEND = 'python' if sparse is None else 'scipy'
+
+
+# Rows of the similarity matrix multiplied at once by the SciPy backend
+BLOCK_SIZE = 256
+# Similarities below this are rounding noise, not shared terms
+MIN_SIMILARITY = 1e-9
+
+
+def text_signature(title, description, tags):
+    """Fingerprint of the text a content item's vector is built from"""
+    text = '\x1f'.join(value or '' for value in (title, description, tags))
+    return hashlib.md5(text.encode()).hexdigest()
+
+
+def term_frequencies(title, description, tags):
+    """{term: field-weighted frequency} for one document"""
+    counts = Counter()
+    for text, weight in zip((title, description, tags), get_setting('SEARCH_WEIGHTS')):
+        for term in tokenize(text):
+            counts[term] += weight
+    return counts
+
+
+def tfidf_vectors(documents):
+    """L2-normalized {term: weight} vectors for a list of term frequencies"""
+    document_frequency = Counter()
+    for counts in documents:
+        document_frequency.update(counts.keys())
+    total = len(documents)
+    idf = {term: math.log((1 + total) / (1 + df)) + 1 for term, df in document_frequency.items()}
+
+    vectors = []
+    for counts in documents:
+        vector = {term: math.log1p(tf) * idf[term] for term, tf in counts.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        vectors.append({term: weight / norm for term, weight in vector.items()} if norm else {})
+    return vectors
+
+
+def _python_similarities(vectors, targets):
+    """Yield (target, {other: cosine}) through an inverted index"""
+    postings = defaultdict(list)
+    for index, vector in enumerate(vectors):
+        for term, weight in vector.items():
+            postings[term].append((index, weight))
+    for target in targets:
+        scores = defaultdict(float)
+        for term, weight in vectors[target].items():
+            for other, other_weight in postings[term]:
+                scores[other] += weight * other_weight
+        yield target, scores
+
+
+def _scipy_similarities(vectors, targets):
+    """Yield (target, {other: cosine}) from sparse matrix products"""
+    vocabulary = {}
+    rows, columns, data = [], [], []
+    for index, vector in enumerate(vectors):
+        for term, weight in vector.items():
+            rows.append(index)
+            columns.append(vocabulary.setdefault(term, len(vocabulary)))
+            data.append(weight)
+    matrix = sparse.csr_matrix((data, (rows, columns)), shape=(len(vectors), max(len(vocabulary), 1)))
+    transposed = matrix.T.tocsc()
+
+    targets = list(targets)
+    for start in range(0, len(targets), BLOCK_SIZE):
+        block = targets[start:start + BLOCK_SIZE]
+        products = (matrix[block] @ transposed).tocsr()
+        for row, target in enumerate(block):
+            begin, end = products.indptr[row], products.indptr[row + 1]
+            yield target, dict(zip(products.indices[begin:end].tolist(), products.data[begin:end].tolist()))
+
+
+def similarities(vectors, targets):
+    """Yield (target index, {other index: cosine similarity}) per target"""
+    if sparse is not None:
+        return _scipy_similarities(vectors, targets)
+    return _python_similarities(vectors, targets)
+
+
+def top_neighbours(scores, target, ids, limit):
+    """[(score, id)] of the best `limit` non-zero neighbours, ties by id"""
+    best = heapq.nsmallest(
+        limit,
+        ((-score, ids[other]) for other, score in scores.items() if other != target and score > MIN_SIMILARITY),
+    )
+    return [(-score, pk) for score, pk in best]
+
+
+def _current_lists():
+    """{content_id: (lowest stored score, count, {related ids})}"""
+    lists = {}
+    rows = RelatedContent.objects.order_by().values_list('content_id', 'related_id', 'score')
+    for content_id, related_id, score in rows.iterator():
+        lowest, count, related = lists.get(content_id, (score, 0, set()))
+        related.add(related_id)
+        lists[content_id] = (min(lowest, score), count + 1, related)
+    return lists
+
+
+def compute_related_content(full=False, limit=None):
+    """
+    Recompute stored neighbours; only items affected by text changes unless
+    full is set. Returns the number of items whose neighbours were rewritten.
+    """
+    limit = limit or get_setting('RELATED_CONTENT_LIMIT')
+    rows = list(
+        MediaContent.objects.filter(is_active=True).order_by('pk').values_list(
+            'pk', *SEARCH_FIELDS, 'related_signature'
+        )
+    )
+    ids = [row[0] for row in rows]
+    signatures = [text_signature(*row[1:4]) for row in rows]
+    changed = [index for index, row in enumerate(rows) if full or row[4] != signatures[index]]
+    removed = set(
+        MediaContent.objects.filter(is_active=False).exclude(related_signature='').values_list('pk', flat=True)
+    )
+    if not changed and not removed:
+        return 0
+
+    logger.info(
+        "Computing related content (%s, %d changed of %d items) with the %s similarity backend",
+        'full' if full else 'incremental', len(changed), len(rows), SIMILARITY_BACKEND,
+    )
+    vectors = tfidf_vectors([term_frequencies(*row[1:4]) for row in rows])
+    if full:
+        targets = set(changed)
+        neighbours = {}
+    else:
+        # Items that listed a changed or removed item, or that a changed item now beats
+        current = _current_lists()
+        changed_ids = {ids[index] for index in changed}
+        targets = set(changed)
+        targets.update(
+            index for index, pk in enumerate(ids)
+            if pk in current and current[pk][2] & (changed_ids | removed)
+        )
+        neighbours = {}
+        for target, scores in similarities(vectors, changed):
+            neighbours[target] = top_neighbours(scores, target, ids, limit)
+            for other, score in scores.items():
+                if other == target or other in targets or score <= MIN_SIMILARITY:
+                    continue
+                lowest, count, _ = current.get(ids[other], (0.0, 0, None))
+                if count < limit or score > lowest:
+                    targets.add(other)
+
+    pending = sorted(targets - neighbours.keys())
+    for target, scores in similarities(vectors, pending):
+        neighbours[target] = top_neighbours(scores, target, ids, limit)
+
+    with transaction.atomic():
+        if full:
+            RelatedContent.objects.all().delete()
+        else:
+            rewritten = [ids[index] for index in targets] + list(removed)
+            for start in range(0, len(rewritten), 500):
+                RelatedContent.objects.filter(content_id__in=rewritten[start:start + 500]).delete()
+        RelatedContent.objects.bulk_create([
+            RelatedContent(content_id=ids[target], related_id=pk, rank=rank, score=score)
+            for target in sorted(targets)
+            for rank, (score, pk) in enumerate(neighbours[target])
+        ], batch_size=500)
+
+        # Signatures are written with bulk_update so updated_at does not move
+        updates = [MediaContent(pk=ids[index], related_signature=signatures[index]) for index in changed]
+        updates += [MediaContent(pk=pk, related_signature='') for pk in removed]
+        MediaContent.objects.bulk_update(updates, ['related_signature'], batch_size=500)
+    return len(targets)
+
+
+def related_content_queryset(content_id):
+    """Active neighbours of a content item in rank order"""
+    return MediaContent.objects.filter(
+        related_to__content_id=content_id, is_active=True
+    ).order_by('related_to__rank')
@@ -0,0 +1,135 @@
+"""
+Read replica routing
+
+When DATABASES has a 'replica' alias, ReplicaRoutingMiddleware marks a
+request as replica-safe if it is a GET/HEAD of a viewset action listed in
+the viewset's `replica_actions` or an admin changelist, and ReplicaRouter
+then sends that request's reads of health_content models to the
+replica. Everything else, writes and management commands included, uses
+the default database.
+
+Read-your-writes: once a request writes, its remaining reads go to the
+default database, and a successful POST/PUT/PATCH/DELETE sets a cookie
+that keeps the client on the default database for REPLICA_STICKY_SECONDS,
+long enough for the replica to catch up with its like or rating.
+
+For local testing, point SQLITE_REPLICA_PATH at a second SQLite file and
+refresh it from the primary with `manage.py sync_replica`.
+"""
+import threading
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .conf import get_setting
+
+
+REPLICA_DATABASE = 'replica'
+# Only these apps' models are read from the replica; sessions and users
+# stay on the primary so a fresh login is seen at once
+REPLICA_APPS = ('health_content',)
+SAFE_METHODS = ('GET', 'HEAD')
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+_local = threading.local()
+
+
+def replica_configured():
+    return REPLICA_DATABASE in settings.DATABASES
+
+
+def reads_from_replica():
+    """True while the current request's reads are routed to the replica"""
+    return getattr(_local, 'use_replica', False)
+
+
+def _primary(hints):
+    # Objects loaded from the replica would otherwise be saved back to it
+    instance = hints.get('instance')
+    if instance is not None and instance._state.db == REPLICA_DATABASE:
+        return DEFAULT_DB_ALIAS
+    return None
+
+
+class ReplicaRouter:
+    """
+    Sends reads of replica-safe requests to the replica, everything else
+    to the default database
+    """
+
+    def db_for_read(self, model, **hints):
+        if reads_from_replica() and model._meta.app_label in REPLICA_APPS:
+            return REPLICA_DATABASE
+        return _primary(hints)
+
+    def db_for_write(self, model, **hints):
+        # The rest of the request reads what it wrote
+        _local.use_replica = False
+        return _primary(hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, REPLICA_DATABASE}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema from the primary
+        if db == REPLICA_DATABASE:
+            return False
+        return None
+
+
+def _replica_safe(request, view_func):
+    actions = getattr(view_func, 'actions', None)
+    if actions:
+        return actions.get(request.method.lower()) in getattr(view_func.cls, 'replica_actions', ())
+    match = request.resolver_match
+    return match.namespace == 'admin' and (match.url_name or '').endswith('_changelist')
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Decides per request whether reads may use the replica and pins clients
+    that just wrote to the default database
+    """
+
+    def __init__(self, get_response):
+        if not replica_configured():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _local.use_replica = False
+        try:
+            response = self.get_response(request)
+        finally:
+            _local.use_replica = False
+
+        if request.method in WRITE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                get_setting('REPLICA_STICKY_COOKIE'), '1',
+                max_age=get_setting('REPLICA_STICKY_SECONDS'), httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _local.use_replica = (
+            get_setting('REPLICA_READS')
+            and request.method in SAFE_METHODS
+            and get_setting('REPLICA_STICKY_COOKIE') not in request.COOKIES
+            and _replica_safe(request, view_func)
+        )
+
+
+def copy_to_replica(source=DEFAULT_DB_ALIAS, target=REPLICA_DATABASE):
+    """
+    Copy the primary SQLite database onto an SQLite replica with the online
+    backup API; a stand-in for replication when testing locally
+    """
+    source_connection, target_connection = connections[source], connections[target]
+    if source_connection.vendor != 'sqlite' or target_connection.vendor != 'sqlite':
+        raise ValueError("Only SQLite databases can be copied; use the server's replication otherwise")
+    source_connection.ensure_connection()
+    target_connection.ensure_connection()
+    source_connection.connection.backup(target_connection.connection)
@@ -0,0 +1,299 @@
+"""
+Full-text search index for media content
+
+Two interchangeable backends are provided:
+
+* Fts5SearchBackend keeps an SQLite FTS5 virtual table in sync and ranks
+  matches with bm25() inside the database.
+* InvertedIndexSearchBackend stores (term, content, weight) rows in the
+  SearchTerm table and works on any database Django supports. It ranks by
+  weighted term frequency: the field-weighted, saturated tf of BM25 without
+  its IDF and document-length factors, so rare terms and short documents
+  are not favoured and its order can differ from the FTS5 backend's.
+
+Both match whole words and word prefixes ("wash" finds "washing"), not
+arbitrary substrings: unlike the old icontains search, "wash" does not
+find "handwashing".
+
+Both return an object that can be handed straight to a paginator, so only
+the rows of the requested page are ever loaded into Python.
+"""
+import re
+from collections import Counter
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, router
+from django.db.models import F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .conf import get_setting
+
+
+FTS_TABLE = 'health_content_search'
+SEARCH_FIELDS = ('title', 'description', 'tags')
+MAX_QUERY_TERMS = 8
+MAX_TERM_LENGTH = 64
+
+# Term-frequency saturation of the portable index (BM25's k1)
+TF_SATURATION = 1.2
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    """Split text into lowercase search terms"""
+    return [token[:MAX_TERM_LENGTH] for token in TOKEN_RE.findall((text or '').lower())]
+
+
+def fts5_available(connection):
+    """Return True if the connection is SQLite compiled with FTS5"""
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if cursor.fetchone()[0]:
+            return True
+        # Some builds load FTS5 as a built-in extension without the flag
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+            cursor.execute("DROP TABLE temp.fts5_probe")
+        except Exception:
+            return False
+    return True
+
+
+def create_fts_table(connection):
+    """Create the FTS5 table used by Fts5SearchBackend"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "title, description, tags, "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+
+
+def drop_fts_table(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class RankedSearchResults:
+    """
+    Lazy, sliceable list of ranked FTS5 matches.
+
+    Slicing runs a LIMIT/OFFSET query against the index and then loads only
+    the matching MediaContent rows, with relevance_score attached.
+    """
+
+    def __init__(self, queryset, match, weights):
+        self.queryset = queryset
+        self.match = match
+        self.weights = weights
+        self._count = None
+
+    def _filter_sql(self):
+        inner = self.queryset.order_by().values('pk')
+        return inner.query.sql_with_params()
+
+    def count(self):
+        if self._count is None:
+            try:
+                inner_sql, inner_params = self._filter_sql()
+            except EmptyResultSet:
+                self._count = 0
+                return 0
+            sql = (
+                f"SELECT COUNT(*) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND +rowid IN ({inner_sql})"
+            )
+            with connections[self.queryset.db].cursor() as cursor:
+                cursor.execute(sql, [self.match, *inner_params])
+                self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return iter(self[:self.count()])
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        stop = key.stop if key.stop is not None else self.count()
+        if stop <= start or not self.count():
+            return []
+
+        inner_sql, inner_params = self._filter_sql()
+        weights = ', '.join('%s' for _ in self.weights)
+        # The unary + keeps SQLite from pushing the IN list into FTS5 as one
+        # rowid lookup per filtered row; it stays a filter on the matches
+        sql = (
+            f"SELECT rowid, bm25({FTS_TABLE}, {weights}) AS rank FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND +rowid IN ({inner_sql}) "
+            "ORDER BY rank, rowid DESC LIMIT %s OFFSET %s"
+        )
+        params = [*self.weights, self.match, *inner_params, stop - start, start]
+        with connections[self.queryset.db].cursor() as cursor:
+            cursor.execute(sql, params)
+            ranked = cursor.fetchall()
+
+        objects = self.queryset.in_bulk([pk for pk, _ in ranked])
+        results = []
+        for pk, rank in ranked:
+            item = objects.get(pk)
+            if item is not None:
+                # bm25() is negative, lower meaning more relevant
+                item.relevance_score = -rank
+                results.append(item)
+        return results
+
+
+class Fts5SearchBackend:
+    """
+    Search backed by an SQLite FTS5 virtual table
+    """
+    name = 'fts5'
+
+    def __init__(self, using='default'):
+        self.using = using
+
+    def _execute(self, sql, params):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(sql, params)
+
+    def index(self, instance):
+        self.index_rows([(instance.pk, instance.title, instance.description, instance.tags)])
+
+    def index_rows(self, rows):
+        """Index (pk, title, description, tags) rows, replacing existing entries"""
+        with connections[self.using].cursor() as cursor:
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO {FTS_TABLE}(rowid, title, description, tags) "
+                "VALUES (%s, %s, %s, %s)",
+                list(rows),
+            )
+
+    def remove(self, pk):
+        self._execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [pk])
+
+    def remove_queryset(self, queryset):
+        """Drop the entries of every row of a content queryset in one statement"""
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+        self._execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({sql})", params)
+
+    def rebuild(self, model):
+        self._execute(f"DELETE FROM {FTS_TABLE}", [])
+        rows = model._default_manager.using(self.using).values_list('pk', *SEARCH_FIELDS)
+        with connections[self.using].cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE}(rowid, title, description, tags) "
+                "VALUES (%s, %s, %s, %s)",
+                list(rows.iterator()),
+            )
+
+    def search(self, queryset, query):
+        terms = tokenize(query)[:MAX_QUERY_TERMS]
+        if not terms:
+            return queryset.none()
+        # Every term must match; the trailing * gives prefix search as you type
+        match = ' '.join(f'"{term}"*' for term in terms)
+        return RankedSearchResults(queryset, match, get_setting('SEARCH_WEIGHTS'))
+
+
+class InvertedIndexSearchBackend:
+    """
+    Portable search backed by the SearchTerm table, ranked by weighted
+    term frequency (not BM25)
+    """
+    name = 'index'
+
+    def __init__(self, using='default'):
+        self.using = using
+
+    @staticmethod
+    def build_terms(title, description, tags):
+        """Return {term: weighted, saturated term frequency} for one document"""
+        weights = get_setting('SEARCH_WEIGHTS')
+        scores = Counter()
+        for text, field_weight in zip((title, description, tags), weights):
+            for term, tf in Counter(tokenize(text)).items():
+                scores[term] += field_weight * tf * (TF_SATURATION + 1) / (tf + TF_SATURATION)
+        return scores
+
+    def _term_model(self, model=None):
+        if model is not None:
+            return model._meta.get_field('search_terms').related_model
+        from .models import SearchTerm
+        return SearchTerm
+
+    def _write(self, term_model, rows):
+        term_model._default_manager.using(self.using).bulk_create([
+            term_model(content_id=pk, term=term, weight=weight)
+            for pk, title, description, tags in rows
+            for term, weight in self.build_terms(title, description, tags).items()
+        ], batch_size=500)
+
+    def index(self, instance):
+        self.index_rows([(instance.pk, instance.title, instance.description, instance.tags)])
+
+    def index_rows(self, rows):
+        """Index (pk, title, description, tags) rows, replacing existing entries"""
+        rows = list(rows)
+        term_model = self._term_model()
+        term_model.objects.using(self.using).filter(content_id__in=[row[0] for row in rows]).delete()
+        self._write(term_model, rows)
+
+    def remove(self, pk):
+        self._term_model().objects.using(self.using).filter(content_id=pk).delete()
+
+    def remove_queryset(self, queryset):
+        """Drop the entries of every row of a content queryset in one statement"""
+        self._term_model().objects.using(self.using).filter(content__in=queryset.values('pk')).delete()
+
+    def rebuild(self, model):
+        term_model = self._term_model(model)
+        term_model._default_manager.using(self.using).all().delete()
+        rows = model._default_manager.using(self.using).values_list('pk', *SEARCH_FIELDS)
+        self._write(term_model, rows.iterator())
+
+    def search(self, queryset, query):
+        from .models import SearchTerm
+
+        terms = tokenize(query)[:MAX_QUERY_TERMS]
+        if not terms:
+            return queryset.none()
+
+        any_term = Q()
+        for term in terms:
+            queryset = queryset.filter(
+                pk__in=SearchTerm.objects.filter(term__startswith=term).values('content_id')
+            )
+            any_term |= Q(term__startswith=term)
+
+        score = SearchTerm.objects.filter(any_term, content=OuterRef('pk')).order_by().values(
+            'content'
+        ).annotate(score=Sum('weight')).values('score')
+        return queryset.annotate(
+            relevance_score=Coalesce(Subquery(score), Value(0.0))
+        ).order_by(F('relevance_score').desc(), '-published_date')
+
+
+_backends = {}
+
+
+def get_search_backend(using=None):
+    """Return the configured search backend for a database alias"""
+    if using is None:
+        from .models import MediaContent
+        using = router.db_for_write(MediaContent)
+    if using not in _backends:
+        choice = get_setting('SEARCH_BACKEND')
+        if choice == 'auto':
+            connection = connections[using]
+            has_table = FTS_TABLE in connection.introspection.table_names()
+            choice = 'fts5' if has_table else 'index'
+        backend_class = Fts5SearchBackend if choice == 'fts5' else InvertedIndexSearchBackend
+        _backends[using] = backend_class(using)
+    return _backends[using]
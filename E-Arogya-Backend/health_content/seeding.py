@@ -0,0 +1,182 @@
+"""
+Bulk, idempotent loading of categories and content from fixture files
+
+A fixture is a JSON (or, with PyYAML installed, YAML) document with a
+`categories` list and a `content` list. Categories are matched by name and
+content by title; content refers to its category by name or slug. Keys
+left out of a row keep the stored value (or the model default for new
+rows), so loading the same fixture twice changes nothing.
+
+Rows are compared with what is stored and only new or changed ones are
+written, with bulk_create(update_conflicts=True) in one transaction per
+batch. bulk_create skips save() and signals, so the side effects the
+signal handlers would have had (slugs, tag and search indexes, tombstones,
+category counters, cached responses) are applied per batch here.
+"""
+import json
+import os
+
+from django.db import transaction
+from django.utils.text import slugify
+
+from .cache import response_cache
+from .models import HealthCategory, MediaContent, Tombstone
+from .search import get_search_backend
+from .stats import invalidate_content_stats
+from .tags import index_tags
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+class FixtureError(ValueError):
+    pass
+
+
+def read_fixture(path):
+    """Parse a JSON or YAML fixture into {'categories': [...], 'content': [...]}"""
+    with open(path, encoding='utf-8') as handle:
+        if os.path.splitext(path)[1].lower() in ('.yaml', '.yml'):
+            if yaml is None:
+                raise FixtureError(f"{path}: install PyYAML to load YAML fixtures")
+            data = yaml.safe_load(handle)
+        else:
+            data = json.load(handle)
+    if not isinstance(data, dict):
+        raise FixtureError(f"{path}: expected a mapping with 'categories' and 'content'")
+    return {'categories': data.get('categories') or [], 'content': data.get('content') or []}
+
+
+def _fixture_fields(model):
+    """{name: field} of the columns a fixture may set"""
+    return {
+        field.name: field for field in model._meta.concrete_fields
+        if field.editable and not field.primary_key
+    }
+
+
+def _clean_rows(model, rows, key):
+    """Validate keys and convert values; the last row for a key wins"""
+    fields = _fixture_fields(model)
+    cleaned = {}
+    for position, row in enumerate(rows, 1):
+        unknown = set(row) - set(fields)
+        if unknown:
+            raise FixtureError(f"{model.__name__} row {position}: unknown fields {sorted(unknown)}")
+        if not row.get(key):
+            raise FixtureError(f"{model.__name__} row {position}: '{key}' is required")
+        values = {}
+        for name, value in row.items():
+            field = fields[name]
+            values[field.attname] = value if field.is_relation else field.to_python(value)
+        cleaned[values[key]] = values
+    return cleaned
+
+
+def _upsert(model, rows, key, slug_source):
+    """
+    Write new and changed rows; returns ({key: (old values or None, new values)}
+    of the written rows, number unchanged). Stored rows are matched on `key`
+    and then upserted on their primary key.
+    """
+    columns = sorted({name for values in rows.values() for name in values} | {'slug'})
+    existing = {
+        values[key]: values
+        for values in model.objects.filter(**{f'{key}__in': list(rows)}).order_by('-pk').values('pk', *columns)
+    }
+
+    written = {}
+    objects = []
+    for value, row in rows.items():
+        stored = existing.get(value)
+        merged = {**stored, **row} if stored else dict(row)
+        if not merged.get('slug'):
+            merged['slug'] = slugify(merged[slug_source])
+        if stored and all(merged[name] == stored[name] for name in columns):
+            continue
+        written[value] = (stored, merged)
+        objects.append(model(**merged))
+
+    if objects:
+        model.objects.bulk_create(
+            objects,
+            update_conflicts=True,
+            unique_fields=['pk'],
+            update_fields=columns + ['updated_at'],
+        )
+    return written, len(rows) - len(written)
+
+
+def load_categories(rows):
+    """Upsert categories by name; returns (created, updated, unchanged)"""
+    rows = _clean_rows(HealthCategory, rows, 'name')
+    with transaction.atomic():
+        written, unchanged = _upsert(HealthCategory, rows, 'name', 'name')
+    if written:
+        response_cache.clear()
+        invalidate_content_stats()
+    created = sum(1 for stored, _ in written.values() if stored is None)
+    return created, len(written) - created, unchanged
+
+
+def _category_lookup():
+    lookup = {}
+    for pk, name, slug in HealthCategory.objects.values_list('pk', 'name', 'slug'):
+        lookup[slug] = lookup[name] = pk
+    return lookup
+
+
+def _apply_side_effects(written):
+    """What the MediaContent save signals would have done for the written rows"""
+    # Index what is stored: rows may leave out tags or description
+    saved = MediaContent.objects.filter(title__in=list(written)).order_by('-pk')
+    indexed = {}
+    for row in saved.values_list('pk', 'title', 'description', 'tags'):
+        indexed[row[1]] = row
+    pks = {title: row[0] for title, row in indexed.items()}
+
+    index_tags([(pk, tags) for pk, _, _, tags in indexed.values()])
+    get_search_backend().index_rows(indexed.values())
+    for title, (stored, merged) in written.items():
+        was_active = stored.get('is_active', True) if stored else True
+        is_active = merged.get('is_active', True)
+        if was_active and not is_active:
+            Tombstone.record('content', pks[title], 'deactivated')
+        elif is_active and not was_active:
+            Tombstone.clear('content', pks[title])
+
+    category_ids = set()
+    for stored, merged in written.values():
+        category_ids.add(merged['category_id'])
+        if stored:
+            category_ids.add(stored['category_id'])
+    return category_ids
+
+
+def load_content(rows, batch_size=1000):
+    """Upsert content by title in batches; returns (created, updated, unchanged)"""
+    categories = _category_lookup()
+    for row in rows:
+        if row.get('category') not in categories:
+            raise FixtureError(f"Content '{row.get('title')}': unknown category {row.get('category')!r}")
+    rows = _clean_rows(MediaContent, [{**row, 'category': categories[row['category']]} for row in rows], 'title')
+
+    created = updated = unchanged = 0
+    category_ids = set()
+    titles = list(rows)
+    for start in range(0, len(titles), batch_size):
+        batch = {title: rows[title] for title in titles[start:start + batch_size]}
+        with transaction.atomic():
+            written, skipped = _upsert(MediaContent, batch, 'title', 'title')
+            if written:
+                category_ids |= _apply_side_effects(written)
+        new = sum(1 for stored, _ in written.values() if stored is None)
+        created, updated, unchanged = created + new, updated + len(written) - new, unchanged + skipped
+
+    if category_ids:
+        HealthCategory.refresh_content_counts(category_ids)
+        response_cache.clear()
+        invalidate_content_stats()
+    return created, updated, unchanged
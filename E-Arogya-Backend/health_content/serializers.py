@@ -2,10 +2,26 @@
 Serializers for E-Arogya Health Content API
 """
 from rest_framework import serializers
-from .models import HealthCategory, MediaContent, ContentRating, ContentView
+from .models import HealthCategory, MediaContent, ContentRating, ContentView, resolve_thumbnail_url
+from .querysets import PREVIEW_ATTR, category_feed_queryset
+from .conf import get_setting
+from .counters import engagement_counters
+from .tags import tag_lists_for
 
 
-class MediaContentListSerializer(serializers.ModelSerializer):
+class PendingCountsMixin:
+    """
+    Adds the engagement counter deltas not yet flushed to the database, so
+    every endpoint shows the same view/like/share counts for an item
+    """
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        engagement_counters.overlay([data])
+        return data
+
+
+class MediaContentListSerializer(PendingCountsMixin, serializers.ModelSerializer):
     """
     Serializer for listing media content (minimal fields for performance)
     """
@@ -27,7 +43,108 @@ class MediaContentListSerializer(serializers.ModelSerializer):
         return obj.get_thumbnail_url()
 
 
-class MediaContentDetailSerializer(serializers.ModelSerializer):
+class MediaContentValuesSerializer:
+    """
+    Fast path for MediaContentListSerializer on list endpoints.
+    
+    Rows come from values_queryset() as plain dicts and are turned into
+    exactly the dicts MediaContentListSerializer returns (same keys, order
+    and values). The field plan is compiled once from the DRF serializer;
+    per row only datetimes go through their DRF field, thumbnail_url is
+    computed from the raw columns and tag_list comes from one tag index
+    query for the whole page. Parity is checked by the
+    check_serializer_parity command.
+    """
+    serializer_class = MediaContentListSerializer
+    # Fields computed from raw columns (and related data loaded per page)
+    # instead of model attributes
+    computed = {
+        'thumbnail_url': (
+            ('thumbnail_url', 'url'),
+            lambda row, related: resolve_thumbnail_url(row['thumbnail_url'], row['url']),
+        ),
+        'tag_list': (('id',), lambda row, related: related['tags'].get(row['id'], [])),
+    }
+    # DRF fields whose to_representation is the identity for database values
+    passthrough_fields = (
+        serializers.CharField, serializers.IntegerField, serializers.BooleanField,
+        serializers.ChoiceField,
+    )
+    _plan = None
+    
+    def __init__(self, instance=None, many=True, **kwargs):
+        self.instance = instance
+    
+    @classmethod
+    def compile(cls):
+        plan, lookups = [], []
+        for name, field in cls.serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if name in cls.computed:
+                columns, getter = cls.computed[name]
+                lookups.extend(columns)
+                plan.append((name, None, getter))
+                continue
+            lookup = field.source.replace('.', '__')
+            lookups.append(lookup)
+            convert = None if isinstance(field, cls.passthrough_fields) else field.to_representation
+            plan.append((name, lookup, convert))
+        return plan, tuple(dict.fromkeys(lookups))
+    
+    @classmethod
+    def get_plan(cls):
+        if cls._plan is None:
+            cls._plan = cls.compile()
+        return cls._plan
+    
+    @classmethod
+    def values_queryset(cls, queryset):
+        """The columns the fast path reads, as a values() queryset"""
+        return queryset.values(*cls.get_plan()[1])
+    
+    @staticmethod
+    def load_related(rows):
+        return {'tags': tag_lists_for([row['id'] for row in rows])}
+    
+    @classmethod
+    def to_representation(cls, row, related):
+        data = {}
+        for name, lookup, convert in cls.get_plan()[0]:
+            if lookup is None:
+                data[name] = convert(row, related)
+                continue
+            value = row[lookup]
+            data[name] = value if convert is None or value is None else convert(value)
+        return data
+    
+    @property
+    def data(self):
+        rows = list(self.instance)
+        related = self.load_related(rows)
+        return engagement_counters.overlay([self.to_representation(row, related) for row in rows])
+
+
+class BundleContentSerializer(MediaContentListSerializer):
+    """
+    List shape for offline bundles; rows reference their category by id
+    because the bundle carries the categories alongside the content.
+    Bundles are snapshots of the stored rows, without pending counts.
+    """
+    
+    def to_representation(self, instance):
+        return serializers.ModelSerializer.to_representation(self, instance)
+    
+    class Meta(MediaContentListSerializer.Meta):
+        fields = [
+            'id', 'category', 'title', 'slug', 'description', 'content_type', 'url',
+            'thumbnail_url', 'author', 'source', 'duration', 'difficulty_level',
+            'target_age_group', 'is_featured', 'view_count', 'like_count',
+            'published_date', 'tag_list'
+        ]
+
+
+class MediaContentDetailSerializer(PendingCountsMixin, serializers.ModelSerializer):
     """
     Detailed serializer for individual media content
     """
@@ -36,8 +153,8 @@ class MediaContentDetailSerializer(serializers.ModelSerializer):
     thumbnail_url = serializers.SerializerMethodField()
     tag_list = serializers.ReadOnlyField()
     youtube_id = serializers.SerializerMethodField()
-    average_rating = serializers.SerializerMethodField()
-    total_ratings = serializers.SerializerMethodField()
+    average_rating = serializers.ReadOnlyField()
+    total_ratings = serializers.IntegerField(source='rating_count', read_only=True)
     
     class Meta:
         model = MediaContent
@@ -56,15 +173,6 @@ class MediaContentDetailSerializer(serializers.ModelSerializer):
     
     def get_youtube_id(self, obj):
         return obj.get_youtube_id()
-    
-    def get_average_rating(self, obj):
-        ratings = obj.ratings.all()
-        if ratings:
-            return sum(r.rating for r in ratings) / len(ratings)
-        return 0
-    
-    def get_total_ratings(self, obj):
-        return obj.ratings.count()
 
 
 class MediaContentCreateUpdateSerializer(serializers.ModelSerializer):
@@ -106,9 +214,9 @@ class HealthCategorySerializer(serializers.ModelSerializer):
 
 class HealthCategoryWithContentSerializer(serializers.ModelSerializer):
     """
-    Category serializer with associated media content
+    Category serializer with a bounded preview of its active media content
     """
-    media_content = MediaContentListSerializer(many=True, read_only=True)
+    media_content = serializers.SerializerMethodField()
     active_content_count = serializers.ReadOnlyField()
     video_count = serializers.ReadOnlyField()
     article_count = serializers.ReadOnlyField()
@@ -120,6 +228,13 @@ class HealthCategoryWithContentSerializer(serializers.ModelSerializer):
             'is_active', 'order', 'media_content', 'active_content_count',
             'video_count', 'article_count', 'created_at', 'updated_at'
         ]
+    
+    def get_media_content(self, obj):
+        items = getattr(obj, PREVIEW_ATTR, None)
+        if items is None:
+            limit = get_setting('CATEGORY_CONTENT_PREVIEW_LIMIT')
+            items = category_feed_queryset().filter(category=obj)[:limit]
+        return MediaContentListSerializer(items, many=True, context=self.context).data
 
 
 class ContentRatingSerializer(serializers.ModelSerializer):
@@ -161,7 +276,7 @@ class ContentStatsSerializer(serializers.Serializer):
     recent_content = MediaContentListSerializer(many=True)
 
 
-class SearchResultSerializer(serializers.ModelSerializer):
+class SearchResultSerializer(PendingCountsMixin, serializers.ModelSerializer):
     """
     Serializer for search results
     """
@@ -0,0 +1,179 @@
+"""
+Signal handlers for E-Arogya Health Content
+"""
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import (
+    CATEGORY_LIST_TAG, CONTENT_LIST_TAG, category_tag, content_tag, response_cache
+)
+from .models import ContentRating, HealthCategory, MediaContent, Tombstone
+from .search import SEARCH_FIELDS, get_search_backend
+from .stats import invalidate_content_stats
+from .tags import index_tags
+
+
+@receiver(post_save, sender=MediaContent)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    """Re-index content whenever its searchable text may have changed"""
+    if update_fields is not None and not set(update_fields) & set(SEARCH_FIELDS):
+        return
+    get_search_backend(kwargs.get('using')).index(instance)
+
+
+@receiver(post_delete, sender=MediaContent)
+def remove_from_search_index(sender, instance, **kwargs):
+    get_search_backend(kwargs.get('using')).remove(instance.pk)
+
+
+@receiver(post_init, sender=MediaContent)
+def remember_indexed_tags(sender, instance, **kwargs):
+    instance._indexed_tags = instance.__dict__.get('tags')
+
+
+@receiver(post_save, sender=MediaContent)
+def update_tag_index(sender, instance, created=False, update_fields=None, **kwargs):
+    """Mirror the tags string into the Tag / MediaContentTag index"""
+    if update_fields is not None and 'tags' not in update_fields:
+        return
+    if not created and instance._indexed_tags == instance.tags:
+        return
+    index_tags([(instance.pk, instance.tags)], using=kwargs.get('using') or 'default')
+    instance._indexed_tags = instance.tags
+
+
+# Fields that decide which category counters a MediaContent row contributes to
+COUNTER_FIELDS = ('category_id', 'content_type', 'is_active')
+
+
+def _counter_state(instance):
+    # Read from __dict__ so deferred fields never trigger a query
+    return tuple(instance.__dict__.get(field) for field in COUNTER_FIELDS)
+
+
+@receiver(post_init, sender=MediaContent)
+def remember_counter_state(sender, instance, **kwargs):
+    instance._counter_state = _counter_state(instance)
+
+
+@receiver(post_save, sender=MediaContent)
+def media_content_saved(sender, instance, created=False, **kwargs):
+    """
+    Refresh category counters when content is added, moved or (de)activated,
+    and expire the cached responses the content may appear in
+    """
+    previous = instance._counter_state
+    current = _counter_state(instance)
+    instance._counter_state = current
+    category_ids = {previous[0], current[0]} - {None}
+    tags = [content_tag(instance.pk), CONTENT_LIST_TAG, *map(category_tag, category_ids)]
+    if created or previous != current:
+        HealthCategory.refresh_content_counts(category_ids)
+        tags.append(CATEGORY_LIST_TAG)
+    response_cache.invalidate(*tags)
+
+
+@receiver(post_delete, sender=MediaContent)
+def media_content_deleted(sender, instance, **kwargs):
+    HealthCategory.refresh_content_counts([instance.category_id])
+    response_cache.invalidate(
+        content_tag(instance.pk), category_tag(instance.category_id),
+        CONTENT_LIST_TAG, CATEGORY_LIST_TAG,
+    )
+
+
+@receiver(post_save, sender=HealthCategory)
+@receiver(post_delete, sender=HealthCategory)
+def health_category_changed(sender, instance, **kwargs):
+    # Content rows embed the category name and slug
+    response_cache.invalidate(category_tag(instance.pk), CATEGORY_LIST_TAG, CONTENT_LIST_TAG)
+
+
+@receiver(post_save, sender=MediaContent)
+@receiver(post_delete, sender=MediaContent)
+@receiver(post_save, sender=HealthCategory)
+@receiver(post_delete, sender=HealthCategory)
+def expire_stats_snapshot(sender, **kwargs):
+    invalidate_content_stats()
+
+
+@receiver(post_save, sender=MediaContent)
+def track_content_removal(sender, instance, created=False, **kwargs):
+    """Leave a sync tombstone when content is deactivated, clear it on reactivation"""
+    was_active = instance._tombstone_active
+    instance._tombstone_active = instance.is_active
+    if created:
+        return
+    # was_active is None when the field was deferred; record/clear are idempotent
+    if instance.is_active and was_active is False:
+        Tombstone.clear('content', instance.pk)
+    elif not instance.is_active and was_active is not False:
+        Tombstone.record('content', instance.pk, 'deactivated')
+
+
+@receiver(post_delete, sender=MediaContent)
+def content_tombstone(sender, instance, **kwargs):
+    Tombstone.record('content', instance.pk, 'deleted')
+
+
+@receiver(post_init, sender=MediaContent)
+@receiver(post_init, sender=HealthCategory)
+def remember_active_state(sender, instance, **kwargs):
+    instance._tombstone_active = instance.__dict__.get('is_active')
+
+
+@receiver(post_save, sender=HealthCategory)
+def track_category_removal(sender, instance, created=False, **kwargs):
+    """
+    Leave a sync tombstone when a category is deactivated. Clients drop its
+    content with it, so reactivation marks that content as changed again.
+    """
+    was_active = instance._tombstone_active
+    instance._tombstone_active = instance.is_active
+    if created:
+        return
+    if instance.is_active and was_active is False:
+        Tombstone.clear('category', instance.pk)
+        MediaContent.objects.filter(category=instance, is_active=True).update(updated_at=timezone.now())
+    elif not instance.is_active and was_active is not False:
+        Tombstone.record('category', instance.pk, 'deactivated')
+
+
+@receiver(post_delete, sender=HealthCategory)
+def category_tombstone(sender, instance, **kwargs):
+    Tombstone.record('category', instance.pk, 'deleted')
+
+
+@receiver(post_init, sender=ContentRating)
+def remember_rating_state(sender, instance, **kwargs):
+    instance._rating_state = (instance.__dict__.get('content_id'), instance.__dict__.get('rating'))
+
+
+def _adjust_rating_aggregates(content_id, count, total):
+    MediaContent.objects.filter(pk=content_id).update(
+        rating_count=F('rating_count') + count,
+        rating_sum=F('rating_sum') + total,
+        updated_at=timezone.now(),
+    )
+
+
+@receiver(post_save, sender=ContentRating)
+def update_rating_aggregates(sender, instance, created=False, **kwargs):
+    """Apply the rating delta to MediaContent.rating_count/rating_sum"""
+    previous_content, previous_rating = instance._rating_state
+    instance._rating_state = (instance.content_id, instance.rating)
+    if created:
+        _adjust_rating_aggregates(instance.content_id, 1, instance.rating)
+    elif previous_content != instance.content_id:
+        _adjust_rating_aggregates(previous_content, -1, -previous_rating)
+        _adjust_rating_aggregates(instance.content_id, 1, instance.rating)
+    elif previous_rating != instance.rating:
+        _adjust_rating_aggregates(instance.content_id, 0, instance.rating - previous_rating)
+
+
+@receiver(post_delete, sender=ContentRating)
+def remove_rating_from_aggregates(sender, instance, **kwargs):
+    previous_content, previous_rating = instance._rating_state
+    _adjust_rating_aggregates(previous_content, -1, -previous_rating)
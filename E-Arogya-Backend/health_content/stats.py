@@ -0,0 +1,58 @@
+"""
+Content statistics snapshot
+
+The stats payload is computed with a single conditional-aggregation query
+(the category count is a scalar subquery inside it) plus the recent-content
+slice, and kept in the
+Django cache for STATS_CACHE_TTL seconds. Content and category signals
+invalidate it so dashboards never see stale structure for long.
+"""
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, Max, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .conf import get_setting
+from .models import HealthCategory, MediaContent
+from .serializers import ContentStatsSerializer
+
+
+STATS_CACHE_KEY = 'health_content:stats'
+
+
+def compute_content_stats():
+    """Build the stats payload straight from the database"""
+    # COUNT(*) of active categories as a scalar subquery; grouping on a
+    # constant leaves no GROUP BY
+    categories = Subquery(
+        HealthCategory.objects.filter(is_active=True).order_by().annotate(
+            one=Value(1)
+        ).values('one').annotate(total=Count('pk')).values('total'),
+        output_field=IntegerField(),
+    )
+    totals = MediaContent.objects.filter(is_active=True).aggregate(
+        total_content=Count('id'),
+        total_videos=Count('id', filter=Q(content_type='video')),
+        total_articles=Count('id', filter=Q(content_type='article')),
+        featured_content=Count('id', filter=Q(is_featured=True)),
+        total_views=Sum('view_count'),
+        # MAX() of the constant; COALESCE covers having no active content
+        categories_count=Coalesce(Max(categories), categories),
+    )
+    totals['total_views'] = totals['total_views'] or 0
+    totals['recent_content'] = MediaContent.objects.filter(
+        is_active=True
+    ).select_related('category').order_by('-created_at')[:5]
+    return ContentStatsSerializer(totals).data
+
+
+def get_content_stats():
+    """Return the cached stats snapshot, rebuilding it when missing"""
+    data = cache.get(STATS_CACHE_KEY)
+    if data is None:
+        data = compute_content_stats()
+        cache.set(STATS_CACHE_KEY, data, get_setting('STATS_CACHE_TTL'))
+    return data
+
+
+def invalidate_content_stats():
+    cache.delete(STATS_CACHE_KEY)
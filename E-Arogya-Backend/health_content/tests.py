@@ -0,0 +1,109 @@
+"""
+Tests for the health_content API
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .benchmark import generate_benchmark_data
+from .models import HealthCategory, MediaContent
+from .parity import compare_list_output, create_edge_cases
+from .querybudget import ENDPOINT_BUDGETS, WORST_CASE_SETTINGS, assert_max_queries
+from .related import compute_related_content
+from .trending import refresh_trending_scores
+
+
+@override_settings(ALLOWED_HOSTS=['*'], HEALTH_CONTENT=WORST_CASE_SETTINGS)
+class QueryBudgetTests(TestCase):
+    """Every endpoint stays within its budget on more rows than one page"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+        generate_benchmark_data(content=page_size * 3, categories=2, views=page_size * 10)
+        refresh_trending_scores()
+        compute_related_content(full=True)
+        cls.content = MediaContent.objects.filter(is_active=True).order_by('id').first()
+        cls.category = HealthCategory.objects.filter(is_active=True).order_by('id').first()
+    
+    def test_endpoint_budgets(self):
+        client = APIClient()
+        for method, path, budget in ENDPOINT_BUDGETS:
+            url = path.format(content_id=self.content.pk, category_slug=self.category.slug)
+            with self.subTest(f"{method.upper()} {url}"):
+                cache.clear()
+                with assert_max_queries(budget, label=f"{method.upper()} {url}"):
+                    response = getattr(client, method)(url)
+                self.assertLess(response.status_code, 400)
+
+
+class SerializerParityTests(TestCase):
+    """The fast list path renders byte-for-byte what DRF renders"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        generate_benchmark_data(content=settings.REST_FRAMEWORK['PAGE_SIZE'], categories=1, views=0)
+        create_edge_cases(HealthCategory.objects.order_by('id').first())
+    
+    def test_list_output_matches(self):
+        queryset = MediaContent.objects.order_by('id')
+        for zone in [None, 'UTC', 'Asia/Kolkata']:
+            with self.subTest(zone=zone), timezone.override(zone):
+                failures, rows, _ = compare_list_output(queryset, zone or 'default time zone')
+                self.assertEqual(failures, [])
+                self.assertEqual(rows, queryset.count())
+
+
+class FacetTests(TestCase):
+    """Each facet is counted under every filter except its own"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        generate_benchmark_data(content=40, categories=2, views=0)
+    
+    def facets(self, query=''):
+        response = APIClient().get(f'/api/content/facets/{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+    
+    def counts(self, data, facet):
+        return {item['value']: item['count'] for item in data['facets'][facet]}
+    
+    def test_filter_keeps_counts_of_its_other_values(self):
+        unfiltered = self.facets()
+        filtered = self.facets('?content_type=video')
+        self.assertEqual(self.counts(filtered, 'content_type'), self.counts(unfiltered, 'content_type'))
+        self.assertEqual(filtered['total'], MediaContent.objects.filter(content_type='video').count())
+    
+    def test_other_facets_follow_the_filter(self):
+        filtered = self.facets('?content_type=video')
+        videos = MediaContent.objects.filter(content_type='video')
+        for slug, count in self.counts(filtered, 'category__slug').items():
+            self.assertEqual(count, videos.filter(category__slug=slug).count())
+    
+    def test_combined_filters(self):
+        category = HealthCategory.objects.order_by('id').first()
+        filtered = self.facets(f'?content_type=video&category__slug={category.slug}')
+        in_category = MediaContent.objects.filter(category=category)
+        self.assertEqual(self.counts(filtered, 'content_type'), {
+            value: in_category.filter(content_type=value).count() for value, _ in MediaContent.CONTENT_TYPES
+        })
+        videos = MediaContent.objects.filter(content_type='video')
+        self.assertEqual(self.counts(filtered, 'category__slug')[category.slug], videos.filter(category=category).count())
+        self.assertEqual(filtered['total'], videos.filter(category=category).count())
+    
+    def test_tag_facet_ignores_the_tag_filter(self):
+        unfiltered = self.facets()
+        filtered = self.facets('?tag=first aid')
+        self.assertEqual(self.counts(filtered, 'tag'), self.counts(unfiltered, 'tag'))
+    
+    def test_etag_covers_rows_outside_the_filter(self):
+        response = APIClient().get('/api/content/facets/?content_type=video')
+        article = MediaContent.objects.exclude(content_type='video').first()
+        MediaContent.objects.filter(pk=article.pk).update(is_active=False)
+        response = APIClient().get(
+            '/api/content/facets/?content_type=video', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
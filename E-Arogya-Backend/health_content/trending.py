@@ -0,0 +1,128 @@
+"""
+Time-decayed trending scores
+
+Each view, like and share adds weight * 2^(-age / half-life) to an item's
+trending activity. Instead of decaying every row on every run, scores are
+kept in log space relative to a fixed epoch:
+
+    trending_score = ln(sum(weight * exp(decay * (event_time - EPOCH))))
+
+Every score then carries the same exp(-decay * (now - EPOCH)) factor, so
+ordering by the stored column equals ordering by decayed activity at any
+moment, and a run only rewrites rows that had new events. Scores grow
+linearly with time and never overflow. The decayed value as of now is
+exp(trending_score - decay * (now - EPOCH)).
+
+Views are read from raw ContentView rows above a watermark, bucketed by
+hour; likes and shares only exist as counters, so increases since the
+last run count as happening now.
+"""
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Q
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .conf import get_setting
+from .models import ContentView, MediaContent, RollupWatermark
+
+
+WATERMARK_NAME = 'trending'
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def decay_rate():
+    """Exponential decay constant per second for TRENDING_HALF_LIFE_HOURS"""
+    return math.log(2) / (get_setting('TRENDING_HALF_LIFE_HOURS') * 3600)
+
+
+def log_weight(weight, moment, rate):
+    """Log-space contribution of `weight` activity at `moment`"""
+    return math.log(weight) + rate * (moment - EPOCH).total_seconds()
+
+
+def log_add(a, b):
+    """ln(exp(a) + exp(b)) without overflow"""
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def decayed_score(trending_score, now=None):
+    """Decayed weighted activity as of now for a stored trending_score"""
+    now = now or timezone.now()
+    return math.exp(trending_score - decay_rate() * (now - EPOCH).total_seconds())
+
+
+def _view_contributions(rate, chunk_size, settle_seconds):
+    """{content_id: [log contributions]} for views above the watermark"""
+    cutoff = timezone.now() - timedelta(seconds=settle_seconds)
+    high_id = ContentView.objects.filter(viewed_at__lt=cutoff).aggregate(high=Max('id'))['high']
+    watermark, _ = RollupWatermark.objects.get_or_create(name=WATERMARK_NAME)
+    contributions = {}
+    if high_id is None or high_id <= watermark.last_id:
+        return contributions, watermark, watermark.last_id
+
+    weight = get_setting('TRENDING_WEIGHTS')['view']
+    last_id = watermark.last_id
+    while last_id < high_id:
+        upper = min(last_id + chunk_size, high_id)
+        buckets = ContentView.objects.filter(id__gt=last_id, id__lte=upper).order_by().values(
+            'content_id', hour=TruncHour('viewed_at')
+        ).annotate(views=Count('id'))
+        for row in buckets:
+            # Credit the middle of the hour the views happened in
+            moment = row['hour'] + timedelta(minutes=30)
+            contributions.setdefault(row['content_id'], []).append(
+                log_weight(weight * row['views'], moment, rate)
+            )
+        last_id = upper
+    return contributions, watermark, high_id
+
+
+def refresh_trending_scores(chunk_size=None, settle_seconds=None):
+    """
+    Fold views, likes and shares since the last run into trending_score.
+    Returns the number of content rows updated.
+    """
+    chunk_size = chunk_size or get_setting('ROLLUP_CHUNK_SIZE')
+    if settle_seconds is None:
+        settle_seconds = get_setting('ROLLUP_SETTLE_SECONDS')
+    rate = decay_rate()
+    weights = get_setting('TRENDING_WEIGHTS')
+    now = timezone.now()
+
+    with transaction.atomic():
+        contributions, watermark, high_id = _view_contributions(rate, chunk_size, settle_seconds)
+
+        engaged = MediaContent.objects.filter(
+            Q(like_count__gt=F('trending_likes_seen')) | Q(share_count__gt=F('trending_shares_seen'))
+            | Q(like_count__lt=F('trending_likes_seen')) | Q(share_count__lt=F('trending_shares_seen'))
+        ).values_list('id', 'like_count', 'share_count', 'trending_likes_seen', 'trending_shares_seen')
+        marks = {}
+        for pk, likes, shares, likes_seen, shares_seen in engaged:
+            # Counters that went down (manual resets) only move the mark
+            weight = weights['like'] * max(likes - likes_seen, 0) + weights['share'] * max(shares - shares_seen, 0)
+            if weight:
+                contributions.setdefault(pk, []).append(log_weight(weight, now, rate))
+            marks[pk] = (likes, shares)
+
+        rows = list(MediaContent.objects.filter(pk__in=contributions.keys() | marks.keys()).only(
+            'id', 'trending_score', 'trending_likes_seen', 'trending_shares_seen'
+        ))
+        for content in rows:
+            for contribution in contributions.get(content.pk, ()):
+                content.trending_score = log_add(content.trending_score, contribution)
+            if content.pk in marks:
+                content.trending_likes_seen, content.trending_shares_seen = marks[content.pk]
+        MediaContent.objects.bulk_update(
+            rows, ['trending_score', 'trending_likes_seen', 'trending_shares_seen'], batch_size=500
+        )
+        RollupWatermark.objects.filter(pk=watermark.pk).update(last_id=high_id, updated_at=now)
+    return len(rows)
+
+
+def trending_queryset(queryset):
+    """Order content by trending score; served by the trending indexes"""
+    return queryset.order_by('-trending_score', '-id')
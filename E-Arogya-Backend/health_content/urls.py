@@ -3,7 +3,10 @@ URL configuration for health_content app
 """
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import HealthCategoryViewSet, MediaContentViewSet, ContentRatingViewSet
+from .views import (
+    HealthCategoryViewSet, MediaContentViewSet, ContentRatingViewSet, cache_stats,
+    content_bundle, profiling_stats, sync_changes
+)
 
 # Create router and register viewsets
 router = DefaultRouter()
@@ -24,4 +27,8 @@ urlpatterns = [
     path('', include(router.urls)),
     # Additional endpoints
     path('categories/<str:category_slug>/content/', content_by_category, name='content-by-category'),
+    path('cache/stats/', cache_stats, name='cache-stats'),
+    path('profiling/stats/', profiling_stats, name='profiling-stats'),
+    path('bundle/', content_bundle, name='content-bundle'),
+    path('sync/', sync_changes, name='sync-changes'),
 ]
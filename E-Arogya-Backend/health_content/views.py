@@ -1,23 +1,58 @@
 """
 Views for E-Arogya Health Content API
 """
-from django.db.models import Q, Count, Avg
-from django.utils import timezone
+import hashlib
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.http import HttpResponse, HttpResponseNotModified
 from rest_framework import viewsets, status, filters
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import HealthCategory, MediaContent, ContentRating, ContentView
+from .bundles import (
+    build_delta_payload, compress, current_manifest, encode, negotiate_encoding,
+    read_bundle_file, version_datetime
+)
+from .cache import CATEGORY_LIST_TAG, CONTENT_LIST_TAG, cache_response, category_tag, response_cache
+from .conditional import (
+    category_content_queryset, conditional_get, facet_queryset, object_queryset
+)
+from .conf import get_setting
+from .counters import engagement_counters
+from .facets import compute_facets
+from .filters import CONTENT_FILTER_FIELDS, MediaContentFilter
+from .ingest import view_ingest
+from .metrics import METRICS_CONTENT_TYPE, collect_metrics, render_metrics
+from .models import HealthCategory, MediaContent, ContentRating
+from .pagination import ContentPagination
+from .profiling import profile_stats
+from .querysets import (
+    CATEGORY_WITH_CONTENT_PLAN, CONTENT_DETAIL_PLAN, CONTENT_LIST_PLAN, CONTENT_SEARCH_PLAN,
+    ENGAGEMENT_PLAN,
+    QuerysetPlanMixin, category_feed_queryset
+)
+from .related import related_content_queryset
+from .search import get_search_backend
+from .stats import get_content_stats
+from .sync import InvalidCursor, get_changes
+from .tags import tag_facets
+from .trending import trending_queryset
 from .serializers import (
     HealthCategorySerializer, HealthCategoryWithContentSerializer,
-    MediaContentListSerializer, MediaContentDetailSerializer,
+    MediaContentListSerializer, MediaContentValuesSerializer, MediaContentDetailSerializer,
     MediaContentCreateUpdateSerializer, ContentRatingSerializer,
-    ContentStatsSerializer, SearchResultSerializer
+    SearchResultSerializer
 )
 
 
-class HealthCategoryViewSet(viewsets.ReadOnlyModelViewSet):
+# Keyset pagination keys (all descending, ending in the primary key)
+CONTENT_KEYSET = ('published_date', 'id')
+CATEGORY_FEED_KEYSET = ('is_featured', 'published_date', 'id')
+
+
+class HealthCategoryViewSet(QuerysetPlanMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for health categories
     """
@@ -25,31 +60,45 @@ class HealthCategoryViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = HealthCategorySerializer
     lookup_field = 'slug'
     permission_classes = [AllowAny]
+    pagination_class = ContentPagination
+    queryset_plans = {
+        'retrieve': CATEGORY_WITH_CONTENT_PLAN,
+        'featured': CATEGORY_WITH_CONTENT_PLAN,
+    }
+    # Read from the replica when one is configured (see health_content.replica)
+    replica_actions = ('list', 'retrieve', 'content', 'trending', 'featured')
+    
+    def get_keyset_fields(self):
+        if self.action == 'content':
+            return CATEGORY_FEED_KEYSET
+        return None
     
     def get_serializer_class(self):
-        if self.action == 'retrieve':
+        if self.action in ['retrieve', 'featured']:
             return HealthCategoryWithContentSerializer
         return HealthCategorySerializer
     
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        if self.action == 'retrieve':
-            # Prefetch related content for detail view
-            queryset = queryset.prefetch_related(
-                'media_content__ratings'
-            ).select_related()
-        return queryset
+    @conditional_get()
+    @cache_response('categories:list', tags=[CATEGORY_LIST_TAG], item_tag=None)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+    
+    @conditional_get(category_content_queryset)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
     
     @action(detail=True, methods=['get'])
+    @conditional_get(category_content_queryset)
+    @cache_response('categories:content')
     def content(self, request, slug=None):
-        """Get all content for a specific category"""
+        """Get paginated content for a specific category, featured first"""
         category = self.get_object()
         content_type = request.query_params.get('type', None)
         difficulty = request.query_params.get('difficulty', None)
         age_group = request.query_params.get('age_group', None)
         featured_only = request.query_params.get('featured', None)
         
-        queryset = category.media_content.filter(is_active=True)
+        queryset = category_feed_queryset().filter(category=category)
         
         # Apply filters
         if content_type:
@@ -61,35 +110,72 @@ class HealthCategoryViewSet(viewsets.ReadOnlyModelViewSet):
         if featured_only == 'true':
             queryset = queryset.filter(is_featured=True)
         
-        # Order by featured first, then by published date
-        queryset = queryset.order_by('-is_featured', '-published_date')
-        
-        serializer = MediaContentListSerializer(queryset, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(MediaContentValuesSerializer.values_queryset(queryset))
+        serializer = MediaContentValuesSerializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        response.cache_tags = [category_tag(category.pk)]
+        return response
+    
+    @action(detail=True, methods=['get'])
+    @cache_response('categories:trending')
+    def trending(self, request, slug=None):
+        """Get the top trending content of a category"""
+        category = self.get_object()
+        queryset = trending_queryset(category_feed_queryset().filter(category=category))
+        serializer = MediaContentValuesSerializer(MediaContentValuesSerializer.values_queryset(queryset)[:20])
+        response = Response(serializer.data)
+        response.cache_tags = [category_tag(category.pk)]
+        return response
     
     @action(detail=False, methods=['get'])
+    @cache_response('categories:featured', tags=[CATEGORY_LIST_TAG, CONTENT_LIST_TAG], item_tag=None)
     def featured(self, request):
-        """Get categories with featured content"""
-        categories = self.get_queryset().filter(
-            media_content__is_featured=True,
-            media_content__is_active=True
-        ).distinct()
+        """Get categories with featured content, each with its top content items"""
+        has_featured = MediaContent.objects.filter(
+            category=OuterRef('pk'), is_featured=True, is_active=True
+        )
+        categories = self.get_queryset().filter(Exists(has_featured))
         
-        serializer = HealthCategoryWithContentSerializer(categories, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(categories)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
-class MediaContentViewSet(viewsets.ModelViewSet):
+class MediaContentViewSet(QuerysetPlanMixin, viewsets.ModelViewSet):
     """
     ViewSet for media content with full CRUD operations
     """
     queryset = MediaContent.objects.filter(is_active=True)
     permission_classes = [AllowAny]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['category__slug', 'content_type', 'difficulty_level', 'target_age_group', 'is_featured']
+    filterset_fields = CONTENT_FILTER_FIELDS
+    filterset_class = MediaContentFilter
     search_fields = ['title', 'description', 'author', 'tags']
     ordering_fields = ['published_date', 'view_count', 'like_count', 'created_at']
     ordering = ['-published_date']
+    pagination_class = ContentPagination
+    queryset_plans = {
+        'list': CONTENT_LIST_PLAN,
+        'popular': CONTENT_LIST_PLAN,
+        'recent': CONTENT_LIST_PLAN,
+        'search': CONTENT_SEARCH_PLAN,
+        'retrieve': CONTENT_DETAIL_PLAN,
+        'featured': CONTENT_DETAIL_PLAN,
+        'by_category': CONTENT_DETAIL_PLAN,
+        'increment_view': ENGAGEMENT_PLAN,
+        'like': ENGAGEMENT_PLAN,
+        'share': ENGAGEMENT_PLAN,
+    }
+    replica_actions = (
+        'list', 'retrieve', 'related', 'featured', 'by_category', 'popular', 'trending', 'recent',
+        'search', 'tags', 'facets', 'stats',
+    )
+    
+    def get_keyset_fields(self):
+        """Key for ?pagination=cursor; search keeps page numbers (ranked)"""
+        if self.action in ('list', 'by_category'):
+            return CONTENT_KEYSET
+        return None
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -98,12 +184,32 @@ class MediaContentViewSet(viewsets.ModelViewSet):
             return MediaContentCreateUpdateSerializer
         return MediaContentDetailSerializer
     
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        if self.action == 'retrieve':
-            # Prefetch ratings for detail view
-            queryset = queryset.prefetch_related('ratings').select_related('category')
-        return queryset
+    @conditional_get()
+    def list(self, request, *args, **kwargs):
+        queryset = MediaContentValuesSerializer.values_queryset(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(MediaContentValuesSerializer(page, many=True).data)
+        return Response(MediaContentValuesSerializer(queryset, many=True).data)
+    
+    @conditional_get(object_queryset)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+    
+    @action(detail=True, methods=['get'])
+    @cache_response('content:related')
+    def related(self, request, pk=None):
+        """Get precomputed related content (see compute_related_content)"""
+        not_found = Response({'error': 'Content not found'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            pk = int(pk)
+        except ValueError:
+            return not_found
+        queryset = MediaContentValuesSerializer.values_queryset(related_content_queryset(pk))
+        data = MediaContentValuesSerializer(queryset).data
+        if not data and not self.get_queryset().filter(pk=pk).exists():
+            return not_found
+        return Response(data)
     
     @action(detail=True, methods=['post'])
     def increment_view(self, request, pk=None):
@@ -117,35 +223,31 @@ class MediaContentViewSet(viewsets.ModelViewSet):
         else:
             user_ip = request.META.get('REMOTE_ADDR')
         
-        # Track view
-        ContentView.objects.create(
-            content=content,
-            user_ip=user_ip,
-            user_agent=request.META.get('HTTP_USER_AGENT', '')
-        )
+        # Track view (written in batches by the ingest worker)
+        view_ingest.record(content.pk, user_ip, request.META.get('HTTP_USER_AGENT', ''))
         
         # Increment view count
         content.increment_view_count()
         
-        return Response({'view_count': content.view_count})
+        return Response({'view_count': engagement_counters.value(content.pk, 'view_count')})
     
     @action(detail=True, methods=['post'])
     def like(self, request, pk=None):
         """Increment like count"""
         content = self.get_object()
-        content.like_count += 1
-        content.save(update_fields=['like_count'])
-        return Response({'like_count': content.like_count})
+        content.like()
+        return Response({'like_count': engagement_counters.value(content.pk, 'like_count')})
     
     @action(detail=True, methods=['post'])
     def share(self, request, pk=None):
         """Increment share count"""
         content = self.get_object()
-        content.share_count += 1
-        content.save(update_fields=['share_count'])
-        return Response({'share_count': content.share_count})
+        content.share()
+        return Response({'share_count': engagement_counters.value(content.pk, 'share_count')})
     
     @action(detail=False, methods=['get'])
+    @conditional_get()
+    @cache_response('content:featured', tags=[CONTENT_LIST_TAG])
     def featured(self, request):
         """
         Get featured content across all categories
@@ -155,6 +257,8 @@ class MediaContentViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
         
     @action(detail=False, methods=['get'])
+    @conditional_get(category_content_queryset)
+    @cache_response('content:by_category')
     def by_category(self, request, category_slug=None):
         """
         Get content filtered by category slug
@@ -176,10 +280,12 @@ class MediaContentViewSet(viewsets.ModelViewSet):
             page = self.paginate_queryset(content)
             if page is not None:
                 serializer = self.get_serializer(page, many=True)
-                return self.get_paginated_response(serializer.data)
-                
-            serializer = self.get_serializer(content, many=True)
-            return Response(serializer.data)
+                response = self.get_paginated_response(serializer.data)
+            else:
+                serializer = self.get_serializer(content, many=True)
+                response = Response(serializer.data)
+            response.cache_tags = [category_tag(category.pk)]
+            return response
             
         except HealthCategory.DoesNotExist:
             return Response(
@@ -188,22 +294,46 @@ class MediaContentViewSet(viewsets.ModelViewSet):
             )
     
     @action(detail=False, methods=['get'])
+    @cache_response('content:popular', tags=[CONTENT_LIST_TAG])
     def popular(self, request):
-        """Get popular content based on views and likes"""
-        queryset = self.get_queryset().order_by('-view_count', '-like_count')[:20]
-        serializer = MediaContentListSerializer(queryset, many=True)
+        """
+        Get popular content based on views and likes. The ranking moves
+        with the counters, not updated_at, so there is no ETag; cached
+        copies expire by TTL.
+        """
+        queryset = self.get_queryset().order_by('-view_count', '-like_count')
+        serializer = MediaContentValuesSerializer(MediaContentValuesSerializer.values_queryset(queryset)[:20])
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @cache_response('content:trending', tags=[CONTENT_LIST_TAG])
+    def trending(self, request):
+        """
+        Get trending content by time-decayed engagement, optionally within
+        a category (?category=<slug>). Scores move without touching
+        updated_at, so there is no ETag; cached copies expire by TTL.
+        """
+        queryset = self.get_queryset()
+        category = request.query_params.get('category')
+        if category:
+            queryset = queryset.filter(category__slug=category)
+        serializer = MediaContentValuesSerializer(
+            MediaContentValuesSerializer.values_queryset(trending_queryset(queryset))[:20]
+        )
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    @conditional_get()
+    @cache_response('content:recent', tags=[CONTENT_LIST_TAG])
     def recent(self, request):
         """Get recently added content"""
-        queryset = self.get_queryset().order_by('-created_at')[:20]
-        serializer = MediaContentListSerializer(queryset, many=True)
+        queryset = self.get_queryset().order_by('-created_at')
+        serializer = MediaContentValuesSerializer(MediaContentValuesSerializer.values_queryset(queryset)[:20])
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def search(self, request):
-        """Advanced search with relevance scoring"""
+        """Full-text search by word prefix, ranked by relevance, paginated"""
         query = request.query_params.get('q', '')
         category = request.query_params.get('category', '')
         content_type = request.query_params.get('type', '')
@@ -211,10 +341,7 @@ class MediaContentViewSet(viewsets.ModelViewSet):
         if not query:
             return Response({'error': 'Search query is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Build search query
-        search_query = Q(title__icontains=query) | Q(description__icontains=query) | Q(tags__icontains=query)
-        
-        queryset = self.get_queryset().filter(search_query)
+        queryset = self.get_queryset()
         
         # Apply additional filters
         if category:
@@ -222,57 +349,69 @@ class MediaContentViewSet(viewsets.ModelViewSet):
         if content_type:
             queryset = queryset.filter(content_type=content_type)
         
-        # Simple relevance scoring (can be enhanced)
-        for item in queryset:
-            score = 0
-            if query.lower() in item.title.lower():
-                score += 3
-            if query.lower() in item.description.lower():
-                score += 2
-            if query.lower() in item.tags.lower():
-                score += 1
-            item.relevance_score = score
+        # Match and rank inside the database; only the requested page is loaded
+        results = get_search_backend(queryset.db).search(queryset, query)
         
-        # Sort by relevance
-        queryset = sorted(queryset, key=lambda x: x.relevance_score, reverse=True)
+        page = self.paginate_queryset(results)
+        if page is not None:
+            serializer = SearchResultSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         
-        serializer = SearchResultSerializer(queryset, many=True)
+        serializer = SearchResultSerializer(results, many=True)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
-    def stats(self, request):
-        """Get content statistics"""
-        total_content = MediaContent.objects.filter(is_active=True).count()
-        total_videos = MediaContent.objects.filter(is_active=True, content_type='video').count()
-        total_articles = MediaContent.objects.filter(is_active=True, content_type='article').count()
-        total_views = MediaContent.objects.filter(is_active=True).aggregate(
-            total=models.Sum('view_count')
-        )['total'] or 0
-        featured_content = MediaContent.objects.filter(is_active=True, is_featured=True).count()
-        categories_count = HealthCategory.objects.filter(is_active=True).count()
-        recent_content = MediaContent.objects.filter(is_active=True).order_by('-created_at')[:5]
-        
-        stats_data = {
-            'total_content': total_content,
-            'total_videos': total_videos,
-            'total_articles': total_articles,
-            'total_views': total_views,
-            'featured_content': featured_content,
-            'categories_count': categories_count,
-            'recent_content': recent_content
+    @conditional_get()
+    @cache_response('content:tags', tags=[CONTENT_LIST_TAG], item_tag=None)
+    def tags(self, request):
+        """Tag facet counts for the content matching the current filters"""
+        try:
+            limit = int(request.query_params.get('limit', 0))
+        except ValueError:
+            limit = -1
+        if limit < 0:
+            return Response({'limit': 'Must be a non-negative integer'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(tag_facets(self.filter_queryset(self.get_queryset()), limit or None))
+    
+    @action(detail=False, methods=['get'])
+    @conditional_get(facet_queryset)
+    @cache_response('content:facets', tags=[CONTENT_LIST_TAG], item_tag=None)
+    def facets(self, request):
+        """Counts per filter value (filterset_fields and tags), each under all filters but its own"""
+        queryset = self.filter_queryset(self.get_queryset())
+        facet_querysets = {
+            name: self.filter_queryset_without(name)
+            for name in [*self.filterset_fields, 'tag'] if request.query_params.get(name)
         }
-        
-        serializer = ContentStatsSerializer(stats_data)
-        return Response(serializer.data)
+        return Response(compute_facets(
+            queryset, self.filterset_fields, get_setting('FACET_TAG_LIMIT'), facet_querysets
+        ))
+    
+    def filter_queryset_without(self, *names):
+        """filter_queryset() ignoring the ?<name>= filters (ordering left out)"""
+        params = self.request.query_params.copy()
+        for name in names:
+            params.pop(name, None)
+        queryset = self.filterset_class(params, queryset=self.get_queryset(), request=self.request).qs
+        return filters.SearchFilter().filter_queryset(self.request, queryset, self)
+    
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """Get content statistics (cached snapshot)"""
+        return Response(get_content_stats())
 
 
 class ContentRatingViewSet(viewsets.ModelViewSet):
     """
     ViewSet for content ratings
+
+    Writes are atomic so the rating aggregates stored on MediaContent
+    (updated by signals) always commit together with the rating.
     """
     queryset = ContentRating.objects.all()
     serializer_class = ContentRatingSerializer
     permission_classes = [AllowAny]
+    replica_actions = ('list', 'retrieve')
     
     def get_queryset(self):
         content_id = self.request.query_params.get('content_id')
@@ -280,6 +419,7 @@ class ContentRatingViewSet(viewsets.ModelViewSet):
             return self.queryset.filter(content_id=content_id)
         return self.queryset
     
+    @transaction.atomic
     def perform_create(self, serializer):
         # Get client IP
         x_forwarded_for = self.request.META.get('HTTP_X_FORWARDED_FOR')
@@ -289,3 +429,104 @@ class ContentRatingViewSet(viewsets.ModelViewSet):
             user_ip = self.request.META.get('REMOTE_ADDR')
         
         serializer.save(user_ip=user_ip)
+    
+    @transaction.atomic
+    def perform_update(self, serializer):
+        serializer.save()
+    
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def cache_stats(request):
+    """Hit/miss metrics of the response cache"""
+    return Response(response_cache.stats())
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def profiling_stats(request):
+    """Rolling per-endpoint timings recorded by ProfilingMiddleware"""
+    return Response({
+        'enabled': get_setting('PROFILING_ENABLED'),
+        'endpoints': profile_stats.snapshot(),
+    })
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint"""
+    return HttpResponse(render_metrics(collect_metrics()), content_type=METRICS_CONTENT_TYPE)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def content_bundle(request):
+    """
+    Offline bundle of all active categories and content, or a delta with
+    ?since=<version>. The body is pre-compressed according to
+    Accept-Encoding; ETag / X-Content-Hash carry the SHA-256 of the JSON.
+    """
+    encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING'))
+    since = request.query_params.get('since')
+    
+    if since is not None:
+        try:
+            since = int(since)
+            version_datetime(since)
+        except (ValueError, OverflowError):
+            return Response({'since': 'Must be a bundle version'}, status=status.HTTP_400_BAD_REQUEST)
+        payload = build_delta_payload(since)
+        body = encode(payload)
+        version, content_hash = payload['version'], hashlib.sha256(body).hexdigest()
+    else:
+        manifest = current_manifest()
+        version, content_hash = manifest['version'], manifest['hash']
+    
+    etag = f'"{content_hash}"' if encoding == 'identity' else f'"{content_hash}-{encoding}"'
+    if content_hash in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+    
+    if since is not None:
+        data = compress(body, encoding)
+    else:
+        try:
+            data = read_bundle_file(manifest, encoding)
+        except OSError:
+            # Another process replaced the bundle after we read the manifest
+            manifest = current_manifest()
+            version, content_hash = manifest['version'], manifest['hash']
+            etag = f'"{content_hash}"' if encoding == 'identity' else f'"{content_hash}-{encoding}"'
+            data = read_bundle_file(manifest, encoding)
+    
+    response = HttpResponse(data, content_type='application/json')
+    if encoding != 'identity':
+        response['Content-Encoding'] = encoding
+    response['Vary'] = 'Accept-Encoding'
+    response['ETag'] = etag
+    response['X-Content-Hash'] = content_hash
+    response['X-Bundle-Version'] = str(version)
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def sync_changes(request):
+    """
+    Change feed of categories and content. Start without a cursor, then
+    pass back the returned cursor; repeat while has_more is true.
+    """
+    try:
+        limit = int(request.query_params.get('limit', 0))
+    except ValueError:
+        limit = -1
+    if limit < 0:
+        return Response({'limit': 'Must be a non-negative integer'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        return Response(get_changes(request.query_params.get('cursor'), limit or None))
+    except InvalidCursor:
+        return Response({'cursor': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
@@ -59,9 +59,9 @@ def main():
         run_command("python manage.py createsuperuser", "Creating superuser")
     
     # Populate health content
-    if not run_command("python manage.py shell < populate_health_content.py", "Populating health content"):
+    if not run_command("python manage.py load_health_content", "Populating health content"):
         print("Failed to populate content. You can run it manually later:")
-        print("python manage.py shell < populate_health_content.py")
+        print("python manage.py load_health_content")
     
     print("\n" + "🎉" * 20)
     print("E-Arogya Backend Setup Complete!")
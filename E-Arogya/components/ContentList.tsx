@@ -34,6 +34,8 @@ const ContentList: React.FC<ContentListProps> = ({ categorySlug, color }) => {
   const [content, setContent] = useState<ContentItem[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [nextUrl, setNextUrl] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const router = useRouter();
   const colorScheme = useColorScheme();
   const isDark = colorScheme === 'dark';
@@ -44,10 +46,11 @@ const ContentList: React.FC<ContentListProps> = ({ categorySlug, color }) => {
     setError(null);
     
     try {
-      console.log('[ContentList] Calling healthApi.getCategoryContent...');
-      const data = await healthApi.getCategoryContent(categorySlug);
-      console.log(`[ContentList] Received ${data.length} items from API`);
-      setContent(data);
+      console.log('[ContentList] Calling healthApi.getCategoryContentPage...');
+      const page = await healthApi.getCategoryContentPage(categorySlug);
+      console.log(`[ContentList] Received ${page.results.length} items from API`);
+      setContent(page.results);
+      setNextUrl(page.next);
     } catch (err: unknown) {
       const errorMessage = err instanceof Error ? 
         (err as any).status === 404 ? 
@@ -74,6 +77,23 @@ const ContentList: React.FC<ContentListProps> = ({ categorySlug, color }) => {
     fetchContent();
   }, [fetchContent]);
 
+  // Load the next cursor page when the list is scrolled near its end
+  const fetchMore = useCallback(async () => {
+    if (!nextUrl || loadingMore) {
+      return;
+    }
+    setLoadingMore(true);
+    try {
+      const page = await healthApi.getCategoryContentPage(categorySlug, nextUrl);
+      setContent((items) => [...items, ...page.results]);
+      setNextUrl(page.next);
+    } catch (err) {
+      console.error('[ContentList] Error loading more content:', err);
+    } finally {
+      setLoadingMore(false);
+    }
+  }, [categorySlug, nextUrl, loadingMore]);
+
   const handleContentPress = async (item: ContentItem) => {
     // Track the view
     await healthApi.incrementView(item.id);
@@ -182,6 +202,9 @@ const ContentList: React.FC<ContentListProps> = ({ categorySlug, color }) => {
       keyExtractor={(item) => item.id.toString()}
       contentContainerStyle={styles.listContainer}
       showsVerticalScrollIndicator={false}
+      onEndReached={fetchMore}
+      onEndReachedThreshold={0.5}
+      ListFooterComponent={loadingMore ? <ActivityIndicator color={color} /> : null}
       ListEmptyComponent={
         <View style={styles.emptyContainer}>
           <MaterialIcons name="info-outline" size={48} color={isDark ? '#666' : '#999'} />
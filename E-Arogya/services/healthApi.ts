@@ -55,6 +55,31 @@ interface Category {
   is_active: boolean;
 }
 
+interface ContentPage {
+  next: string | null;
+  previous: string | null;
+  results: ContentItem[];
+}
+
+interface ContentBundle {
+  format: number;
+  version: number;
+  since?: number;
+  generated_at: string;
+  categories: Category[];
+  content: (ContentItem & { category: number })[];
+  removed_categories?: number[];
+  removed_content?: number[];
+}
+
+interface SyncBatch {
+  cursor: string;
+  has_more: boolean;
+  categories: Category[];
+  content: (ContentItem & { category: number })[];
+  removed: { categories: number[]; content: number[] };
+}
+
 export const healthApi = {
   // Get all health categories
   getCategories: async (): Promise<Category[]> => {
@@ -96,6 +121,61 @@ export const healthApi = {
     }
   },
   
+  // Get one cursor page of a category's content (for infinite scroll).
+  // Pass the `next` URL of the previous page to continue.
+  getCategoryContentPage: async (slug: string, nextUrl?: string | null): Promise<ContentPage> => {
+    try {
+      const url = nextUrl || `${API_BASE_URL}/categories/${slug}/content/?pagination=cursor&count=false`;
+      const response = await fetch(url, {
+        method: 'GET',
+        headers: {
+          'Accept': 'application/json',
+          'Content-Type': 'application/json',
+        },
+      });
+      return handleResponse(response);
+    } catch (error) {
+      console.error(`[API] Error in getCategoryContentPage for ${slug}:`, error);
+      throw error;
+    }
+  },
+  
+  // Get the whole catalog in one (compressed) request for offline use.
+  // Pass the version of the bundle you already have to get only the changes.
+  getContentBundle: async (since?: number): Promise<ContentBundle> => {
+    try {
+      const url = since ? `${API_BASE_URL}/bundle/?since=${since}` : `${API_BASE_URL}/bundle/`;
+      const response = await fetch(url, {
+        method: 'GET',
+        headers: {
+          'Accept': 'application/json',
+        },
+      });
+      return handleResponse(response);
+    } catch (error) {
+      console.error('[API] Error in getContentBundle:', error);
+      throw error;
+    }
+  },
+  
+  // Get one batch of catalog changes since a stored sync cursor (omit it for
+  // a full sync); keep calling with the returned cursor while has_more is true.
+  getChanges: async (cursor?: string | null): Promise<SyncBatch> => {
+    try {
+      const url = cursor ? `${API_BASE_URL}/sync/?cursor=${encodeURIComponent(cursor)}` : `${API_BASE_URL}/sync/`;
+      const response = await fetch(url, {
+        method: 'GET',
+        headers: {
+          'Accept': 'application/json',
+        },
+      });
+      return handleResponse(response);
+    } catch (error) {
+      console.error('[API] Error in getChanges:', error);
+      throw error;
+    }
+  },
+  
   // Get featured content
   getFeaturedContent: async (): Promise<ContentItem[]> => {
     try {
@@ -117,7 +197,8 @@ export const healthApi = {
       if (!response.ok) {
         throw new Error('Search failed');
       }
-      return response.json();
+      const data = await response.json();
+      return data.results || data; // Search results are paginated
     } catch (error) {
       console.error('Error searching content:', error);
       return [];